@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Load-shedding test for the production server
+Floods one serve.py worker with Wikipedia commands against a slowed stub
+Wikipedia API while probe clients ask for the time and date, with and
+without admission control, and reports the probes' latency next to how
+the flood was answered
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import warnings
+
+from bench_pipeline import StubWikipediaServer, percentile
+from bench_serve import free_port, start_server
+
+
+def client(port, commands, stop, outcomes, latencies, lock, pause=0.0):
+    """Send commands until stop is set, recording status and latency"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    headers = {"Content-Type": "application/json"}
+    for command in commands:
+        if stop.is_set():
+            break
+        start = time.perf_counter()
+        pause_for = pause
+        try:
+            conn.request("POST", "/chat", json.dumps({"message": command}), headers)
+            response = conn.getresponse()
+            body = json.loads(response.read())
+            cookie = response.getheader("Set-Cookie")
+            if cookie:
+                headers["Cookie"] = cookie.split(";", 1)[0]
+            if response.status == 503:
+                outcome = 'busy'
+                # Well-behaved clients back off as told
+                pause_for = float(response.getheader("Retry-After", 0))
+            elif "taking too long" in body.get('response', ''):
+                outcome = 'timed_out'
+            else:
+                outcome = 'ok' if response.status == 200 else 'error'
+        except (OSError, http.client.HTTPException, ValueError):
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            outcome = 'error'
+        elapsed = time.perf_counter() - start
+        with lock:
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            latencies.append(elapsed)
+        if pause_for:
+            stop.wait(pause_for)
+    conn.close()
+
+
+def run(api_url, admission, flood, probes, duration, threads):
+    """Start a one-worker server and run the flood and probe clients against it"""
+    scratch = tempfile.mkdtemp()
+    env = dict(os.environ)
+    env["WIKIPEDIA_CACHE_PATH"] = os.path.join(scratch, "wikipedia.sqlite3")
+    env["CONVERSATION_LOG_DIR"] = os.path.join(scratch, "conversations")
+    env["ADMISSION_CONTROL"] = "1" if admission else "0"
+
+    port = free_port()
+    server = start_server(api_url, port, 1, threads, env)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    flood_outcomes, flood_latencies = {}, []
+    probe_outcomes, probe_latencies = {}, []
+
+    # Every flood command names a new topic, so no cache absorbs it
+    topics = itertools.count()
+    workers = [
+        threading.Thread(target=client, args=(
+            port, (f"search wikipedia for topic {next(topics)}" for _ in itertools.count()),
+            stop, flood_outcomes, flood_latencies, lock))
+        for _ in range(flood)
+    ] + [
+        threading.Thread(target=client, args=(
+            port, itertools.cycle(["what time is it", "what date is it"]),
+            stop, probe_outcomes, probe_latencies, lock, 0.05))
+        for _ in range(probes)
+    ]
+    try:
+        for t in workers:
+            t.start()
+        time.sleep(duration)
+        stop.set()
+        for t in workers:
+            t.join()
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    ordered = sorted(probe_latencies) or [0.0]
+    return {
+        'admission_control': admission,
+        'flood_clients': flood,
+        'probe_latency_ms': {
+            'p50': round(percentile(ordered, 0.50) * 1000, 1),
+            'p99': round(percentile(ordered, 0.99) * 1000, 1),
+            'max': round(ordered[-1] * 1000, 1),
+        },
+        'probe_requests': len(probe_latencies),
+        'probe_outcomes': probe_outcomes,
+        'flood_outcomes': flood_outcomes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show time/date latency while Wikipedia is slow")
+    parser.add_argument("--latency", type=float, default=2.0, help="Stub seconds per API request")
+    parser.add_argument("--flood", type=int, default=24, help="Clients sending Wikipedia commands")
+    parser.add_argument("--probes", type=int, default=2, help="Clients sending time/date commands")
+    parser.add_argument("--threads", type=int, default=8, help="Request threads of the single worker")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per scenario")
+    parser.add_argument("--json", action="store_true", help="Print the JSON report instead of a table")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", module="wikipedia")
+    stub = StubWikipediaServer(args.latency).start()
+
+    scenarios = [(True, 0), (False, args.flood), (True, args.flood)]
+    results = [run(stub.api_url, admission, flood, args.probes, args.duration, args.threads)
+               for admission, flood in scenarios]
+    stub.shutdown()
+
+    if args.json:
+        print(json.dumps({'stub_latency_s': args.latency, 'results': results}, indent=2))
+        return
+
+    print("=" * 78)
+    print(f"LOAD SHEDDING (stub Wikipedia {args.latency * 1000:.0f} ms, 1 worker x {args.threads} threads)")
+    print("=" * 78)
+    print(f"{'scenario':<26}{'time/date p50':>14}{'p99':>11}{'max':>11}   wikipedia flood")
+    for r in results:
+        name = "no flood" if not r['flood_clients'] else (
+            f"flood, admission {'on' if r['admission_control'] else 'off'}")
+        lat = r['probe_latency_ms']
+        flood = ", ".join(f"{k} {v}" for k, v in sorted(r['flood_outcomes'].items())) or "-"
+        print(f"{name:<26}{lat['p50']:>11.1f} ms{lat['p99']:>8.1f} ms{lat['max']:>8.1f} ms   {flood}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
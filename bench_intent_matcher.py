@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for intent matching
+Compares the old per-pattern re.search loop with the compiled IntentMatcher
+at 1x, 10x and 100x the current number of command patterns
+"""
+
+import re
+import sys
+import time
+from voice_assistant.intent_matcher import IntentMatcher
+
+# Same patterns CommandProcessor registers today
+BASE_PATTERNS = {
+    'time': [r'what time is it', r'tell me the time', r'current time', r'time'],
+    'date': [r'what date is it', r'tell me the date', r'current date', r'date', r'what day is it'],
+    'wikipedia': [r'search wikipedia for (.+)', r'wikipedia (.+)', r'look up (.+)', r'tell me about (.+)'],
+    'web': [r'open (.+)', r'go to (.+)', r'browse (.+)', r'visit (.+)'],
+    'greeting': [r'hello', r'hi', r'hey', r'good morning', r'good afternoon', r'good evening'],
+    'help': [r'help', r'what can you do', r'commands', r'assistance'],
+    'weather': [r'weather', r'temperature', r'forecast'],
+}
+
+COMMANDS = [
+    "what time is it",
+    "what date is it",
+    "search wikipedia for artificial intelligence",
+    "open google",
+    "hello",
+    "help",
+    "tell me about the history of time keeping",
+    "this sentence matches nothing at all",
+]
+
+
+def build_patterns(scale):
+    """Return the base patterns plus synthetic intents up to `scale` times the pattern count"""
+    patterns = dict(BASE_PATTERNS)
+    base_count = sum(len(p) for p in BASE_PATTERNS.values())
+    extra = base_count * (scale - 1)
+    for i in range(extra // 2):
+        # Synthetic intents are registered ahead of the real ones so the
+        # naive loop has to walk all of them, as it would for new intents
+        patterns = {f'synthetic_{i}': [rf'run task {i} with (.+)', rf'status {i}'], **patterns}
+    return patterns
+
+
+def naive_match(command_patterns, command):
+    """The original CommandProcessor.process_command matching loop"""
+    for command_type, patterns in command_patterns.items():
+        for pattern in patterns:
+            match = re.search(pattern, command)
+            if match:
+                return command_type, match
+    return None, None
+
+
+def run(label, func, duration=1.0):
+    """Call func over COMMANDS for `duration` seconds and return matches/sec"""
+    calls = 0
+    start = time.perf_counter()
+    deadline = start + duration
+    while time.perf_counter() < deadline:
+        for command in COMMANDS:
+            func(command)
+        calls += len(COMMANDS)
+    elapsed = time.perf_counter() - start
+    rate = calls / elapsed
+    print(f"   {label:<10} {rate:>12,.0f} matches/sec")
+    return rate
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+
+    print("=" * 50)
+    print("INTENT MATCHER BENCHMARK")
+    print("=" * 50)
+
+    for scale in (1, 10, 100):
+        patterns = build_patterns(scale)
+        matcher = IntentMatcher(patterns)
+        print(f"\n{scale}x patterns ({len(matcher)} total)")
+        naive = run("naive", lambda c: naive_match(patterns, c), duration)
+        compiled = run("compiled", matcher.match, duration)
+        print(f"   speedup    {compiled / naive:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
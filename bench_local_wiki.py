@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark lookups/sec against the offline Wikipedia index
+Uses the index given on the command line, or builds a synthetic one
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from voice_assistant.local_wiki import LocalWikiIndex
+
+SYNTHETIC_PAGES = 200000
+WORDS = ("alpha beta gamma delta epsilon zeta theta kappa lambda sigma omega "
+         "river mountain city history science music planet language").split()
+
+
+def synthetic_records(count, seed=0):
+    """Yield reproducible (title, abstract) pairs"""
+    rng = random.Random(seed)
+    for i in range(count):
+        title = " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(1, 3))) + f" {i}"
+        yield title, f"{title} is a synthetic article. It exists for benchmarking. Nothing else is known."
+
+
+def run(label, index, queries, duration):
+    """Look up queries for `duration` seconds and return lookups/sec"""
+    lookups = found = 0
+    start = time.perf_counter()
+    deadline = start + duration
+    while time.perf_counter() < deadline:
+        for query in queries:
+            if index.summary(query):
+                found += 1
+        lookups += len(queries)
+    rate = lookups / (time.perf_counter() - start)
+    print(f"   {label:<18} {rate:>10,.0f} lookups/sec ({found / lookups:.0%} found)")
+    return rate
+
+
+def main():
+    duration = 1.0
+    tmp_dir = None
+
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+    else:
+        tmp_dir = tempfile.mkdtemp()
+        path = os.path.join(tmp_dir, "synthetic.sqlite3")
+        start = time.perf_counter()
+        LocalWikiIndex.build(path, synthetic_records(SYNTHETIC_PAGES))
+        print(f"Built synthetic index of {SYNTHETIC_PAGES:,} pages in {time.perf_counter() - start:.1f}s")
+
+    index = LocalWikiIndex(path)
+    titles = [row[0] for row in index._connection().execute(
+        "SELECT title FROM pages ORDER BY random() LIMIT 200")]
+
+    print("=" * 50)
+    print(f"LOCAL WIKIPEDIA INDEX BENCHMARK ({index.count():,} pages)")
+    print("=" * 50)
+    run("exact title", index, titles, duration)
+    run("case-insensitive", index, [t.upper() for t in titles], duration)
+    run("prefix", index, [t[:max(3, len(t) // 2)].lower() for t in titles], duration)
+    run("fuzzy", index, [" ".join(reversed(t.lower().split())) for t in titles], duration)
+
+    if tmp_dir:
+        os.remove(path)
+        os.rmdir(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the command pipeline
+Runs CommandProcessor against a local stub of the MediaWiki API endpoints
+the wikipedia package calls, with configurable latency and error injection,
+and reports throughput and latency percentiles per intent mix
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import random
+import statistics
+import threading
+import time
+import warnings
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from config import Config
+from voice_assistant import command_processor
+from voice_assistant.command_processor import CommandProcessor
+from voice_assistant.wiki_cache import WikiCache
+
+
+class StubWikipediaHandler(BaseHTTPRequestHandler):
+    """
+    Answers the subset of api.php used by wikipedia.search/summary
+
+    Titles starting with 'nothing' do not exist, titles starting with
+    'mercury' are disambiguation pages, every other title exists.
+    """
+
+    def do_GET(self):
+        stub = self.server
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query, keep_blank_values=True).items()}
+
+        delay = stub.latency + stub.rng.uniform(0, stub.jitter)
+        if delay:
+            time.sleep(delay)
+
+        with stub.lock:
+            stub.requests += 1
+            inject_error = stub.rng.random() < stub.error_rate
+
+        if inject_error:
+            with stub.lock:
+                stub.errors += 1
+            self._send(500, b"upstream error", "text/plain")
+            return
+
+        if params.get('list') == 'search':
+            body = self._search(params)
+        elif params.get('prop') == 'info|pageprops':
+            body = self._page_info(params.get('titles', ''))
+        elif params.get('prop') == 'revisions':
+            body = self._disambiguation(params.get('titles', ''))
+        elif params.get('prop') == 'extracts':
+            body = self._extract(params.get('titles', ''), int(params.get('exsentences', 2)))
+        else:
+            body = {'error': {'info': f"unsupported request {params}"}}
+
+        self._send(200, json.dumps(body).encode(), "application/json")
+
+    def _send(self, status, payload, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    @staticmethod
+    def _page_id(title):
+        return str(zlib.crc32(title.encode()) & 0x7fffffff)
+
+    def _search(self, params):
+        query = params.get('srsearch', '')
+        results = [] if query.lower().startswith('nothing') else [{'title': query.title()}]
+        return {'query': {'search': results}}
+
+    def _page_info(self, title):
+        page_id = self._page_id(title)
+        if title.lower().startswith('nothing'):
+            return {'query': {'pages': {'-1': {'title': title, 'missing': ''}}}}
+        page = {'pageid': int(page_id), 'title': title, 'fullurl': f"https://en.wikipedia.org/wiki/{title}"}
+        if title.lower().startswith('mercury') and '(' not in title:
+            page['pageprops'] = {'disambiguation': ''}
+        return {'query': {'pages': {page_id: page}}}
+
+    def _disambiguation(self, title):
+        html = f'<ul><li><a href="#">{title} (planet)</a></li><li><a href="#">{title} (element)</a></li></ul>'
+        return {'query': {'pages': {self._page_id(title): {'revisions': [{'*': html}]}}}}
+
+    def _extract(self, title, sentences):
+        text = " ".join(f"{title} stub sentence {n + 1}." for n in range(sentences))
+        return {'query': {'pages': {self._page_id(title): {'title': title, 'extract': text}}}}
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubWikipediaServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 makes concurrent clients wait on SYN retries
+    request_queue_size = 256
+
+    def __init__(self, latency=0.05, jitter=0.0, error_rate=0.0, seed=0):
+        """
+        Start listening on a free localhost port
+
+        Args:
+            latency: Seconds added to every API request
+            jitter: Extra random seconds (uniform 0..jitter) per request
+            error_rate: Fraction of requests answered with HTTP 500
+            seed: Random seed for jitter and error injection
+        """
+        super().__init__(("127.0.0.1", 0), StubWikipediaHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def api_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/w/api.php"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def point_wikipedia_at(api_url):
+    """Make the wikipedia package send its requests to api_url"""
+    # Load the module and set the language first: set_lang() resets API_URL
+    command_processor._set_wikipedia_language(Config.WIKIPEDIA_LANGUAGE)
+    importlib.import_module('wikipedia.wikipedia').API_URL = api_url
+
+
+# Each mix maps request number -> command. Topics carry the request number so
+# neither the wikipedia module's memoization nor WikiCache hides the backend.
+MIXES = {
+    'time_date': lambda i, rng: "what time is it" if i % 2 else "what date is it",
+    'wikipedia_heavy': lambda i, rng: rng.choices(
+        [f"search wikipedia for topic {i}", f"tell me about nothing {i}", f"look up mercury {i}", "what time is it"],
+        weights=[80, 10, 5, 5])[0],
+    'unknown_heavy': lambda i, rng: rng.choices(
+        [f"please sing me song number {i}", "hello", "what time is it"],
+        weights=[80, 10, 10])[0],
+}
+
+
+# Responses that mean the pipeline failed rather than answered
+ERROR_RESPONSES = ("Sorry, I had trouble", "Sorry, I encountered", "Sorry, Wikipedia took too long")
+
+
+def is_error(response):
+    return response.startswith(ERROR_RESPONSES) or "taking too long" in response
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_mix(name, requests, concurrency, seed=0):
+    """Run one intent mix through a fresh CommandProcessor and summarize it"""
+    rng = random.Random(seed)
+    commands = [MIXES[name](i, rng) for i in range(requests)]
+
+    # Memory-only cache, so runs are independent of each other and of ~/.cache
+    processor = CommandProcessor(None, wiki_cache=WikiCache())
+    latencies = [0.0] * requests
+    responses = [None] * requests
+
+    def one(i):
+        start = time.perf_counter()
+        responses[i] = processor.process_command(commands[i])
+        latencies[i] = time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return {
+        'mix': name,
+        'requests': requests,
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 4),
+        'throughput_rps': round(requests / elapsed, 2),
+        'latency_ms': {
+            'mean': round(statistics.fmean(ordered) * 1000, 3),
+            'p50': round(percentile(ordered, 0.50) * 1000, 3),
+            'p95': round(percentile(ordered, 0.95) * 1000, 3),
+            'p99': round(percentile(ordered, 0.99) * 1000, 3),
+            'max': round(ordered[-1] * 1000, 3),
+        },
+        'error_responses': sum(1 for r in responses if is_error(r)),
+        'intents': {
+            intent: stats for intent, stats in processor.registry.stats().items() if stats['calls']
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CommandProcessor against a stub Wikipedia API")
+    parser.add_argument("--mix", action="append", choices=sorted(MIXES),
+                        help="Intent mix to run (repeatable, default: all)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per mix")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel callers")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub seconds per API request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random stub seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API requests that fail")
+    parser.add_argument("--resolution", choices=["parallel", "sequential"], default=Config.WIKIPEDIA_RESOLUTION,
+                        help="Wikipedia resolution mode")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--json", action="store_true", help="Print the JSON report instead of a table")
+    args = parser.parse_args()
+
+    Config.WIKIPEDIA_RESOLUTION = args.resolution
+    # Measure the pipeline itself, not how much admission control sheds
+    Config.ADMISSION_CONTROL = False
+    # The wikipedia package parses disambiguation pages without naming a parser
+    warnings.filterwarnings("ignore", module="wikipedia")
+    server = StubWikipediaServer(args.latency, args.jitter, args.error_rate, args.seed).start()
+    point_wikipedia_at(server.api_url)
+
+    # Keep the per-command "Processing ..." prints out of the report
+    results = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for name in args.mix or sorted(MIXES):
+            results.append(run_mix(name, args.requests, args.concurrency, args.seed))
+
+    server.shutdown()
+
+    report = {
+        'settings': {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'stub_latency_s': args.latency,
+            'stub_jitter_s': args.jitter,
+            'stub_error_rate': args.error_rate,
+            'resolution': args.resolution,
+        },
+        'stub': {'api_requests': server.requests, 'injected_errors': server.errors},
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("=" * 72)
+    print("COMMAND PIPELINE BENCHMARK (stub Wikipedia "
+          f"{args.latency * 1000:.0f} ms, {args.error_rate:.0%} errors, {args.resolution})")
+    print("=" * 72)
+    print(f"{'mix':<18}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for r in results:
+        lat = r['latency_ms']
+        print(f"{r['mix']:<18}{r['throughput_rps']:>10.1f}{lat['p50']:>10.1f}"
+              f"{lat['p95']:>10.1f}{lat['p99']:>10.1f}{r['error_responses']:>8}")
+
+
+if __name__ == "__main__":
+    main()
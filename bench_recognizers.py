@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the speech recognizer backends
+Runs each backend over a directory of recorded WAV fixtures (16-bit mono,
+with an optional same-named .txt transcript) and reports its real-time
+factor and word error rate. It then replays the fixtures at real speed
+through SpeechHandler, the way a microphone would feed it, and reports
+latency from the end of each phrase to its transcript, with recognition
+on the worker pool and, for comparison, inline with capture.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import speech_recognition as sr
+
+from config import Config
+from voice_assistant.audio_capture import FileSource
+from voice_assistant.recognizers import create_backend
+from voice_assistant.speech_handler import SpeechHandler
+
+
+class TimedFileSource(FileSource):
+    """FileSource that notes when each chunk was captured"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.captured_at = []
+
+    def read(self):
+        chunk = super().read()
+        if chunk is not None:
+            self.captured_at.append(time.perf_counter())
+        return chunk
+
+
+def load_fixtures(directory):
+    """Return [(path, transcript or None)] for the WAV files in directory"""
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        transcript_path = os.path.splitext(path)[0] + ".txt"
+        transcript = None
+        if os.path.exists(transcript_path):
+            with open(transcript_path) as f:
+                transcript = f.read().strip()
+        fixtures.append((path, transcript))
+    return fixtures
+
+
+def word_errors(reference, hypothesis):
+    """Word-level edit distance between two transcripts"""
+    ref = reference.lower().split()
+    hyp = (hypothesis or "").lower().split()
+    row = list(range(len(hyp) + 1))
+    for i, word in enumerate(ref, 1):
+        previous, row[0] = row[0], i
+        for j, other in enumerate(hyp, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (word != other))
+    return row[-1]
+
+
+def offline_pass(backend, fixtures):
+    """Transcribe each fixture in turn; real-time factor and word error rate"""
+    audio_seconds = busy_seconds = 0.0
+    errors = words = 0
+    failures = 0
+    for path, transcript in fixtures:
+        with sr.AudioFile(path) as source:
+            audio = sr.Recognizer().record(source)
+        start = time.perf_counter()
+        try:
+            text = backend.transcribe(audio)
+        except (sr.UnknownValueError, sr.RequestError):
+            text = None
+            failures += 1
+        busy_seconds += time.perf_counter() - start
+        audio_seconds += len(audio.frame_data) / audio.sample_width / audio.sample_rate
+        if transcript:
+            errors += word_errors(transcript, text)
+            words += len(transcript.split())
+    return {
+        'audio_seconds': round(audio_seconds, 2),
+        'real_time_factor': round(busy_seconds / audio_seconds, 3),
+        'word_error_rate': round(errors / words, 3) if words else None,
+        'failures': failures,
+    }
+
+
+def replay_pass(backend, fixtures, pooled, lead_in_path):
+    """Replay the fixtures in real time through SpeechHandler; latency per phrase"""
+    source = TimedFileSource([lead_in_path] + [path for path, _ in fixtures], silence=1.0, realtime=True)
+    speech = SpeechHandler(source=source, backend=backend)
+    pause = speech.recognizer.pause_threshold
+
+    recognitions = []  # (future, wall time the phrase's speech ended)
+    latencies = []
+    while True:
+        audio = speech.listen(timeout=3)
+        if audio is None:
+            break
+        speech_ended = source.captured_at[speech.position - 1] - pause
+        future = speech.recognize_async(audio)
+        if pooled:
+            future.add_done_callback(
+                lambda f, ended=speech_ended: latencies.append(time.perf_counter() - ended))
+            recognitions.append(future)
+        else:
+            speech.result(future)
+            latencies.append(time.perf_counter() - speech_ended)
+    for future in recognitions:
+        speech.result(future)
+    stats = speech.pool.stats()
+    speech.close()
+
+    latencies.sort()
+    return {
+        'phrases': len(latencies),
+        'latency_ms': {
+            'p50': round(latencies[len(latencies) // 2] * 1000) if latencies else None,
+            'max': round(latencies[-1] * 1000) if latencies else None,
+        },
+        'pool_real_time_factor': stats['real_time_factor'],
+        'errors': stats['errors'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure recognizer real-time factor and latency on recorded fixtures")
+    parser.add_argument("fixtures", help="Directory of WAV recordings (with optional .txt transcripts)")
+    parser.add_argument("--backends", nargs="+", default=["sphinx", "vosk", "google"],
+                        help="Backends to measure")
+    parser.add_argument("--workers", type=int, default=Config.RECOGNIZER_WORKERS, help="Recognition pool size")
+    parser.add_argument("--vosk-model", default=Config.VOSK_MODEL_PATH, help="Unpacked Vosk model directory")
+    parser.add_argument("--skip-replay", action="store_true", help="Only measure the offline pass")
+    parser.add_argument("--json", action="store_true", help="Print the JSON report instead of a table")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"No WAV files in {args.fixtures}")
+        return 1
+    Config.RECOGNIZER_WORKERS = args.workers
+
+    # Quiet lead-in, so the noise calibration settles before the first phrase
+    scratch = tempfile.mkdtemp()
+    lead_in = os.path.join(scratch, "lead-in.wav")
+    with sr.AudioFile(fixtures[0][0]) as source:
+        rate = source.SAMPLE_RATE
+    with wave.open(lead_in, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(bytes(2 * int(rate * 2.5)))
+
+    results = []
+    for name in args.backends:
+        start = time.perf_counter()
+        try:
+            backend = create_backend(name, vosk_model_path=args.vosk_model)
+        except (ImportError, ValueError, RuntimeError) as e:
+            results.append({'backend': name, 'unavailable': str(e)})
+            continue
+        result = {'backend': name, 'offline': backend.offline,
+                  'load_ms': round((time.perf_counter() - start) * 1000)}
+        result.update(offline_pass(backend, fixtures))
+        if not args.skip_replay:
+            result['replay_pool'] = replay_pass(backend, fixtures, True, lead_in)
+            result['replay_inline'] = replay_pass(backend, fixtures, False, lead_in)
+        results.append(result)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("=" * 86)
+    print(f"RECOGNIZER BACKENDS ({len(fixtures)} fixtures, {args.workers} workers)")
+    print("=" * 86)
+    print(f"{'backend':<10}{'load ms':>9}{'RTF':>8}{'WER':>8}{'fail':>6}"
+          f"{'pool p50/max ms':>20}{'inline p50/max ms':>22}")
+    for r in results:
+        if 'unavailable' in r:
+            print(f"{r['backend']:<10}unavailable: {r['unavailable']}")
+            continue
+        wer = f"{r['word_error_rate']:.2f}" if r['word_error_rate'] is not None else "-"
+        row = f"{r['backend']:<10}{r['load_ms']:>9}{r['real_time_factor']:>8.2f}{wer:>8}{r['failures']:>6}"
+        for mode in ('replay_pool', 'replay_inline'):
+            lat = r.get(mode, {}).get('latency_ms', {})
+            cell = f"{lat['p50']}/{lat['max']}" if lat.get('p50') is not None else "-"
+            row += f"{cell:>20}" if mode == 'replay_pool' else f"{cell:>22}"
+        print(row)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Load test for the production server
+Starts serve.py with increasing worker counts against the stub Wikipedia
+API from bench_pipeline.py and reports /chat throughput and latency for
+each, showing how throughput scales with workers x threads
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import warnings
+
+from bench_pipeline import MIXES, StubWikipediaServer, is_error, percentile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Child process: point the wikipedia package at the stub, then run serve.py.
+# Workers fork from this process, so they inherit the patched API_URL.
+SERVER = """
+import sys, warnings
+warnings.filterwarnings("ignore", module="wikipedia")
+from bench_pipeline import point_wikipedia_at
+point_wikipedia_at({api_url!r})
+import serve
+sys.argv = ["serve.py"] + {argv!r}
+serve.main()
+"""
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(api_url, port, workers, threads, env):
+    """Launch serve.py and wait until it answers"""
+    argv = ["--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--threads", str(threads)]
+    code = SERVER.format(api_url=api_url, argv=argv)
+    process = subprocess.Popen([sys.executable, "-c", code], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/history?limit=1")
+            conn.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"server with {workers} workers did not start")
+
+
+def run_load(port, mix, requests, concurrency, seed):
+    """Send requests from concurrency keep-alive clients and summarize"""
+    rng = random.Random(seed)
+    commands = [MIXES[mix](i, rng) for i in range(requests)]
+    latencies = []
+    errors = 0
+    next_index = iter(range(requests))
+    lock = threading.Lock()
+
+    def client():
+        nonlocal errors
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        headers = {"Content-Type": "application/json"}
+        while True:
+            with lock:
+                i = next(next_index, None)
+            if i is None:
+                break
+            start = time.perf_counter()
+            try:
+                conn.request("POST", "/chat", json.dumps({"message": commands[i]}), headers)
+                response = conn.getresponse()
+                body = response.read()
+                failed = response.status != 200 or is_error(json.loads(body)['response'])
+                # Keep the session cookie so history stays in one session
+                cookie = response.getheader("Set-Cookie")
+                if cookie:
+                    headers["Cookie"] = cookie.split(";", 1)[0]
+            except (OSError, http.client.HTTPException, ValueError, KeyError):
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                failed = True
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                errors += failed
+        conn.close()
+
+    started = time.perf_counter()
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in clients:
+        t.start()
+    for t in clients:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return {
+        'throughput_rps': round(requests / elapsed, 2),
+        'latency_ms': {
+            'p50': round(percentile(ordered, 0.50) * 1000, 1),
+            'p95': round(percentile(ordered, 0.95) * 1000, 1),
+            'p99': round(percentile(ordered, 0.99) * 1000, 1),
+        },
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test serve.py at several worker counts")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to test")
+    parser.add_argument("--threads", type=int, default=4, help="Threads per worker")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="wikipedia_heavy")
+    parser.add_argument("--requests", type=int, default=150, help="Requests per worker count")
+    parser.add_argument("--concurrency", type=int, default=32, help="Parallel clients")
+    # Slow enough that requests wait on I/O rather than this host's CPUs
+    parser.add_argument("--latency", type=float, default=0.3, help="Stub seconds per API request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the JSON report instead of a table")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", module="wikipedia")
+    stub = StubWikipediaServer(args.latency, seed=args.seed).start()
+
+    # History is shared between workers, and runs don't share caches
+    results = []
+    for workers in args.workers:
+        scratch = tempfile.mkdtemp()
+        env = dict(os.environ)
+        env["WIKIPEDIA_CACHE_PATH"] = os.path.join(scratch, "wikipedia.sqlite3")
+        env["HISTORY_BACKEND"] = "sqlite"
+        env["HISTORY_PATH"] = os.path.join(scratch, "history.sqlite3")
+        env["CONVERSATION_LOG_DIR"] = os.path.join(scratch, "conversations")
+        # Measure raw capacity rather than how much admission control sheds
+        env["ADMISSION_CONTROL"] = "0"
+
+        port = free_port()
+        server = start_server(stub.api_url, port, workers, args.threads, env)
+        try:
+            result = run_load(port, args.mix, args.requests, args.concurrency, args.seed + workers)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+        results.append(dict(workers=workers, threads=args.threads, **result))
+
+    stub.shutdown()
+
+    if args.json:
+        print(json.dumps({'mix': args.mix, 'stub_latency_s': args.latency, 'results': results}, indent=2))
+        return
+
+    print("=" * 64)
+    print(f"SERVER LOAD TEST ({args.mix}, stub Wikipedia {args.latency * 1000:.0f} ms, "
+          f"{args.concurrency} clients)")
+    print("=" * 64)
+    print(f"{'workers x threads':<20}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for r in results:
+        lat = r['latency_ms']
+        print(f"{r['workers']} x {r['threads']:<16}{r['throughput_rps']:>10.1f}{lat['p50']:>10.1f}"
+              f"{lat['p95']:>10.1f}{lat['p99']:>10.1f}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark for SpeechHandler startup and noise calibration
+Starts SpeechHandler on a real-time stream of background noise standing in
+for a microphone, and reports how long construction takes and how far the
+speech threshold is from the noise level that stream calls for:
+  - blocking: the previous behaviour, measuring the room for 2 seconds
+  - cold: no saved calibration; the threshold is learned in the background
+  - warm: the calibration saved by the cold run is reused
+Then the noise level steps down and up, and the time the background
+calibration takes to follow each step is reported. A step up sounds like
+speech at first, so it is only followed once it has lasted
+NoiseCalibration.noise_seconds.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from config import Config
+from voice_assistant.audio_capture import GeneratorSource
+from voice_assistant.recognizers import GoogleBackend
+from voice_assistant.speech_handler import SpeechHandler
+
+RATE = 16000
+
+
+class NoiseSource(GeneratorSource):
+    """Real-time Gaussian noise at a level that can be changed while running"""
+
+    live = True  # Like a microphone, it doesn't wait for a reader
+    device = "bench noise @ 16000 Hz"
+
+    def __init__(self, level, seed=0):
+        self.level = level
+        self._rng = np.random.default_rng(seed)
+        self._stopped = threading.Event()
+        super().__init__(self._chunks(), RATE, realtime=True)
+
+    def _chunks(self):
+        while not self._stopped.is_set():
+            yield self._rng.normal(0, self.level, Config.CAPTURE_CHUNK)
+
+    def close(self):
+        self._stopped.set()
+
+
+def target_threshold(level):
+    """Threshold the noise calibration should settle on for noise of this level"""
+    return max(30, level * 32767 * 1.5)
+
+
+def settle_time(speech, target, timeout, tolerance=0.15):
+    """Seconds until the speech threshold is within tolerance of target"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if abs(speech.calibration.energy_threshold - target) <= tolerance * target:
+            return time.perf_counter() - start
+        time.sleep(0.01)
+    return None
+
+
+def run(mode, level, steps=(), calibration_file=None, settle_timeout=20):
+    Config.NOISE_CALIBRATION_FILE = calibration_file
+    source = NoiseSource(level)
+    start = time.perf_counter()
+    speech = SpeechHandler(source=source, backend=GoogleBackend())
+    if mode == 'blocking':
+        speech.adjust_for_ambient_noise(duration=2)
+    startup = time.perf_counter() - start
+
+    target = target_threshold(level)
+    result = {
+        'mode': mode,
+        'startup_ms': round(startup * 1000),
+        'loaded': speech.calibration.loaded,
+        'threshold_at_start': round(speech.calibration.energy_threshold),
+        'target_threshold': round(target),
+    }
+    settled = settle_time(speech, target, settle_timeout)
+    result['settle_ms'] = round(settled * 1000) if settled is not None else None
+
+    for name, step_level in steps:
+        source.level = step_level
+        settled = settle_time(speech, target_threshold(step_level), settle_timeout)
+        result[f'{name}_settle_ms'] = round(settled * 1000) if settled is not None else None
+    # Leave the calibration for the first level behind for the next run
+    source.level = level
+    settle_time(speech, target, settle_timeout)
+    speech.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure SpeechHandler startup time and noise calibration")
+    parser.add_argument("--level", type=float, default=0.01, help="Background noise RMS, as a fraction of full scale")
+    parser.add_argument("--quieter", type=float, default=0.003, help="Noise level stepped down to after startup")
+    parser.add_argument("--louder", type=float, default=0.03, help="Noise level stepped up to after that")
+    parser.add_argument("--json", action="store_true", help="Print the JSON report instead of a table")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp()
+    saved = os.path.join(scratch, "noise_calibration.json")
+    results = [
+        run('blocking', args.level, calibration_file=os.path.join(scratch, "blocking.json")),
+        run('cold', args.level, steps=[('down', args.quieter), ('up', args.louder)], calibration_file=saved),
+        run('warm', args.level, calibration_file=saved),
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("=" * 78)
+    print(f"SPEECH HANDLER STARTUP (noise {args.level:g}, then {args.quieter:g} and {args.louder:g})")
+    print("=" * 78)
+    print(f"{'mode':<10}{'startup ms':>12}{'threshold':>11}{'target':>9}{'settle ms':>11}{'down ms':>10}{'up ms':>10}")
+    for r in results:
+        cells = [r.get(key) for key in ('settle_ms', 'down_settle_ms', 'up_settle_ms')]
+        cells = ["-" if cell is None else cell for cell in cells]
+        print(f"{r['mode']:<10}{r['startup_ms']:>12}{r['threshold_at_start']:>11}{r['target_threshold']:>9}"
+              f"{cells[0]:>11}{cells[1]:>10}{cells[2]:>10}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
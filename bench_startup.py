@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the application entry points
+Measures import time plus time to the first response in a fresh
+interpreter for each entry point, and fails if a budget is exceeded
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Code run in the child interpreter after `import <entry point>` is timed
+FIRST_RESPONSE = {
+    'web_app': "web_app.app.test_client().post('/chat', json={'message': 'what time is it'}).get_json()['response']",
+    'streamlit_app': "streamlit_app.get_command_processor().process_command('what time is it')",
+    'demo_mode': "demo_mode.CommandProcessor(None).process_command('what time is it')",
+    'main': "main.CommandProcessor(None).process_command('what time is it')",
+}
+
+# Seconds allowed for import + first response (median of the runs)
+BUDGETS = {
+    'web_app': 0.6,
+    'streamlit_app': 2.5,
+    'demo_mode': 0.6,
+    'main': 0.8,
+}
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+response = {first_response}
+done = time.perf_counter()
+heavy = [m for m in ('wikipedia', 'requests', 'bs4', 'webbrowser', 'pyttsx3') if m in sys.modules]
+print(json.dumps({{'import': imported - start, 'first_response': done - imported,
+                   'response': response, 'heavy_modules': heavy}}))
+"""
+
+
+def measure(module, env):
+    """Run one cold start of module in a fresh interpreter"""
+    code = CHILD.format(module=module, first_response=FIRST_RESPONSE[module])
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start time of each entry point")
+    parser.add_argument("entries", nargs="*", default=list(FIRST_RESPONSE), help="Entry points to measure")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per entry point")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="Multiply every budget, e.g. on slower CI machines")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    # Use a throwaway cache so results don't depend on earlier runs
+    env = dict(os.environ)
+    scratch = tempfile.mkdtemp()
+    env["WIKIPEDIA_CACHE_PATH"] = os.path.join(scratch, "wikipedia.sqlite3")
+    env["CONVERSATION_LOG_DIR"] = os.path.join(scratch, "conversations")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+
+    results = {}
+    failed = False
+
+    if not args.json:
+        print("=" * 60)
+        print("STARTUP BENCHMARK")
+        print("=" * 60)
+
+    for entry in args.entries:
+        try:
+            runs = [measure(entry, env) for _ in range(args.runs)]
+        except Exception as e:
+            results[entry] = {'error': str(e)}
+            failed = True
+            if not args.json:
+                print(f"{entry:<15} ERROR: {e}")
+            continue
+
+        import_s = statistics.median(r['import'] for r in runs)
+        first_s = statistics.median(r['first_response'] for r in runs)
+        total = import_s + first_s
+        budget = BUDGETS[entry] * args.budget_scale
+        ok = total <= budget
+        failed = failed or not ok
+
+        results[entry] = {
+            'import_s': round(import_s, 4),
+            'first_response_s': round(first_s, 4),
+            'total_s': round(total, 4),
+            'budget_s': budget,
+            'ok': ok,
+            'heavy_modules': runs[0]['heavy_modules'],
+        }
+        if not args.json:
+            status = "ok" if ok else "OVER BUDGET"
+            print(f"{entry:<15} import {import_s * 1000:7.1f} ms   first response {first_s * 1000:7.1f} ms"
+                  f"   total {total * 1000:7.1f} / {budget * 1000:.0f} ms   {status}")
+            if runs[0]['heavy_modules']:
+                print(f"{'':<15} eagerly loaded: {', '.join(runs[0]['heavy_modules'])}")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Rerun-time benchmark for the Streamlit chat
+Runs streamlit_app.py headless with streamlit.testing's AppTest over
+histories of growing length and reports the median rerun time when only
+the recent window is rendered and, for comparison, when every message is
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import warnings
+
+from config import Config
+from voice_assistant.chat_history import ChatHistory
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_history(length):
+    """A history of alternating user/assistant messages, some with URLs"""
+    history = ChatHistory(max_messages=max(length, 1), max_bytes=1 << 40)
+    for i in range(length):
+        if i % 2:
+            content = f"Opening https://www.example.com/page/{i} for you."
+        else:
+            content = f"open example page number {i}"
+        history.append("assistant" if i % 2 else "user", content, "12:00:00")
+    return history
+
+
+def rerun_time(length, show_all, runs):
+    """Median seconds for one rerun of the app with length messages"""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(ROOT, "streamlit_app.py"), default_timeout=120)
+    app.run()
+    app.session_state["history"] = make_history(length)
+    if show_all:
+        app.session_state["history_shown"] = max(length, 1)
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - start)
+        if app.exception:
+            raise RuntimeError(app.exception[0].value)
+    return statistics.median(timings), len(app.chat_message)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Streamlit rerun time against history length")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 100, 1000, 5000],
+                        help="History lengths to test")
+    parser.add_argument("--runs", type=int, default=5, help="Reruns per length")
+    parser.add_argument("--skip-all", action="store_true", help="Don't measure rendering every message")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    # Keep the benchmark's messages out of the real conversation log
+    Config.CONVERSATION_LOG_DIR = ""
+    os.environ["CONVERSATION_LOG_DIR"] = ""
+    # and background Wikipedia fetches out of the timings
+    Config.WARM_COMMANDS = []
+    warnings.filterwarnings("ignore")
+    # Bare-mode runs warn about a missing ScriptRunContext on every rerun
+    for name in ("streamlit", "streamlit.runtime.scriptrunner_utils.script_run_context"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    results = []
+    for length in args.lengths:
+        window_s, rendered = rerun_time(length, False, args.runs)
+        result = {'messages': length, 'window_ms': round(window_s * 1000, 1), 'rendered': rendered}
+        if not args.skip_all:
+            all_s, _ = rerun_time(length, True, args.runs)
+            result['all_ms'] = round(all_s * 1000, 1)
+        results.append(result)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("=" * 60)
+    print(f"STREAMLIT RERUN TIME (recent window of {Config.STREAMLIT_RECENT_MESSAGES} messages)")
+    print("=" * 60)
+    print(f"{'messages':>10}{'window ms':>14}{'rendered':>10}{'all ms':>12}")
+    for r in results:
+        all_ms = f"{r['all_ms']:.1f}" if 'all_ms' in r else "-"
+        print(f"{r['messages']:>10}{r['window_ms']:>14.1f}{r['rendered']:>10}{all_ms:>12}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark for the voice loop in main.py
+Replays audio through SpeechHandler in place of the microphone and runs
+VoiceAssistant over it (wake word, command, CommandProcessor, spoken reply)
+with replies going to a silent or WAV file sink, so it runs on a headless
+machine. Reports per-turn timings: capture, recognition, intent processing
+and time from the end of the command to the first audio of the reply.
+
+By default the audio is generated: speech-like sounds standing in for the
+wake word and each command, with a scripted recognizer that returns their
+transcripts after a configurable real-time factor. Recorded audio can be
+replayed instead (a WAV directory or script, see FileSource.from_script),
+with a real recognizer backend or a file of transcripts.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bench_wake_word import OTHER_WORDS, SAMPLE_RATE, WAKE_WORD, enrollment, synth_word
+from config import Config
+from main import VoiceAssistant, print_turns
+from voice_assistant.audio_capture import FileSource
+from voice_assistant.recognizers import ScriptedBackend, create_backend
+from voice_assistant.speech_handler import SpeechHandler
+from voice_assistant.tts_handler import NullTTSHandler, TTSHandler
+from voice_assistant.wake_word import write_wav
+
+COMMANDS = ["what time is it", "what date is it", "hello", "help"]
+WORD_SECONDS = 0.35  # Length of each generated word
+METRICS = ('capture_ms', 'recognition_ms', 'intent_ms', 'first_audio_ms')
+
+
+def make_script(directory, commands, local_wake, rng):
+    """
+    Write a replay script of wake word + command turns
+
+    Returns:
+        (script path, transcripts the recognizer should return, in order)
+    """
+    write_wav(os.path.join(directory, "wake.wav"), synth_word(WAKE_WORD), SAMPLE_RATE)
+    lines = ["silence 1.5"]
+    transcripts = []
+    for i, command in enumerate(commands):
+        # One made-up word per word of the command, each long enough to count as speech
+        words = []
+        for j in range(len(command.split())):
+            phones = OTHER_WORDS[(i + j) % len(OTHER_WORDS)]
+            speed = sum(seconds for _, seconds in phones) / WORD_SECONDS
+            words.append(synth_word(phones, speed=speed, pitch=rng.uniform(110, 140)))
+        gap = np.zeros(int(0.08 * SAMPLE_RATE), dtype=np.float32)
+        name = f"command-{i}.wav"
+        write_wav(os.path.join(directory, name), np.concatenate([part for word in words for part in (word, gap)]),
+                  SAMPLE_RATE)
+        lines += ["wake.wav", "silence 1.2", name, "silence 2.5"]
+        if not local_wake:
+            transcripts.append("hey assistant")
+        transcripts.append(command)
+
+    path = os.path.join(directory, "script.txt")
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return path, transcripts
+
+
+def summarize(turns):
+    summary = {}
+    for key in METRICS:
+        values = sorted(turn[key] for turn in turns if turn[key] is not None)
+        summary[key] = {
+            'p50': round(statistics.median(values)) if values else None,
+            'max': values[-1] if values else None,
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the voice loop end to end from replayed audio")
+    parser.add_argument("replay", nargs="?", help="WAV directory or replay script (default: generated turns)")
+    parser.add_argument("--backend", default="scripted",
+                        help="Recognizer: scripted, sphinx, vosk or google (default: scripted)")
+    parser.add_argument("--transcripts", help="With a replay and the scripted backend: one transcript per phrase")
+    parser.add_argument("--rtf", type=float, default=0.35,
+                        help="Real-time factor of the scripted backend (PocketSphinx measured 0.35)")
+    parser.add_argument("--turns", type=int, default=8, help="Generated turns")
+    parser.add_argument("--local-wake", action="store_true",
+                        help="Detect the generated wake word locally instead of recognizing it")
+    parser.add_argument("--fast", action="store_true",
+                        help="Replay as fast as possible; capture and first audio times then mean little")
+    parser.add_argument("--tts-output", metavar="DIR", help="Synthesize replies to WAV files here (needs pyttsx3)")
+    parser.add_argument("--verbose", action="store_true", help="Show the assistant's own output")
+    parser.add_argument("--json", action="store_true", help="Print the JSON report instead of a table")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp()
+    Config.WAKE_WORD_DIR = os.path.join(scratch, "wake_word")
+    os.makedirs(Config.WAKE_WORD_DIR)
+    Config.NOISE_CALIBRATION_FILE = None
+
+    if args.replay:
+        script = args.replay
+        transcripts = []
+        if args.transcripts:
+            with open(args.transcripts) as f:
+                transcripts = [line.strip() for line in f]
+    else:
+        rng = np.random.default_rng(0)
+        commands = [COMMANDS[i % len(COMMANDS)] for i in range(args.turns)]
+        script, transcripts = make_script(scratch, commands, args.local_wake, rng)
+        if args.local_wake:
+            for name, samples in enrollment(rng=rng).items():
+                write_wav(os.path.join(Config.WAKE_WORD_DIR, name), samples, SAMPLE_RATE)
+
+    if args.backend == 'scripted':
+        backend = ScriptedBackend(transcripts, real_time_factor=args.rtf)
+    else:
+        backend = create_backend(args.backend, language=Config.RECOGNIZER_LANGUAGE,
+                                 sphinx_model_path=Config.SPHINX_MODEL_PATH, vosk_model_path=Config.VOSK_MODEL_PATH)
+
+    output = None if args.verbose else open(os.devnull, "w")
+    with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+        tts = TTSHandler(output_dir=args.tts_output) if args.tts_output else NullTTSHandler()
+        source = FileSource.from_script(script, chunk=Config.CAPTURE_CHUNK, realtime=not args.fast)
+        speech = SpeechHandler(source=source, backend=backend)
+        assistant = VoiceAssistant(speech=speech, tts=tts)
+        start = time.perf_counter()
+        assistant.start()
+        wall = time.perf_counter() - start
+    turns = list(assistant.turns)
+    audio_seconds = speech.capture.seconds(speech.capture.position())
+
+    report = {
+        'backend': backend.name,
+        'wake_word': 'local' if assistant.wake_word is not None else 'recognized',
+        'realtime': not args.fast,
+        'audio_seconds': round(audio_seconds, 2),
+        'wall_seconds': round(wall, 2),
+        'turns': turns,
+        'summary': summarize(turns),
+        'recognizer': speech.pool.stats(),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("=" * 67)
+    print(f"VOICE LOOP ({report['backend']} recognizer, {report['wake_word']} wake word, "
+          f"{'real time' if report['realtime'] else 'fast'})")
+    print("=" * 67)
+    print_turns(turns)
+    print("-" * 67)
+    for label, stat in (('p50', 'p50'), ('max', 'max')):
+        cells = ["-" if report['summary'][key][stat] is None else report['summary'][key][stat] for key in METRICS]
+        print(f"{label:>3}  {'':<28}{cells[0]:>9}{cells[1]:>8}{cells[2]:>8}{cells[3]:>11}")
+    print(f"\n{len(turns)} turns, {report['audio_seconds']} s of audio in {report['wall_seconds']} s; "
+          f"recognizer real-time factor {report['recognizer']['real_time_factor']}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the local wake word detector
+Builds a long recording of background noise with the wake word and other
+words spoken into it at known times (voiced synthetic speech, so no
+recordings or microphone are needed), runs it through WakeWordDetector in
+microphone-sized chunks and reports CPU time per second of audio,
+detection latency, hits and false alarms. With --templates and --wav it
+runs real recordings instead.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from voice_assistant.wake_word import EnergyGate, WakeWordDetector, read_wav, resample, write_wav
+
+SAMPLE_RATE = 16000
+CHUNK = 1024  # Samples per read, as with the microphone stream
+
+# (F1, F2) formants of a few vowels, in Hz
+VOWELS = {
+    'a': (730, 1090), 'e': (530, 1840), 'i': (270, 2290),
+    'o': (570, 840), 'u': (300, 870), 'ae': (660, 1720),
+}
+# Words as (vowel, seconds) sequences; WAKE_WORD stands in for "hey assistant"
+WAKE_WORD = [('e', 0.12), ('i', 0.08), ('a', 0.10), ('i', 0.12), ('ae', 0.16)]
+OTHER_WORDS = [
+    [('o', 0.15), ('u', 0.10), ('a', 0.20)],
+    [('i', 0.10), ('e', 0.15), ('o', 0.12), ('u', 0.15)],
+    [('ae', 0.12), ('o', 0.10), ('i', 0.14), ('e', 0.12), ('a', 0.10)],
+    [('u', 0.20), ('ae', 0.20)],
+]
+
+
+def synth_word(phones, rate=SAMPLE_RATE, speed=1.0, pitch=120.0, gain=0.3):
+    """Voiced speech-like audio: f0 harmonics shaped by formants gliding between vowels"""
+    durations = np.array([seconds / speed for _, seconds in phones])
+    centres = np.cumsum(durations) - durations / 2
+    length = int(durations.sum() * rate)
+    t = np.arange(length) / rate
+    f1 = np.interp(t, centres, [VOWELS[v][0] for v, _ in phones])
+    f2 = np.interp(t, centres, [VOWELS[v][1] for v, _ in phones])
+
+    # Slight intonation fall across the word
+    f0 = pitch * (1.1 - 0.2 * t / t[-1])
+    phase = 2 * np.pi * np.cumsum(f0) / rate
+    audio = np.zeros(length)
+    for k in range(1, int(4000 / pitch)):
+        harmonic = k * f0
+        weight = np.exp(-((harmonic - f1) / 90) ** 2) + 0.6 * np.exp(-((harmonic - f2) / 140) ** 2)
+        audio += weight * np.sin(k * phase)
+
+    envelope = np.minimum(1, np.minimum(t, t[-1] - t) / 0.02)
+    audio *= envelope
+    return (gain * audio / np.abs(audio).max()).astype(np.float32)
+
+
+def noise(seconds, level=0.004, rate=SAMPLE_RATE, rng=None):
+    """Low-passed white noise at about level RMS"""
+    rng = rng or np.random.default_rng(0)
+    white = rng.standard_normal(int(seconds * rate))
+    smoothed = np.convolve(white, np.ones(4) / 4, mode='same')
+    return (smoothed * level / smoothed.std()).astype(np.float32)
+
+
+def make_stream(events, gap=2.0, rng=None, rate=SAMPLE_RATE):
+    """
+    Noise with each event's audio placed after gap seconds
+
+    Returns:
+        (samples, [(start seconds, end seconds, is wake word)])
+    """
+    rng = rng or np.random.default_rng(0)
+    pieces, spans, position = [], [], 0.0
+    for audio, is_wake in events:
+        pause = noise(gap * rng.uniform(0.75, 1.25), rng=rng, rate=rate)
+        pieces += [pause, audio + noise((len(audio) + 1) / rate, rng=rng, rate=rate)[:len(audio)]]
+        position += len(pause) / rate
+        spans.append((position, position + len(audio) / rate, is_wake))
+        position += len(audio) / rate
+    pieces.append(noise(gap, rng=rng, rate=rate))
+    return np.concatenate(pieces), spans
+
+
+def enrollment(count=3, rng=None):
+    """Recordings of the wake word as a user would enroll them"""
+    rng = rng or np.random.default_rng(1)
+    return {
+        f"wake-{i}.wav": np.concatenate([
+            noise(0.3, rng=rng), synth_word(WAKE_WORD, speed=rng.uniform(0.9, 1.1),
+                                            pitch=rng.uniform(110, 140)), noise(0.3, rng=rng)])
+        for i in range(count)
+    }
+
+
+def spoken_words(count, rng):
+    """Alternating wake words and other words, each said a little differently"""
+    events = []
+    for i in range(count):
+        phones = WAKE_WORD if i % 2 == 0 else OTHER_WORDS[(i // 2) % len(OTHER_WORDS)]
+        audio = synth_word(phones, speed=rng.uniform(0.85, 1.15),
+                           pitch=rng.uniform(100, 170), gain=rng.uniform(0.1, 0.5))
+        events.append((audio, phones is WAKE_WORD))
+    return events
+
+
+def run(detector, samples):
+    """Feed samples in CHUNK-sized reads; return (detections, CPU seconds, per-chunk wall seconds)"""
+    detector.reset()
+    detections, chunk_times = [], []
+    cpu_start = time.process_time()
+    for start in range(0, len(samples), CHUNK):
+        begin = time.perf_counter()
+        detection = detector.process(samples[start:start + CHUNK])
+        chunk_times.append(time.perf_counter() - begin)
+        if detection is not None:
+            detections.append(detection)
+    return detections, time.process_time() - cpu_start, chunk_times
+
+
+def score(detections, spans):
+    """Match detections to wake word spans; return (hits, misses, false alarms, latencies)"""
+    hits, latencies, false_alarms = 0, [], 0
+    claimed = set()
+    for detection in detections:
+        for i, (start, end, is_wake) in enumerate(spans):
+            # A detection counts for the word it lands in or shortly after
+            if start <= detection.audio_time <= end + 0.5:
+                if is_wake and i not in claimed:
+                    claimed.add(i)
+                    hits += 1
+                    latencies.append(detection.audio_time - end)
+                else:
+                    false_alarms += 1
+                break
+        else:
+            false_alarms += 1
+    misses = sum(1 for _, _, is_wake in spans if is_wake) - hits
+    return hits, misses, false_alarms, latencies
+
+
+def synthetic(args):
+    rng = np.random.default_rng(args.seed)
+    samples, spans = make_stream(spoken_words(args.words, rng), rng=rng)
+    seconds = len(samples) / SAMPLE_RATE
+    recordings = enrollment(args.templates_count, np.random.default_rng(args.seed + 1))
+
+    results = []
+    for name, gate in [("energy gate", EnergyGate()), ("no gate", EnergyGate(ratio=0, min_rms=0))]:
+        detector = WakeWordDetector(recordings, SAMPLE_RATE, gate=gate)
+        detections, cpu, chunk_times = run(detector, samples)
+        hits, misses, false_alarms, latencies = score(detections, spans)
+        chunk_times.sort()
+        results.append({
+            'mode': name,
+            'audio_seconds': round(seconds, 1),
+            'speech_fraction': round(detector.stats()['speech_seconds'] / seconds, 3),
+            'cpu_ms_per_audio_second': round(cpu / seconds * 1000, 2),
+            'chunk_ms_p99': round(chunk_times[int(0.99 * (len(chunk_times) - 1))] * 1000, 3),
+            'wake_words': hits + misses,
+            'hits': hits,
+            'misses': misses,
+            'false_alarms': false_alarms,
+            'latency_ms_after_word': {
+                'median': round(float(np.median(latencies)) * 1000, 1) if latencies else None,
+                'max': round(max(latencies) * 1000, 1) if latencies else None,
+            },
+            'threshold': detector.stats()['threshold'],
+        })
+    return results
+
+
+def recorded(args):
+    detector = WakeWordDetector.from_directory(args.templates, SAMPLE_RATE)
+    results = []
+    for path in args.wav:
+        samples, rate = read_wav(path)
+        samples = resample(samples, rate, SAMPLE_RATE)
+        detections, cpu, chunk_times = run(detector, samples)
+        seconds = len(samples) / SAMPLE_RATE
+        results.append({
+            'file': os.path.basename(path),
+            'audio_seconds': round(seconds, 1),
+            'cpu_ms_per_audio_second': round(cpu / seconds * 1000, 2),
+            'detections': [d._asdict() for d in detections],
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure wake word detection cost, latency and accuracy")
+    parser.add_argument("--words", type=int, default=40, help="Words in the synthetic recording (half wake words)")
+    parser.add_argument("--templates-count", type=int, default=3, help="Synthetic enrollment recordings")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--templates", help="Directory of real wake word WAV recordings")
+    parser.add_argument("--wav", nargs="+", help="Real WAV recordings to scan (with --templates)")
+    parser.add_argument("--save", help="Also write the synthetic enrollment and test recording here")
+    parser.add_argument("--json", action="store_true", help="Print the JSON report instead of a table")
+    args = parser.parse_args()
+
+    if args.templates:
+        results = recorded(args)
+        print(json.dumps(results, indent=2))
+        return
+
+    if args.save:
+        os.makedirs(args.save, exist_ok=True)
+        for name, audio in enrollment(args.templates_count, np.random.default_rng(args.seed + 1)).items():
+            write_wav(os.path.join(args.save, name), audio, SAMPLE_RATE)
+        samples, _ = make_stream(spoken_words(args.words, np.random.default_rng(args.seed)),
+                                 rng=np.random.default_rng(args.seed))
+        write_wav(os.path.join(args.save, "stream.wav"), samples, SAMPLE_RATE)
+
+    results = synthetic(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("=" * 84)
+    print(f"WAKE WORD DETECTION ({results[0]['audio_seconds']} s of audio, "
+          f"{results[0]['speech_fraction']:.0%} speech, {args.templates_count} templates)")
+    print("=" * 84)
+    print(f"{'mode':<14}{'CPU ms/s':>10}{'chunk p99 ms':>14}{'hits':>8}{'misses':>8}"
+          f"{'false':>7}{'fired vs word end':>19}{'latest':>8}")
+    for r in results:
+        lat = r['latency_ms_after_word']
+        print(f"{r['mode']:<14}{r['cpu_ms_per_audio_second']:>10.2f}{r['chunk_ms_p99']:>14.3f}"
+              f"{r['hits']:>5}/{r['wake_words']:<2}{r['misses']:>8}{r['false_alarms']:>7}"
+              f"{lat['median'] or 0:>16.1f} ms{lat['max'] or 0:>5.0f} ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
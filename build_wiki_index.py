@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Build the offline Wikipedia index used by CommandProcessor
+Streams a Wikipedia abstracts dump (or any title+abstract TSV/JSONL) into SQLite
+"""
+
+import argparse
+import sys
+import time
+from voice_assistant.local_wiki import LocalWikiIndex, READERS, detect_format
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an offline Wikipedia abstract index")
+    parser.add_argument("dump", help="enwiki-*-abstract.xml[.gz], title<TAB>abstract .tsv[.gz] or .jsonl[.gz]")
+    parser.add_argument("output", help="SQLite index file to create")
+    parser.add_argument("--format", choices=["auto"] + sorted(READERS), default="auto",
+                        help="Dump format (default: guess from the file name)")
+    parser.add_argument("--batch-size", type=int, default=10000,
+                        help="Rows inserted per transaction")
+    args = parser.parse_args()
+
+    dump_format = detect_format(args.dump) if args.format == "auto" else args.format
+    print(f"Building {args.output} from {args.dump} ({dump_format})")
+
+    start = time.perf_counter()
+
+    def progress(count):
+        rate = count / max(time.perf_counter() - start, 1e-9)
+        print(f"\r   {count:,} pages ({rate:,.0f}/s)", end="", flush=True)
+
+    try:
+        total = LocalWikiIndex.build(args.output, READERS[dump_format](args.dump),
+                                     batch_size=args.batch_size, progress=progress)
+    except Exception as e:
+        print(f"\nError building index: {e}")
+        sys.exit(1)
+
+    print(f"\nIndexed {total:,} pages in {time.perf_counter() - start:.1f}s")
+    print(f"Set WIKIPEDIA_LOCAL_INDEX={args.output} to use it")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@
 Configuration settings for the Voice Assistant
 """
 
+import os
+
 class Config:
     # Wake words that activate the assistant
     WAKE_WORDS = [
@@ -26,12 +28,142 @@ class Config:
     SPEECH_TIMEOUT = 1  # Time to wait for speech to start
     PHRASE_TIME_LIMIT = 5  # Maximum time to record speech
     
+    # Continuous capture: one thread keeps the microphone open and fills a
+    # ring buffer that listen() carves phrases out of
+    CAPTURE_CHUNK = 1024  # Samples per read
+    CAPTURE_BUFFER_SECONDS = 10  # Audio kept for a listener that falls behind
+    CAPTURE_PRE_ROLL = 0.3  # Seconds before speech onset included in a phrase
+
+    # Noise calibration: the speech threshold follows the background noise
+    # heard between phrases and is saved per microphone for the next start
+    NOISE_CALIBRATION_FILE = os.environ.get(
+        "NOISE_CALIBRATION_FILE",
+        os.path.join(os.path.expanduser("~"), ".cache", "voice_assistant", "noise_calibration.json")
+    )
+    ENERGY_THRESHOLD = 300  # Starting threshold for a microphone with no saved calibration
+    NOISE_CALIBRATION_SAVE_INTERVAL = 60  # Seconds between saves while running
+
+    # Speech-to-text backend: "google" (online), "sphinx" (PocketSphinx, offline)
+    # or "vosk" (offline, needs a model unpacked at VOSK_MODEL_PATH)
+    RECOGNIZER_BACKEND = os.environ.get("RECOGNIZER_BACKEND", "google")
+    RECOGNIZER_LANGUAGE = "en-US"  # Used by Google; offline backends follow their model
+    RECOGNIZER_WORKERS = 2  # Recognitions running at once, alongside capture
+    RECOGNIZER_TIMEOUT = 10  # Seconds to wait for a transcript
+    SPHINX_MODEL_PATH = os.environ.get("SPHINX_MODEL_PATH")  # None uses the en-us model bundled with pocketsphinx
+    VOSK_MODEL_PATH = os.environ.get(
+        "VOSK_MODEL_PATH",
+        os.path.join(os.path.expanduser("~"), ".cache", "voice_assistant", "vosk-model")
+    )
+    
+    # Local wake word detection: WAV recordings of the wake word made with
+    # enroll_wake_word.py. Without any, every phrase is sent to the cloud
+    # recognizer and searched for WAKE_WORDS.
+    WAKE_WORD_DIR = os.environ.get(
+        "WAKE_WORD_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "voice_assistant", "wake_word")
+    )
+    WAKE_WORD_THRESHOLD = None  # Match distance that fires; None calibrates from the recordings
+    WAKE_WORD_ENERGY_RATIO = 3.0  # Audio this many times louder than the noise floor is matched
+    WAKE_WORD_LISTEN_SECONDS = 5  # Seconds between checks that the assistant is still running
+    
     # TTS settings
     TTS_RATE = 180  # Words per minute
     TTS_VOLUME = 0.9  # Volume level (0.0 to 1.0)
     
     # Wikipedia settings
     WIKIPEDIA_SENTENCES = 2  # Number of sentences in summary
+    WIKIPEDIA_LANGUAGE = "en"  # Wikipedia language code
+    WIKIPEDIA_RESOLUTION = "parallel"  # "parallel" races summary and search, "sequential" tries them in turn
+    WIKIPEDIA_DEADLINE = 8  # Total seconds allowed for a parallel lookup
+    WIKIPEDIA_WORKERS = 32  # Threads used for parallel lookups (two per concurrent lookup)
+    
+    # Command handler timeouts in seconds, per intent
+    COMMAND_TIMEOUTS = {
+        'wikipedia': 10,
+        'web': 5,
+    }
+    DEFAULT_COMMAND_TIMEOUT = 5
+    COMMAND_WORKERS = 16  # Threads running blocking handlers for process_command_async
+    BATCH_CONCURRENCY = 8  # Blocking commands in flight at once within process_batch
+    BATCH_MAX_COMMANDS = 1000  # Largest array accepted by /chat/batch
+    
+    # Offline Wikipedia index built with build_wiki_index.py (None to disable)
+    WIKIPEDIA_LOCAL_INDEX = os.environ.get("WIKIPEDIA_LOCAL_INDEX")
+    WIKIPEDIA_LOCAL_ONLY = False  # Never fall back to the network when the index misses
+    
+    # Web conversation history, kept per browser session
+    HISTORY_MAX_MESSAGES = 200  # Messages kept per session
+    HISTORY_MAX_SESSIONS = 10000  # Sessions kept before evicting the least recently used
+    HISTORY_SESSION_TTL = 60 * 60  # Seconds of inactivity before a session is dropped
+    HISTORY_MAX_BYTES = 64 * 1024 * 1024  # Approximate memory budget for all sessions
+    # "memory" keeps history in the process; "sqlite" shares it between worker
+    # processes through HISTORY_PATH (serve.py switches to it for --workers > 1)
+    HISTORY_BACKEND = os.environ.get("HISTORY_BACKEND", "memory")
+    HISTORY_PATH = os.environ.get(
+        "HISTORY_PATH",
+        os.path.join(os.path.expanduser("~"), ".cache", "voice_assistant", "history.sqlite3")
+    )
+    
+    # Streamlit chat history, kept per browser session
+    STREAMLIT_HISTORY_MAX_MESSAGES = 5000  # Messages kept per session
+    STREAMLIT_HISTORY_MAX_BYTES = 4 * 1024 * 1024  # Approximate memory budget per session
+    STREAMLIT_RECENT_MESSAGES = 50  # Messages rendered per page of history
+    STREAMLIT_WORKERS = 8  # Threads answering commands for all sessions
+    STREAMLIT_INLINE_WAIT = 0.1  # Seconds to wait before showing a reply as pending
+    STREAMLIT_POLL_INTERVAL = 0.5  # Seconds between checks on pending replies
+    
+    # Streamlit cache warming: Wikipedia answers for these commands (the
+    # "Popular Searches" buttons) are fetched in the background at startup
+    # and refreshed before they expire
+    WARM_COMMANDS = [
+        "search wikipedia for python programming",
+        "search wikipedia for artificial intelligence",
+        "search wikipedia for space exploration",
+    ]
+    WARM_REFRESH_MARGIN = 10 * 60  # Seconds before expiry an answer is refreshed
+    WARM_RETRY_INTERVAL = 60  # Seconds before retrying a failed fetch
+    
+    # Durable conversation log: JSONL segments written in batches by a
+    # background thread. Off unless CONVERSATION_LOG_DIR is set.
+    CONVERSATION_LOG_DIR = os.environ.get("CONVERSATION_LOG_DIR", "")
+    CONVERSATION_LOG_SEGMENT_BYTES = 16 * 1024 * 1024  # Segment size before rotating
+    CONVERSATION_LOG_MAX_SEGMENTS = 64  # Segments kept, about 1 GB (None keeps all)
+    CONVERSATION_LOG_FLUSH_INTERVAL = 0.2  # Seconds the writer waits to fill a batch
+    
+    # Metrics (/metrics). With several workers each one writes a snapshot
+    # into METRICS_DIR and /metrics merges them; serve.py sets it up.
+    METRICS_DIR = os.environ.get("METRICS_DIR", "")
+    METRICS_SNAPSHOT_INTERVAL = 5  # Seconds between snapshot writes
+    
+    # Production server (serve.py); environment variables override the defaults
+    SERVER_HOST = os.environ.get("SERVER_HOST", "0.0.0.0")
+    SERVER_PORT = int(os.environ.get("SERVER_PORT", 5000))
+    SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", 2))  # Worker processes
+    SERVER_THREADS = int(os.environ.get("SERVER_THREADS", 8))  # Request threads per worker
+    SERVER_TIMEOUT = int(os.environ.get("SERVER_TIMEOUT", 60))  # Seconds before a stuck worker is restarted
+    
+    # Admission control for blocking intents in process_command. Keep the sum
+    # of limits and queue depths below SERVER_THREADS so instant intents
+    # (time, date, ...) always find a free request thread.
+    ADMISSION_CONTROL = os.environ.get("ADMISSION_CONTROL", "1") != "0"
+    INTENT_CONCURRENCY = {'wikipedia': 3, 'web': 1}  # Commands running at once per intent
+    INTENT_QUEUE_DEPTH = 1  # Commands allowed to wait per intent once at its limit
+    INTENT_QUEUE_TIMEOUT = 1.0  # Seconds a command may wait before it is refused
+    BUSY_RETRY_AFTER = 2  # Seconds clients are told to wait after a 503
+    
+    # Streaming chat (/chat/stream)
+    STREAM_WORKERS = 32  # Threads answering streamed requests
+    STREAM_KEEPALIVE = 5  # Seconds between keepalive comments while waiting
+    
+    # Wikipedia cache settings (shared by every process on the host)
+    WIKIPEDIA_CACHE_PATH = os.environ.get(
+        "WIKIPEDIA_CACHE_PATH",
+        os.path.join(os.path.expanduser("~"), ".cache", "voice_assistant", "wikipedia.sqlite3")
+    )
+    WIKIPEDIA_CACHE_MEMORY_SIZE = 256  # Entries kept in the in-memory LRU
+    WIKIPEDIA_CACHE_DISK_SIZE = 10000  # Entries kept in the SQLite file
+    WIKIPEDIA_CACHE_TTL = 24 * 60 * 60  # Seconds a summary stays cached
+    WIKIPEDIA_CACHE_NEGATIVE_TTL = 60 * 60  # Seconds a "not found" stays cached
     
     # Common website mappings for easier voice recognition
     WEBSITE_SHORTCUTS = {
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Record the wake word for local wake word detection
+Saves a few recordings of you saying the wake word into
+Config.WAKE_WORD_DIR, where main.py loads them at startup
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from config import Config
+from voice_assistant.speech_handler import SpeechHandler
+from voice_assistant.wake_word import WakeWordDetector
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record the wake word for local detection")
+    parser.add_argument("--count", type=int, default=3, help="Recordings to make")
+    parser.add_argument("--directory", default=Config.WAKE_WORD_DIR, help="Where to save them")
+    parser.add_argument("--seconds", type=float, default=3, help="Longest recording")
+    parser.add_argument("--replace", action="store_true", help="Delete existing recordings first")
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok=True)
+    if args.replace:
+        for name in os.listdir(args.directory):
+            if name.endswith(".wav"):
+                os.remove(os.path.join(args.directory, name))
+
+    speech = SpeechHandler()
+    saved = 0
+    while saved < args.count:
+        print(f"[{saved + 1}/{args.count}] Say the wake word (e.g. 'hey assistant')...")
+        audio = speech.listen(timeout=5, phrase_time_limit=args.seconds)
+        if audio is None:
+            print("Didn't hear anything, try again.")
+            continue
+        path = os.path.join(args.directory, f"wake-{int(time.time() * 1000)}.wav")
+        with open(path, "wb") as f:
+            f.write(audio.get_wav_data(convert_width=2))
+        saved += 1
+        # Don't let the next recording start with the tail of this one
+        speech.catch_up()
+
+    speech.close()
+    try:
+        detector = WakeWordDetector.from_directory(args.directory, speech.sample_rate)
+    except ValueError as e:
+        print(f"Recordings unusable: {e}")
+        return 1
+    print(f"Saved to {args.directory}: {detector.stats()}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,24 +3,40 @@
 Main entry point for the Python Voice Assistant
 """
 
+import argparse
+import glob
+import os
 import sys
 import time
 import threading
+from collections import deque
+from voice_assistant.audio_capture import FileSource
 from voice_assistant.speech_handler import SpeechHandler
 from voice_assistant.command_processor import CommandProcessor
-from voice_assistant.tts_handler import TTSHandler
+from voice_assistant.tts_handler import NullTTSHandler, TTSHandler
 from config import Config
 
 class VoiceAssistant:
-    def __init__(self):
-        """Initialize the voice assistant with all necessary components"""
+    def __init__(self, speech=None, tts=None):
+        """
+        Initialize the voice assistant with all necessary components
+        
+        Args:
+            speech: SpeechHandler to listen with; the microphone when None
+            tts: TTS handler to answer with; TTSHandler when None
+        """
         print("Initializing Voice Assistant...")
         
         try:
-            self.tts = TTSHandler()
-            self.speech = SpeechHandler()
+            self.tts = tts or TTSHandler()
+            self.speech = speech or SpeechHandler()
             self.processor = CommandProcessor(self.tts)
+            self.wake_word = self.load_wake_word_detector()
             self.running = False
+            # Timings of recent turns, newest last (see handle_command)
+            self.turns = deque(maxlen=100)
+            self._awaiting_audio = None
+            self.tts.on_start = self._audio_started
             
             print("Voice Assistant initialized successfully!")
             self.tts.speak("Voice Assistant is ready. Say 'hello assistant' to wake me up.")
@@ -29,34 +45,84 @@ class VoiceAssistant:
             print(f"Error initializing Voice Assistant: {e}")
             sys.exit(1)
     
+    def load_wake_word_detector(self):
+        """Build the local wake word detector from the enrolled recordings, if there are any"""
+        if not glob.glob(os.path.join(Config.WAKE_WORD_DIR, "*.wav")):
+            print(f"No wake word recordings in {Config.WAKE_WORD_DIR}, using cloud recognition. "
+                  "Run enroll_wake_word.py to detect the wake word on this machine.")
+            return None
+        
+        # numpy is only needed once there is something to match against
+        from voice_assistant.wake_word import EnergyGate, WakeWordDetector
+        try:
+            detector = WakeWordDetector.from_directory(
+                Config.WAKE_WORD_DIR,
+                sample_rate=self.speech.sample_rate,
+                threshold=Config.WAKE_WORD_THRESHOLD,
+                gate=EnergyGate(ratio=Config.WAKE_WORD_ENERGY_RATIO)
+            )
+        except (OSError, ValueError) as e:
+            print(f"Error loading wake word recordings: {e}")
+            return None
+        
+        print(f"Local wake word detection ready ({len(detector.templates)} recordings)")
+        return detector
+    
     def listen_for_wake_word(self):
         """Listen for the wake word to activate the assistant"""
         wake_words = Config.WAKE_WORDS
+        # Phrases being recognized while the next one is captured, oldest first
+        pending = deque()
         
         while self.running:
             try:
-                print("Listening for wake word...")
-                audio = self.speech.listen(timeout=1, phrase_time_limit=3)
+                # A replay has been played through
+                if self.speech.finished and not pending:
+                    break
                 
-                if audio:
-                    text = self.speech.recognize(audio)
-                    if text:
-                        text_lower = text.lower()
-                        print(f"Heard: {text}")
-                        
-                        # Check for wake words
-                        for wake_word in wake_words:
-                            if wake_word in text_lower:
-                                print("Wake word detected!")
-                                self.tts.speak("Yes, how can I help you?")
-                                self.handle_command()
-                                break
-                        
-                        # Check for exit commands
-                        if any(exit_word in text_lower for exit_word in Config.EXIT_COMMANDS):
-                            self.tts.speak("Goodbye!")
-                            self.stop()
+                if not pending:
+                    print("Listening for wake word...")
+                
+                # Local detection: the recognizer only runs once the wake word fires
+                if self.wake_word is not None:
+                    detection = self.speech.wait_for_wake_word(
+                        self.wake_word, timeout=Config.WAKE_WORD_LISTEN_SECONDS)
+                    if detection:
+                        print(f"Wake word detected! (matched {detection.template}, score {detection.score:.2f})")
+                        self.tts.speak("Yes, how can I help you?")
+                        self.handle_command()
+                        self.wake_word.reset()
+                    continue
+                
+                # Check back often while phrases are being recognized
+                phrase = self.speech.listen_async(timeout=0.25 if pending else 1, phrase_time_limit=3)
+                if phrase:
+                    pending.append(phrase)
+                if not pending or not (pending[0].recognition.done() or self.speech.finished):
+                    continue
+                
+                text = self.speech.result(pending.popleft().recognition)
+                if text:
+                    text_lower = text.lower()
+                    print(f"Heard: {text}")
+                    
+                    # Check for wake words
+                    for wake_word in wake_words:
+                        if wake_word in text_lower:
+                            print("Wake word detected!")
+                            self.tts.speak("Yes, how can I help you?")
+                            # A command said straight after the wake word is already being recognized
+                            self.handle_command(pending.popleft() if pending else None)
+                            # Anything else queued was heard while answering
+                            if self.speech.live:
+                                pending.clear()
                             break
+                    
+                    # Check for exit commands
+                    if any(exit_word in text_lower for exit_word in Config.EXIT_COMMANDS):
+                        self.tts.speak("Goodbye!")
+                        self.stop()
+                        break
                             
             except KeyboardInterrupt:
                 print("\nShutting down...")
@@ -66,27 +132,74 @@ class VoiceAssistant:
                 print(f"Error in wake word detection: {e}")
                 time.sleep(1)
     
-    def handle_command(self):
-        """Handle a command after wake word is detected"""
+    def handle_command(self, phrase=None):
+        """
+        Handle a command after wake word is detected
+        
+        Each command heard adds a turn to self.turns with its timings in ms:
+        capture (length of the phrase), recognition (from capturing the phrase
+        to its transcript), intent (CommandProcessor) and first_audio (from
+        the end of the speech to the start of the spoken reply).
+        
+        Args:
+            phrase: Phrase from SpeechHandler.listen_async already heard
+                after the wake word; listens for one when None
+        """
         try:
-            print("Listening for command...")
-            audio = self.speech.listen(timeout=5, phrase_time_limit=5)
+            if phrase is None:
+                print("Listening for command...")
+                phrase = self.speech.listen_async(timeout=5, phrase_time_limit=5)
             
-            if audio:
-                command = self.speech.recognize(audio)
+            if phrase is not None:
+                command = self.speech.result(phrase.recognition)
+                turn = {
+                    'command': command,
+                    'capture_ms': round(phrase.seconds * 1000),
+                    'recognition_ms': round((time.perf_counter() - phrase.heard_at) * 1000),
+                    'intent_ms': None,
+                    'response': None,
+                    'first_audio_ms': None,
+                }
+                self.turns.append(turn)
+                
                 if command:
                     print(f"Command received: {command}")
+                    
+                    # With local wake word detection this is the only place exit words are heard
+                    if any(exit_word in command.lower() for exit_word in Config.EXIT_COMMANDS):
+                        self.respond(turn, phrase, "Goodbye!")
+                        self.stop()
+                        return
+                    
+                    started = time.perf_counter()
                     response = self.processor.process_command(command)
+                    turn['intent_ms'] = round((time.perf_counter() - started) * 1000)
                     if response:
-                        self.tts.speak(response)
+                        self.respond(turn, phrase, response)
                 else:
-                    self.tts.speak("I didn't catch that. Could you repeat?")
+                    self.respond(turn, phrase, "I didn't catch that. Could you repeat?")
             else:
                 self.tts.speak("I didn't hear anything. Try again.")
                 
         except Exception as e:
             print(f"Error handling command: {e}")
             self.tts.speak("Sorry, I encountered an error processing your command.")
+        finally:
+            # Audio heard while answering isn't the next wake word
+            self.speech.catch_up()
+    
+    def respond(self, turn, phrase, text):
+        """Speak the reply to a turn's phrase, noting when its audio starts"""
+        turn['response'] = text
+        self._awaiting_audio = (turn, text, phrase.ended_at)
+        self.tts.speak(text)
+    
+    def _audio_started(self, text):
+        # Called by the TTS handler, possibly from its own thread
+        awaiting = self._awaiting_audio
+        if awaiting is not None and awaiting[1] == text:
+            self._awaiting_audio = None
+            awaiting[0]['first_audio_ms'] = round((time.perf_counter() - awaiting[2]) * 1000)
     
     def start(self):
         """Start the voice assistant"""
@@ -103,10 +216,29 @@ class VoiceAssistant:
     def stop(self):
         """Stop the voice assistant"""
         self.running = False
+        self.speech.close()
         print("Voice Assistant stopped.")
 
+def print_turns(turns):
+    """Print a table of turn timings (VoiceAssistant.turns)"""
+    print(f"{'#':>3}  {'command':<28}{'capture':>9}{'recog':>8}{'intent':>8}{'1st audio':>11}")
+    for number, turn in enumerate(turns, 1):
+        cells = ["-" if turn[key] is None else turn[key]
+                 for key in ('capture_ms', 'recognition_ms', 'intent_ms', 'first_audio_ms')]
+        command = (turn['command'] or "(not understood)")[:27]
+        print(f"{number:>3}  {command:<28}{cells[0]:>9}{cells[1]:>8}{cells[2]:>8}{cells[3]:>11}")
+
 def main():
     """Main function to run the voice assistant"""
+    parser = argparse.ArgumentParser(description="Python Voice Assistant")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="Listen to a directory of WAV files, or a script of them, instead of the microphone")
+    parser.add_argument("--gap", type=float, default=1.0, help="Seconds of silence between the files of a replayed directory")
+    parser.add_argument("--fast", action="store_true", help="Replay as fast as it can be processed instead of in real time")
+    parser.add_argument("--tts-output", metavar="DIR",
+                        help="Write spoken replies as WAV files here; a replay otherwise only prints them")
+    args = parser.parse_args()
+    
     print("=" * 50)
     print("Python Voice Assistant")
     print("=" * 50)
@@ -118,8 +250,18 @@ def main():
     print("- 'exit' or 'quit' to stop")
     print("=" * 50)
     
-    assistant = VoiceAssistant()
+    speech = tts = None
+    if args.tts_output:
+        tts = TTSHandler(output_dir=args.tts_output)
+    if args.replay:
+        tts = tts or NullTTSHandler()
+        source = FileSource.from_script(args.replay, gap=args.gap, chunk=Config.CAPTURE_CHUNK, realtime=not args.fast)
+        speech = SpeechHandler(source=source)
+    
+    assistant = VoiceAssistant(speech=speech, tts=tts)
     assistant.start()
+    if args.replay:
+        print_turns(assistant.turns)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Production entry point for the web interface
+Runs web_app under gunicorn with several worker processes, each serving
+requests on a pool of threads. Without gunicorn (e.g. on Windows) it falls
+back to a single threaded process.
+"""
+
+import argparse
+import sys
+import tempfile
+from config import Config
+
+
+def run_gunicorn(args):
+    """Serve web_app with gunicorn's threaded workers"""
+    from gunicorn.app.base import BaseApplication
+
+    class VoiceAssistantServer(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{args.host}:{args.port}")
+            self.cfg.set('workers', args.workers)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('threads', args.threads)
+            # A gthread worker otherwise accepts connections while all its
+            # threads are busy, queueing them instead of leaving them to an
+            # idle worker
+            self.cfg.set('worker_connections', args.threads)
+            self.cfg.set('timeout', args.timeout)
+            # Each worker imports the app itself, so no SQLite connection or
+            # thread pool is shared across fork()
+            self.cfg.set('preload_app', False)
+
+        def load(self):
+            from web_app import app
+            return app
+
+    VoiceAssistantServer().run()
+
+
+def run_threaded(args):
+    """Serve web_app from one process with a thread per request"""
+    from werkzeug.serving import run_simple
+    from web_app import app
+
+    if args.workers > 1:
+        print("gunicorn is not installed; serving from a single process (pip install gunicorn)")
+    run_simple(args.host, args.port, app, threaded=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the voice assistant web interface")
+    parser.add_argument("--host", default=Config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=Config.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=Config.SERVER_WORKERS, help="Worker processes")
+    parser.add_argument("--threads", type=int, default=Config.SERVER_THREADS, help="Request threads per worker")
+    parser.add_argument("--timeout", type=int, default=Config.SERVER_TIMEOUT,
+                        help="Seconds before a silent worker is restarted")
+    args = parser.parse_args()
+
+    # Per-process history would split a session across workers, and
+    # /metrics would only show the worker that answered the scrape
+    if args.workers > 1:
+        Config.HISTORY_BACKEND = 'sqlite'
+        if not Config.METRICS_DIR:
+            Config.METRICS_DIR = tempfile.mkdtemp(prefix="voice-assistant-metrics-")
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        run_threaded(args)
+    else:
+        run_gunicorn(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,15 @@
 import streamlit as st
+import atexit
 import datetime
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from config import Config
+from voice_assistant.admission import BUSY_MESSAGE, Overloaded
+from voice_assistant.cache_warmer import CacheWarmer
+from voice_assistant.chat_history import ChatHistory
 from voice_assistant.command_processor import CommandProcessor
+from voice_assistant.conversation_log import ConversationLog
 
 # Configure Streamlit page
 st.set_page_config(
@@ -16,16 +25,117 @@ def get_command_processor():
     # For Streamlit, we don't need TTS, so we pass None
     return CommandProcessor(tts_handler=None)
 
+# Runs commands for every browser session, so a slow lookup never blocks a script run
+@st.cache_resource
+def get_executor():
+    pool = ThreadPoolExecutor(max_workers=Config.STREAMLIT_WORKERS, thread_name_prefix="streamlit-command")
+    atexit.register(pool.shutdown, wait=False, cancel_futures=True)
+    return pool
+
+# Prefetches the popular searches in the background, so the first
+# click is served from the cache; stopped when the server process exits
+@st.cache_resource
+def get_cache_warmer():
+    warmer = CacheWarmer(
+        get_command_processor(),
+        Config.WARM_COMMANDS,
+        refresh_margin=Config.WARM_REFRESH_MARGIN,
+        retry_interval=Config.WARM_RETRY_INTERVAL
+    )
+    atexit.register(warmer.stop)
+    return warmer.start()
+
+# Shared by every browser session of this server
+@st.cache_resource
+def get_conversation_log():
+    if not Config.CONVERSATION_LOG_DIR:
+        return None
+    return ConversationLog(
+        Config.CONVERSATION_LOG_DIR,
+        segment_bytes=Config.CONVERSATION_LOG_SEGMENT_BYTES,
+        max_segments=Config.CONVERSATION_LOG_MAX_SEGMENTS,
+        flush_interval=Config.CONVERSATION_LOG_FLUSH_INTERVAL
+    )
+
+def add_message(role, content):
+    """Append a message to the chat history and queue it for the durable log"""
+    # Markdown is rendered here, once, rather than on every rerun
+    message = st.session_state.history.append(
+        role, content, datetime.datetime.now().strftime("%H:%M:%S"))
+    
+    log = get_conversation_log()
+    if log is not None:
+        log.write({
+            "session": st.session_state.session_id,
+            "source": "streamlit",
+            "type": role,
+            "message": content,
+            "timestamp": message.timestamp,
+            "time": time.time()
+        })
+
+def answer(processor, command):
+    """Run a command on the executor, turning failures into a reply"""
+    try:
+        return processor.process_command(command)
+    except Overloaded:
+        return BUSY_MESSAGE
+    except Exception as e:
+        return f"Sorry, I encountered an error: {str(e)}"
+
+def submit_command(command):
+    """
+    Record a command and start answering it in the background
+    
+    Instant answers (time, date, ...) are added right away; slower ones
+    stay pending and are picked up by show_pending().
+    """
+    add_message("user", command)
+    future = get_executor().submit(answer, get_command_processor(), command)
+    
+    wait([future], timeout=Config.STREAMLIT_INLINE_WAIT)
+    if future.done():
+        add_message("assistant", future.result())
+    else:
+        st.session_state.pending.append({"command": command, "future": future})
+
+@st.fragment(run_every=Config.STREAMLIT_POLL_INTERVAL)
+def show_pending():
+    """Placeholders for replies still being worked on, polled until they arrive"""
+    pending = st.session_state.pending
+    finished = [item for item in pending if item["future"].done()]
+    if finished:
+        for item in finished:
+            pending.remove(item)
+            add_message("assistant", item["future"].result())
+        # Redraw the whole page so the replies join the history
+        st.rerun(scope="app")
+    
+    for item in pending:
+        with st.chat_message("assistant"):
+            st.markdown("*Working on it...*")
+            st.caption(f"*{item['command']}*")
+
 def main():
     st.title("🎤 Voice Assistant")
     st.markdown("*Your AI-powered assistant for time, Wikipedia searches, and web browsing*")
 
     # Initialize session state for chat history
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    if "history" not in st.session_state:
+        st.session_state.history = ChatHistory(
+            max_messages=Config.STREAMLIT_HISTORY_MAX_MESSAGES,
+            max_bytes=Config.STREAMLIT_HISTORY_MAX_BYTES
+        )
+    if "history_shown" not in st.session_state:
+        st.session_state.history_shown = Config.STREAMLIT_RECENT_MESSAGES
+    if "pending" not in st.session_state:
+        st.session_state.pending = []
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
     
-    # Initialize command processor
-    processor = get_command_processor()
+    # Initialize command processor and start warming its cache
+    get_command_processor()
+    get_cache_warmer()
 
     # Quick command buttons
     st.markdown("### Quick Commands")
@@ -60,25 +170,7 @@ def main():
 
     # Process quick command if one was clicked
     if hasattr(st.session_state, 'current_command'):
-        command = st.session_state.current_command
-        
-        # Add user message
-        st.session_state.messages.append({
-            "role": "user", 
-            "content": command,
-            "timestamp": datetime.datetime.now().strftime("%H:%M:%S")
-        })
-        
-        # Process command
-        with st.spinner("Processing..."):
-            response = processor.process_command(command)
-        
-        # Add assistant response
-        st.session_state.messages.append({
-            "role": "assistant", 
-            "content": response,
-            "timestamp": datetime.datetime.now().strftime("%H:%M:%S")
-        })
+        submit_command(st.session_state.current_command)
         
         # Clear the current command
         del st.session_state.current_command
@@ -87,43 +179,28 @@ def main():
     # Chat input
     st.markdown("### Chat")
     
-    # Display chat history
+    # Display the most recent messages; older ones are paged in on demand
+    history = st.session_state.history
     chat_container = st.container()
     with chat_container:
-        for message in st.session_state.messages:
-            with st.chat_message(message["role"]):
-                content = message["content"]
-                
-                # Make URLs clickable in Streamlit
-                import re
-                url_pattern = r'(https?://[^\s]+)'
-                if re.search(url_pattern, content):
-                    # Replace URLs with markdown links
-                    content = re.sub(url_pattern, r'[\1](\1)', content)
-                
-                st.markdown(content)
-                st.caption(f"*{message['timestamp']}*")
-
-    # Chat input box
-    if prompt := st.chat_input("Ask me anything..."):
-        # Add user message
-        st.session_state.messages.append({
-            "role": "user", 
-            "content": prompt,
-            "timestamp": datetime.datetime.now().strftime("%H:%M:%S")
-        })
-        
-        # Process command
-        with st.spinner("Processing..."):
-            response = processor.process_command(prompt)
+        hidden = len(history) - st.session_state.history_shown
+        if hidden > 0:
+            if st.button(f"Show older messages ({hidden} hidden)", key="show_older"):
+                st.session_state.history_shown += Config.STREAMLIT_RECENT_MESSAGES
+                st.rerun()
         
-        # Add assistant response
-        st.session_state.messages.append({
-            "role": "assistant", 
-            "content": response,
-            "timestamp": datetime.datetime.now().strftime("%H:%M:%S")
-        })
+        for message in history.recent(st.session_state.history_shown):
+            with st.chat_message(message.role):
+                st.markdown(message.markdown)
+                st.caption(f"*{message.timestamp}*")
         
+        # Only poll while something is pending
+        if st.session_state.pending:
+            show_pending()
+
+    # Chat input box; stays usable while earlier commands are pending
+    if prompt := st.chat_input("Ask me anything..."):
+        submit_command(prompt)
         st.rerun()
 
     # Sidebar with information
@@ -147,7 +224,9 @@ def main():
         """)
         
         if st.button("🗑️ Clear Chat"):
-            st.session_state.messages = []
+            st.session_state.history.clear()
+            st.session_state.pending = []
+            st.session_state.history_shown = Config.STREAMLIT_RECENT_MESSAGES
             st.rerun()
 
 if __name__ == "__main__":
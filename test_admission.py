@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tests for per-intent admission control
+An intent runs at most its limit of commands at once, a few more may wait
+briefly, and the rest are refused with Overloaded, which the web API
+turns into a 503 with Retry-After
+"""
+
+import threading
+import time
+
+from config import Config
+from voice_assistant.admission import BUSY_MESSAGE, AdmissionControl, Overloaded
+from voice_assistant.command_processor import CommandProcessor
+from web_app import app, assistant
+
+
+def hold(admission, intent, count):
+    """Occupy count slots of an intent from other threads until the event is set"""
+    release = threading.Event()
+    entered = threading.Semaphore(0)
+
+    def occupy():
+        with admission.admit(intent):
+            entered.release()
+            release.wait()
+
+    threads = [threading.Thread(target=occupy) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for _ in threads:
+        entered.acquire()
+    return release, threads
+
+
+def refusal(admission, intent):
+    """Reason the next command is refused with, or None if it is admitted"""
+    try:
+        with admission.admit(intent):
+            return None
+    except Overloaded as e:
+        return e.reason
+
+
+def test_limit_queue_and_timeout():
+    admission = AdmissionControl({'wikipedia': 2}, max_queue=1, max_wait=0.1)
+    release, threads = hold(admission, 'wikipedia', 2)
+
+    # At the limit: one command may wait, and is refused when the wait runs out
+    start = time.monotonic()
+    assert refusal(admission, 'wikipedia') == "queue wait exceeded"
+    assert time.monotonic() - start >= 0.1
+
+    # With the queue occupied, the next command is refused at once
+    waiter = threading.Thread(target=refusal, args=(admission, 'wikipedia'))
+    waiter.start()
+    while admission.stats()['wikipedia']['waiting'] == 0:
+        time.sleep(0.005)
+    assert refusal(admission, 'wikipedia') == "queue full"
+    waiter.join()
+
+    # Unlimited intents are never refused
+    assert refusal(admission, 'time') is None
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert refusal(admission, 'wikipedia') is None
+    stats = admission.stats()['wikipedia']
+    assert stats['running'] == 0
+    assert stats['rejected_queue_full'] == 1
+    assert stats['rejected_timeout'] == 2
+
+
+def test_queued_command_runs_when_a_slot_frees():
+    admission = AdmissionControl({'web': 1}, max_queue=1, max_wait=2.0)
+    release, threads = hold(admission, 'web', 1)
+
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(refusal(admission, 'web')))
+    waiter.start()
+    while admission.stats()['web']['waiting'] == 0:
+        time.sleep(0.005)
+    release.set()
+    waiter.join()
+    threads[0].join()
+
+    assert result == [None]
+    assert admission.stats()['web']['queued'] == 1
+
+
+def test_timed_out_command_keeps_its_slot_until_it_returns():
+    """A handler still running after its timeout still counts against the limit"""
+    timeouts = dict(Config.COMMAND_TIMEOUTS)
+    Config.COMMAND_TIMEOUTS['wikipedia'] = 0.05
+    try:
+        processor = CommandProcessor(None)
+        processor.admission = AdmissionControl({'wikipedia': 1}, max_queue=0, max_wait=0)
+        finish = threading.Event()
+        processor._search_wikipedia = lambda query: finish.wait() and "done"
+
+        assert "taking too long" in processor.process_command("search wikipedia for slow")
+        try:
+            processor.process_command("search wikipedia for next")
+        except Overloaded:
+            pass
+        else:
+            raise AssertionError("a second command ran beside the timed out one")
+
+        finish.set()
+        while processor.admission.stats()['wikipedia']['running']:
+            time.sleep(0.005)
+        assert processor.process_command("search wikipedia for next") == "done"
+    finally:
+        Config.COMMAND_TIMEOUTS.clear()
+        Config.COMMAND_TIMEOUTS.update(timeouts)
+
+
+def test_refused_commands_answer_503():
+    processor = assistant.processor
+    admission = processor.admission
+    processor.admission = AdmissionControl({'wikipedia': 1}, max_queue=0, max_wait=0)
+    release, threads = hold(processor.admission, 'wikipedia', 1)
+    try:
+        client = app.test_client()
+
+        response = client.post('/chat', json={'message': "search wikipedia for python"})
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == str(Config.BUSY_RETRY_AFTER)
+        assert response.get_json()['response'] == BUSY_MESSAGE
+
+        # Instant intents still answer
+        assert client.post('/chat', json={'message': "what time is it"}).status_code == 200
+
+        # A batch is only a 503 when every command in it was refused
+        partial = client.post('/chat/batch', json=["search wikipedia for python", "hello"])
+        assert partial.status_code == 200
+        assert partial.headers['Retry-After'] == str(Config.BUSY_RETRY_AFTER)
+        assert partial.get_json()['busy'] == [True, False]
+        refused = client.post('/chat/batch', json=["search wikipedia for python"])
+        assert refused.status_code == 503
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join()
+        processor.admission = admission
+
+
+if __name__ == "__main__":
+    test_limit_queue_and_timeout()
+    test_queued_command_runs_when_a_slot_frees()
+    test_timed_out_command_keeps_its_slot_until_it_returns()
+    test_refused_commands_answer_503()
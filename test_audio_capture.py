@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for continuous audio capture
+Drives AudioCapture from generated and WAV sources, no microphone needed
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from voice_assistant.audio_capture import AudioCapture, FileSource, GeneratorSource
+from voice_assistant.wake_word import write_wav
+
+RATE = 16000
+CHUNK = 160  # 10 ms reads keep the timing checks fine-grained
+THRESHOLD = 300  # Recognizer-style energy threshold
+
+
+def tone(seconds, level=0.3):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (level * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * RATE), dtype=np.float32)
+
+
+def chunks(samples):
+    return [samples[i:i + CHUNK] for i in range(0, len(samples), CHUNK)]
+
+
+def speech_onset(data):
+    """Seconds into 16-bit PCM where the tone starts"""
+    samples = np.frombuffer(data, dtype='<i2')
+    return np.flatnonzero(np.abs(samples) > 1000)[0] / RATE
+
+
+def test_back_to_back_phrases_keep_their_start():
+    """A phrase spoken right after another is carved whole, with pre-roll"""
+    audio = np.concatenate([silence(1), tone(0.5), silence(0.9), tone(0.7), silence(1)])
+    capture = AudioCapture(GeneratorSource(chunks(audio), RATE)).start()
+
+    first, position = capture.utterance(0, THRESHOLD, timeout=5, pre_roll=0.3)
+    second, position = capture.utterance(position, THRESHOLD, timeout=5, pre_roll=0.3)
+    rest, _ = capture.utterance(position, THRESHOLD, timeout=5)
+    capture.stop()
+
+    assert abs(speech_onset(first) - 0.3) < 0.02
+    # The first phrase's trailing pause ran into the second's lead-in; the
+    # second still starts before its speech
+    assert speech_onset(second) > 0
+    assert len(np.frombuffer(second, dtype='<i2')) / RATE > 0.7
+    assert rest is None
+
+
+def test_clicks_are_not_phrases():
+    """Bursts shorter than phrase_threshold are skipped"""
+    audio = np.concatenate([silence(0.5), tone(0.05), silence(1), tone(0.6), silence(1)])
+    capture = AudioCapture(GeneratorSource(chunks(audio), RATE)).start()
+
+    phrase, _ = capture.utterance(0, THRESHOLD, timeout=5, pre_roll=0.1)
+    capture.stop()
+
+    assert 0.6 <= len(np.frombuffer(phrase, dtype='<i2')) / RATE < 1.6
+
+
+def test_timeout_without_speech():
+    capture = AudioCapture(GeneratorSource(chunks(silence(3)), RATE)).start()
+    phrase, position = capture.utterance(0, THRESHOLD, timeout=1)
+    capture.stop()
+
+    assert phrase is None
+    assert abs(position * CHUNK / RATE - 1) < 0.02
+
+
+def test_live_source_overwrites_for_slow_readers():
+    """A live source never waits: a reader that falls behind skips ahead"""
+    source = GeneratorSource(chunks(silence(3)), RATE)
+    source.live = True
+    capture = AudioCapture(source, buffer_seconds=1).start()
+    capture._thread.join()
+
+    chunk, position = capture.read(0)
+    stats = capture.stats()
+    capture.stop()
+
+    assert chunk is not None
+    assert stats['overruns'] == 1
+    assert abs(stats['skipped_chunks'] * CHUNK / RATE - 2) < 0.02
+    assert position == stats['skipped_chunks'] + 1
+
+
+def test_wav_files_play_back_to_back():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i, seconds in enumerate([0.4, 0.6]):
+            paths.append(os.path.join(directory, f"phrase-{i}.wav"))
+            write_wav(paths[-1], np.concatenate([silence(0.5), tone(seconds), silence(0.5)]), RATE)
+        capture = AudioCapture(FileSource(paths, chunk=CHUNK, silence=1)).start()
+
+        lengths, position = [], 0
+        while True:
+            phrase, position = capture.utterance(position, THRESHOLD, timeout=5, pre_roll=0)
+            if phrase is None:
+                break
+            lengths.append(len(phrase) / 2 / RATE)
+        capture.stop()
+
+    assert len(lengths) == 2
+    assert lengths[0] < lengths[1]
+
+
+if __name__ == "__main__":
+    test_back_to_back_phrases_keep_their_start()
+    test_clicks_are_not_phrases()
+    test_timeout_without_speech()
+    test_live_source_overwrites_for_slow_readers()
+    test_wav_files_play_back_to_back()
+    print("Audio capture tests passed!")
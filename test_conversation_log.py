@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for the durable conversation log
+Segments rotate at their size limit, retention never deletes a segment a
+live process still writes to, and replay merges every process's segments
+back into time order
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from voice_assistant.conversation_log import ConversationLog
+
+
+def open_log(directory, **kwargs):
+    return ConversationLog(directory, flush_interval=0.01, fsync=False, **kwargs)
+
+
+def write_segment(directory, start_ms, pid, records):
+    path = os.path.join(directory, f"conversations-{start_ms:013d}-{pid}.jsonl")
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return path
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_segments_rotate_at_their_size_limit():
+    """Every record is kept, spread over several size-capped segments"""
+    with tempfile.TemporaryDirectory() as directory:
+        log = open_log(directory, segment_bytes=300)
+        for i in range(12):
+            log.write({'session': "s", 'message': f"message {i}", 'time': i})
+            log.flush()
+            time.sleep(0.002)  # Segment names carry the start time in ms
+        log.close()
+
+        segments = log.segments()
+        assert len(segments) > 1
+        assert all(os.path.getsize(path) <= 300 for path in segments)
+        assert [r['message'] for r in log.replay("s")] == [f"message {i}" for i in range(12)]
+        assert log.stats()['written'] == 12
+
+
+def test_retention_keeps_segments_other_processes_write_to():
+    """Old segments are deleted, but never a live process's newest one"""
+    with tempfile.TemporaryDirectory() as directory:
+        live = write_segment(directory, 1, os.getppid(), [{'time': 1}])
+        dead = write_segment(directory, 2, dead_pid(), [{'time': 2}])
+
+        log = open_log(directory, segment_bytes=100, max_segments=2)
+        for i in range(6):
+            log.write({'session': "s", 'message': "x" * 60, 'time': 10 + i})
+            log.flush()
+            time.sleep(0.002)
+        log.close()
+
+        segments = log.segments()
+        assert live in segments
+        assert dead not in segments
+        # The live process's segment is kept on top of the limit
+        assert len(segments) == 2
+        assert log.stats()['segment'] in segments
+
+
+def test_replay_merges_workers_in_time_order():
+    """A session served by two workers replays in the order it happened"""
+    with tempfile.TemporaryDirectory() as directory:
+        write_segment(directory, 1, 11, [
+            {'session': "s", 'message': "a", 'time': 1.0},
+            {'session': "other", 'message': "-", 'time': 1.5},
+            {'session': "s", 'message': "d", 'time': 4.0},
+        ])
+        write_segment(directory, 2, 22, [
+            {'session': "s", 'message': "b", 'time': 2.0},
+            {'session': "s", 'message': "c", 'time': 3.0},
+        ])
+        path = write_segment(directory, 5, 11, [{'session': "s", 'message': "e", 'time': 5.0}])
+        # A line cut short by a crash is skipped
+        with open(path, "a") as f:
+            f.write('{"session": "s", "mess')
+
+        log = open_log(directory)
+        assert [r['message'] for r in log.replay("s")] == ["a", "b", "c", "d", "e"]
+        log.close()
+
+
+if __name__ == "__main__":
+    test_segments_rotate_at_their_size_limit()
+    test_retention_keeps_segments_other_processes_write_to()
+    test_replay_merges_workers_in_time_order()
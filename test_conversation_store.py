@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded conversation stores
+The in-memory ConversationStore and the shared SQLiteConversationStore
+must keep the same limits: a ring of messages per session, idle and least
+recently used sessions evicted, and (in memory) a byte budget
+"""
+
+import os
+import tempfile
+import time
+
+from voice_assistant.conversation_store import ConversationStore, SQLiteConversationStore
+
+
+def message(text):
+    return {'type': 'user', 'message': text, 'timestamp': "12:00:00"}
+
+
+def sqlite_store(directory, **kwargs):
+    store = SQLiteConversationStore(os.path.join(directory, "history.sqlite3"), **kwargs)
+    # Sweep on every append so eviction is deterministic
+    store.SWEEP_INTERVAL = 1
+    return store
+
+
+def check_ring_cap(store):
+    for i in range(5):
+        store.append("a", message(f"m{i}"))
+
+    assert [m['message'] for m in store.get("a")] == ["m2", "m3", "m4"]
+    ids = [m['id'] for m in store.get("a")]
+    assert ids == sorted(ids)
+    assert store.stats()['trimmed_messages'] == 2
+
+
+def test_memory_store_keeps_a_ring_per_session():
+    check_ring_cap(ConversationStore(max_messages=3))
+
+
+def test_sqlite_store_keeps_a_ring_per_session():
+    with tempfile.TemporaryDirectory() as directory:
+        check_ring_cap(sqlite_store(directory, max_messages=3))
+
+
+def check_lru_eviction(store):
+    store.append("a", message("first"))
+    store.append("b", message("second"))
+    store.get("a")  # "a" is now the most recently used
+    store.append("c", message("third"))
+
+    assert store.get("b") == []
+    assert [m['message'] for m in store.get("a")] == ["first"]
+    assert store.stats()['lru_evictions'] == 1
+
+
+def test_memory_store_evicts_the_least_recently_used_session():
+    check_lru_eviction(ConversationStore(max_sessions=2))
+
+
+def test_sqlite_store_evicts_the_least_recently_used_session():
+    with tempfile.TemporaryDirectory() as directory:
+        store = sqlite_store(directory, max_sessions=2)
+        # Reads only refresh last_access once it is this old
+        store.TOUCH_INTERVAL = 0
+        check_lru_eviction(store)
+
+
+def check_ttl_eviction(store):
+    store.append("idle", message("old"))
+    time.sleep(0.1)
+    store.append("active", message("new"))
+
+    assert store.get("idle") == []
+    assert store.stats()['expired_sessions'] == 1
+
+
+def test_memory_store_expires_idle_sessions():
+    check_ttl_eviction(ConversationStore(session_ttl=0.05))
+
+
+def test_sqlite_store_expires_idle_sessions():
+    with tempfile.TemporaryDirectory() as directory:
+        check_ttl_eviction(sqlite_store(directory, session_ttl=0.05))
+
+
+def test_memory_store_stays_within_its_byte_budget():
+    """The oldest sessions are dropped once the budget is exceeded"""
+    store = ConversationStore(max_bytes=2000)
+    for i in range(10):
+        store.append(f"s{i}", message("x" * 300))
+
+    stats = store.stats()
+    assert stats['bytes'] <= 2000
+    assert stats['memory_evictions'] > 0
+    assert store.get("s9") != []
+    assert store.get("s0") == []
+
+
+def test_sqlite_reads_refresh_last_access_only_when_stale():
+    """Polling doesn't write to the database on every request"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = sqlite_store(directory)
+        store.append("a", message("hello"))
+        writes = store._db.total_changes
+
+        for _ in range(20):
+            store.get("a")
+            store.page("a")
+        assert store._db.total_changes == writes
+
+        store.TOUCH_INTERVAL = 0
+        store.page("a")
+        assert store._db.total_changes == writes + 1
+
+
+def test_sqlite_clear_rolls_back_on_error():
+    """A failed clear() leaves the history intact and no transaction open"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = sqlite_store(directory)
+        store.append("a", message("kept"))
+
+        def fail(session_ids):
+            store._db.execute("DELETE FROM messages")
+            raise RuntimeError("disk full")
+
+        store._drop = fail
+        try:
+            store.clear("a")
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("clear() swallowed the error")
+
+        assert not store._db.in_transaction
+        assert [m['message'] for m in store.get("a")] == ["kept"]
+
+        del store._drop
+        store.clear("a")
+        assert store.get("a") == []
+
+
+if __name__ == "__main__":
+    test_memory_store_keeps_a_ring_per_session()
+    test_sqlite_store_keeps_a_ring_per_session()
+    test_memory_store_evicts_the_least_recently_used_session()
+    test_sqlite_store_evicts_the_least_recently_used_session()
+    test_memory_store_expires_idle_sessions()
+    test_sqlite_store_expires_idle_sessions()
+    test_memory_store_stays_within_its_byte_budget()
+    test_sqlite_reads_refresh_last_access_only_when_stale()
+    test_sqlite_clear_rolls_back_on_error()
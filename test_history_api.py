@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental history polling in web_app
+/history pages through a session with an ?after= cursor and answers 304
+while nothing has changed; /chat returns the ids it stored
+"""
+
+from web_app import app
+
+
+def chat(client, text):
+    response = client.post('/chat', json={'message': text})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_chat_returns_the_stored_ids():
+    """The page uses user_id to avoid drawing the user's message twice"""
+    client = app.test_client()
+    reply = chat(client, "hello")
+
+    history = client.get('/history').get_json()['history']
+    assert [m['id'] for m in history] == [reply['user_id'], reply['id']]
+    assert [m['type'] for m in history] == ['user', 'assistant']
+
+
+def test_history_pages_with_a_cursor():
+    """Following next_after returns every message once, in order"""
+    client = app.test_client()
+    for _ in range(3):
+        chat(client, "what time is it")
+    everything = client.get('/history').get_json()['history']
+    assert len(everything) == 6
+
+    seen = []
+    after = 0
+    while True:
+        page = client.get(f'/history?after={after}&limit=4').get_json()
+        seen += page['history']
+        after = page['next_after']
+        if not page['has_more']:
+            break
+    assert seen == everything
+
+    # Caught up: nothing new after the last id
+    page = client.get(f'/history?after={after}').get_json()
+    assert page['history'] == [] and page['next_after'] == after
+
+
+def test_unchanged_history_answers_304():
+    """A poll with the last ETag costs no body until a message arrives"""
+    client = app.test_client()
+    chat(client, "hello")
+
+    first = client.get('/history')
+    etag = first.headers['ETag']
+    assert client.get('/history', headers={'If-None-Match': etag}).status_code == 304
+
+    chat(client, "hello")
+    changed = client.get('/history', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert len(changed.get_json()['history']) == 4
+
+
+if __name__ == "__main__":
+    test_chat_returns_the_stored_ids()
+    test_history_pages_with_a_cursor()
+    test_unchanged_history_answers_304()
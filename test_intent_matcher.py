@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Tests for the first-word index of IntentMatcher
+A pattern may only be filed under a word every one of its matches starts
+with; anything else must still be tried, as re.search would
+"""
+
+from voice_assistant.intent_matcher import IntentMatcher
+
+
+def test_alternation_is_tried_at_every_word():
+    """'play music|start the playlist' isn't filed only under 'play'"""
+    matcher = IntentMatcher({'music': [r'play music|start the playlist']})
+
+    assert matcher.match("start the playlist")[0] == 'music'
+    assert matcher.match("please play music")[0] == 'music'
+
+
+def test_optional_separator_after_the_first_word():
+    """'hi ?there' matches 'hithere', whose first word isn't 'hi'"""
+    matcher = IntentMatcher({'greeting': [r'hi ?there']})
+
+    assert matcher.match("hithere")[0] == 'greeting'
+    assert matcher.match("hi there")[0] == 'greeting'
+    assert matcher.match("this there")[0] is None
+
+
+def test_literal_words_keep_registration_priority():
+    """Indexed and unindexed patterns still resolve in registration order"""
+    matcher = IntentMatcher({
+        'wikipedia': [r'search wikipedia for (.+)'],
+        'time': [r'what time|current time'],
+    })
+
+    command_type, match = matcher.match("search wikipedia for current time")
+    assert command_type == 'wikipedia'
+    assert match.group(1) == "current time"
+    assert matcher.match("what time is it")[0] == 'time'
+
+
+if __name__ == "__main__":
+    test_alternation_is_tried_at_every_word()
+    test_optional_separator_after_the_first_word()
+    test_literal_words_keep_registration_priority()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for the metrics registry
+Values recorded from many threads add up, and /metrics merges the
+snapshots every worker process writes into the shared directory
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+from voice_assistant.metrics import MetricsRegistry
+from web_app import app
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def other_worker(pid, requests, seconds, sessions):
+    """Snapshot as another worker process would write it"""
+    return {
+        'pid': pid,
+        'metrics': {
+            'requests_total': {'kind': 'counter', 'help': "Requests", 'labels': ['route'],
+                               'values': [[['/chat'], requests]]},
+            'latency_seconds': {'kind': 'histogram', 'help': "Latency", 'labels': [], 'buckets': [0.1, 1],
+                                'values': [[[], [1, 0, 0, seconds, 1]]]},
+            'sessions': {'kind': 'gauge', 'help': "Sessions", 'labels': [], 'mode': 'max',
+                         'values': [[[], sessions]]},
+        },
+    }
+
+
+def test_threads_add_up_after_they_finish():
+    """Shards of finished threads are folded into one total"""
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', "Requests", ['route'])
+    latency = registry.histogram('latency_seconds', "Latency", buckets=(0.1, 1))
+
+    def work():
+        for _ in range(10):
+            requests.inc('/chat')
+            latency.observe(0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert requests.collect() == {('/chat',): 500}
+    assert latency.collect()[()] == [0, 500, 0, 250.0, 500]
+    assert len(requests._shards) <= 1
+
+
+def test_render_merges_every_worker():
+    """Counters and histograms add up, gauges combine by mode, exited workers' gauges drop out"""
+    with tempfile.TemporaryDirectory() as directory:
+        registry = MetricsRegistry()
+        registry.counter('requests_total', "Requests", ['route']).inc('/chat', amount=3)
+        registry.histogram('latency_seconds', "Latency", buckets=(0.1, 1)).observe(0.5)
+        registry.gauge('sessions', "Sessions", lambda: 4, mode='max')
+        registry.share(directory, interval=60)
+
+        for snapshot in (other_worker(os.getppid(), 2, 0.05, 7), other_worker(dead_pid(), 5, 0.05, 100)):
+            with open(os.path.join(directory, f"{snapshot['pid']}.json"), "w") as f:
+                json.dump(snapshot, f)
+
+        lines = registry.render().splitlines()
+
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="/chat"} 10' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{le="1"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert 'latency_seconds_count 3' in lines
+    assert "sessions 7" in lines
+
+
+def test_metrics_endpoint():
+    response = app.test_client().get('/metrics')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert "# TYPE assistant_http_request_seconds histogram" in body
+    assert "assistant_active_sessions" in body
+
+
+if __name__ == "__main__":
+    test_threads_add_up_after_they_finish()
+    test_render_merges_every_worker()
+    test_metrics_endpoint()
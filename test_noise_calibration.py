@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the background noise calibration
+Chunks of generated noise and tone are fed straight to NoiseCalibration,
+without a capture thread
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from voice_assistant.noise_calibration import NoiseCalibration
+
+RATE = 16000
+CHUNK = 1024
+
+
+def noise(level, seconds, seed=0):
+    """Chunks of Gaussian noise with RMS level (fraction of full scale)"""
+    rng = np.random.default_rng(seed)
+    count = int(seconds * RATE / CHUNK)
+    return [(rng.normal(0, level, CHUNK) * 32767).astype('<i2').tobytes() for _ in range(count)]
+
+
+def feed(calibration, chunks):
+    for chunk in chunks:
+        calibration.observe(chunk, RATE)
+
+
+def test_warmup_then_follows_quiet_noise_but_not_speech():
+    calibration = NoiseCalibration()
+    feed(calibration, noise(0.01, 1.2))
+    assert abs(calibration.noise_floor - 328) < 15
+
+    # Speech-length loud audio leaves the floor alone
+    feed(calibration, noise(0.2, 3.0))
+    assert abs(calibration.noise_floor - 328) < 15
+
+    # Quieter background is followed within a couple of seconds
+    feed(calibration, noise(0.003, 3.0))
+    assert abs(calibration.noise_floor - 98) < 15
+
+    # Noise that stays loud is followed once it has lasted noise_seconds
+    feed(calibration, noise(0.03, calibration.noise_seconds + 4))
+    assert abs(calibration.noise_floor - 983) < 100
+    assert calibration.stats()['noise_resets'] == 1
+
+
+def test_saved_per_device_and_reused_without_warmup():
+    path = os.path.join(tempfile.mkdtemp(), "calibration.json")
+    first = NoiseCalibration.load("mic A", path)
+    assert not first.loaded
+    feed(first, noise(0.01, 1.2))
+    first.save()
+    other = NoiseCalibration.load("mic B", path)
+    other.set_floor(50)
+    other.save()
+
+    again = NoiseCalibration.load("mic A", path)
+    assert again.loaded
+    assert abs(again.energy_threshold - first.energy_threshold) < 1
+    # A saved calibration isn't thrown away by a burst of speech at startup
+    feed(again, noise(0.2, 1.0))
+    assert abs(again.energy_threshold - first.energy_threshold) < 1
+    assert NoiseCalibration.load("mic B", path).noise_floor == 50
+    assert not NoiseCalibration.load(None, path).loaded
+
+
+if __name__ == "__main__":
+    test_warmup_then_follows_quiet_noise_but_not_speech()
+    test_saved_per_device_and_reused_without_warmup()
+    print("Noise calibration tests passed!")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for recognizer backends and the recognition pool
+A stand-in backend reports each phrase's length, so SpeechHandler can be
+driven from generated audio without a microphone or network
+"""
+
+import threading
+import time
+
+import numpy as np
+import speech_recognition as sr
+
+from voice_assistant.audio_capture import GeneratorSource
+from voice_assistant.recognizers import RecognitionPool, RecognizerBackend
+from voice_assistant.speech_handler import SpeechHandler
+
+RATE = 16000
+
+
+class LengthBackend(RecognizerBackend):
+    """Transcribes a phrase as its length in tenths of a second"""
+
+    name = 'length'
+    offline = True
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.threads = set()
+
+    def transcribe(self, audio):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        seconds = len(audio.frame_data) / audio.sample_width / audio.sample_rate
+        if seconds < 0.2:
+            raise sr.UnknownValueError()
+        return f"{round(seconds * 10)} tenths"
+
+
+def audio_of(seconds):
+    return sr.AudioData(bytes(2 * int(seconds * RATE)), RATE, 2)
+
+
+def test_pool_counts_outcomes_and_real_time_factor():
+    pool = RecognitionPool(LengthBackend(delay=0.05), workers=2)
+    futures = [pool.submit(audio_of(1.0)), pool.submit(audio_of(1.0)), pool.submit(audio_of(0.1))]
+
+    assert futures[0].result() == "10 tenths"
+    assert futures[1].result() == "10 tenths"
+    try:
+        futures[2].result()
+        assert False, "short audio should not be understood"
+    except sr.UnknownValueError:
+        pass
+
+    stats = pool.stats()
+    pool.shutdown(wait=True)
+    assert stats['recognitions'] == 2
+    assert stats['not_understood'] == 1
+    assert stats['in_flight'] == 0
+    assert abs(stats['audio_seconds'] - 2.1) < 0.01
+    assert 0 < stats['real_time_factor'] < 1
+
+
+def test_speech_handler_recognizes_off_the_capture_thread():
+    """Phrases are carved and recognized while capture keeps going"""
+    tone = (0.3 * np.sin(2 * np.pi * 220 * np.arange(int(0.6 * RATE)) / RATE)).astype(np.float32)
+    quiet = np.zeros(RATE, dtype=np.float32)
+    audio = np.concatenate([np.zeros(2 * RATE, dtype=np.float32), tone, quiet, tone, quiet])
+    chunks = [audio[i:i + 1024] for i in range(0, len(audio), 1024)]
+    backend = LengthBackend(delay=0.05)
+    speech = SpeechHandler(source=GeneratorSource(chunks, RATE), backend=backend)
+
+    first = speech.recognize_async(speech.listen(timeout=5))
+    second = speech.recognize_async(speech.listen(timeout=5))
+    texts = [speech.result(first), speech.result(second)]
+    speech.close()
+
+    assert all(text.endswith("tenths") for text in texts)
+    assert all(name.startswith("recognizer-length") for name in backend.threads)
+
+
+if __name__ == "__main__":
+    test_pool_counts_outcomes_and_real_time_factor()
+    test_speech_handler_recognizes_off_the_capture_thread()
+    print("Recognizer tests passed!")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Concurrency test for Wikipedia lookup coalescing
+N parallel identical requests must produce exactly one backend call
+"""
+
+import threading
+import time
+from voice_assistant.admission import AdmissionControl
+from voice_assistant.command_processor import CommandProcessor
+from voice_assistant.wiki_cache import WikiCache
+
+PARALLEL_REQUESTS = 20
+
+
+def test_identical_lookups_share_one_backend_call():
+    """Fire identical Wikipedia commands from many threads at once"""
+    processor = CommandProcessor(None, wiki_cache=WikiCache())
+    # Let every thread through so coalescing, not load shedding, is tested
+    processor.admission = AdmissionControl({})
+    backend_calls = []
+
+    def slow_backend(query, lang):
+        backend_calls.append(query)
+        time.sleep(0.2)
+        return f"According to Wikipedia: {query} is a test topic.", True
+
+    # Stub out both resolution modes so no network is touched
+    processor._lookup_wikipedia = slow_backend
+    processor._lookup_wikipedia_parallel = slow_backend
+
+    barrier = threading.Barrier(PARALLEL_REQUESTS)
+    responses = [None] * PARALLEL_REQUESTS
+
+    def worker(i):
+        barrier.wait()
+        responses[i] = processor.process_command("search wikipedia for Python Programming")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(PARALLEL_REQUESTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = processor.single_flight.stats()
+    assert len(backend_calls) == 1
+    assert len(set(responses)) == 1
+    assert responses[0] == "According to Wikipedia: python programming is a test topic."
+    assert stats['executions'] == 1
+    assert stats['in_flight'] == 0
+    # Threads that lost the race either waited on the flight or hit the cache
+    assert stats['coalesced'] + processor.wiki_cache.stats()['memory_hits'] == PARALLEL_REQUESTS - 1
+
+
+def test_waiters_share_the_leaders_exception():
+    """A failing upstream call is re-raised to every coalesced waiter"""
+    processor = CommandProcessor(None, wiki_cache=WikiCache())
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def failing_backend():
+        started.set()
+        release.wait()
+        raise ConnectionError("upstream down")
+
+    def call():
+        try:
+            processor.single_flight.do("wikipedia:en:down", failing_backend)
+        except ConnectionError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    waiters = [threading.Thread(target=call) for _ in range(3)]
+    for thread in waiters:
+        thread.start()
+    while processor.single_flight.stats()['coalesced'] < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in [leader] + waiters:
+        thread.join()
+
+    assert len(errors) == 4
+    assert all(e is errors[0] for e in errors)
+
+
+if __name__ == "__main__":
+    test_identical_lookups_share_one_backend_call()
+    test_waiters_share_the_leaders_exception()
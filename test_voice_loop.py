@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for replaying audio through the voice loop
+Tone bursts stand in for speech and a scripted recognizer for the engine,
+so VoiceAssistant runs headless, without a microphone, speakers or network
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from config import Config
+from main import VoiceAssistant
+from voice_assistant.audio_capture import FileSource
+from voice_assistant.recognizers import ScriptedBackend
+from voice_assistant.speech_handler import SpeechHandler
+from voice_assistant.tts_handler import NullTTSHandler
+from voice_assistant.wake_word import write_wav
+
+RATE = 16000
+
+
+def tone(seconds):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def write_script(directory, lines):
+    write_wav(os.path.join(directory, "phrase.wav"), tone(0.6), RATE)
+    path = os.path.join(directory, "script.txt")
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def test_script_plays_files_and_silences_in_order():
+    directory = tempfile.mkdtemp()
+    path = write_script(directory, ["# a comment", "silence 0.5", "phrase.wav", "", "silence 0.25"])
+    source = FileSource.from_script(path, chunk=800)
+
+    chunks = []
+    while True:
+        chunk = source.read()
+        if chunk is None:
+            break
+        chunks.append(np.frombuffer(chunk, dtype='<i2'))
+    audio = np.concatenate(chunks)
+    assert len(audio) == int(1.35 * RATE)
+    assert not audio[:int(0.5 * RATE)].any()
+    assert audio[int(0.5 * RATE):int(1.1 * RATE)].any()
+    assert not audio[int(1.1 * RATE):].any()
+
+
+def test_replay_runs_turns_and_times_them():
+    directory = tempfile.mkdtemp()
+    turn = ["phrase.wav", "silence 1.2", "phrase.wav", "silence 2"]
+    path = write_script(directory, ["silence 1.5"] + turn * 2)
+    Config.WAKE_WORD_DIR = os.path.join(directory, "no_wake_word")
+    Config.NOISE_CALIBRATION_FILE = None
+
+    backend = ScriptedBackend(["hey assistant", "what time is it", "hey assistant", ""])
+    speech = SpeechHandler(source=FileSource.from_script(path), backend=backend)
+    assistant = VoiceAssistant(speech=speech, tts=NullTTSHandler())
+    assistant.start()
+
+    turns = list(assistant.turns)
+    assert [t['command'] for t in turns] == ["what time is it", None]
+    assert turns[0]['response'].startswith("The current time is")
+    assert turns[0]['intent_ms'] is not None
+    assert turns[1]['response'] == "I didn't catch that. Could you repeat?"
+    for t in turns:
+        assert 1400 <= t['capture_ms'] <= 1800  # Tone and closing pause, plus pre-roll
+        assert t['first_audio_ms'] is not None
+
+
+if __name__ == "__main__":
+    test_script_plays_files_and_silences_in_order()
+    test_replay_runs_turns_and_times_them()
+    print("Voice loop tests passed!")
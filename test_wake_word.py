@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Fixture tests for local wake word detection
+Writes enrollment and test recordings as WAV files, then checks the
+detector finds every wake word in them and nothing else
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from bench_wake_word import SAMPLE_RATE, enrollment, make_stream, noise, spoken_words
+from voice_assistant.wake_word import WakeWordDetector, write_wav
+
+
+def write_fixtures(directory):
+    """Enrollment recordings in directory/wake_word, a test stream in directory/stream.wav"""
+    templates = os.path.join(directory, "wake_word")
+    os.makedirs(templates)
+    for name, audio in enrollment(3).items():
+        write_wav(os.path.join(templates, name), audio, SAMPLE_RATE)
+
+    rng = np.random.default_rng(7)
+    samples, spans = make_stream(spoken_words(12, rng), rng=rng)
+    stream = os.path.join(directory, "stream.wav")
+    write_wav(stream, samples, SAMPLE_RATE)
+    return templates, stream, spans
+
+
+def test_detects_each_wake_word_in_a_recording():
+    """Six wake words among six other words, each found once near its end"""
+    with tempfile.TemporaryDirectory() as directory:
+        templates, stream, spans = write_fixtures(directory)
+        detector = WakeWordDetector.from_directory(templates, SAMPLE_RATE)
+        detections = detector.detect_file(stream)
+
+    wake_spans = [(start, end) for start, end, is_wake in spans if is_wake]
+    assert len(detections) == len(wake_spans), detections
+    for detection, (start, end) in zip(detections, wake_spans):
+        assert start <= detection.audio_time <= end + 0.3, detection
+
+
+def test_detector_matches_nothing_in_background_noise():
+    """The energy gate keeps steady noise away from the matcher entirely"""
+    detector = WakeWordDetector(enrollment(2), SAMPLE_RATE)
+    samples = noise(10, rng=np.random.default_rng(3))
+    pcm = (samples * 32767).astype('<i2').tobytes()
+
+    # Microphone-style reads of 16-bit PCM
+    detections = [detector.process(pcm[i:i + 2048]) for i in range(0, len(pcm), 2048)]
+
+    assert not any(detections)
+    assert detector.stats()['speech_seconds'] == 0
+
+
+if __name__ == "__main__":
+    test_detects_each_wake_word_in_a_recording()
+    test_detector_matches_nothing_in_background_noise()
+    print("Wake word tests passed!")
@@ -0,0 +1,119 @@
+"""
+Admission Control Module
+Per-intent concurrency limits with a bounded wait queue, so slow
+network-bound intents are shed instead of tying up every server thread
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# What users are told when their command is refused
+BUSY_MESSAGE = "Sorry, I'm busy with other requests right now. Please try again in a moment."
+
+
+class Overloaded(Exception):
+    """Raised when a command is refused because its intent is saturated"""
+
+    def __init__(self, intent, reason):
+        super().__init__(f"{intent} is busy ({reason})")
+        self.intent = intent
+        self.reason = reason
+
+
+class _Gate:
+    """Concurrency limit and wait queue for one intent"""
+
+    def __init__(self, limit, max_queue, max_wait):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.running = 0
+        self.waiting = 0
+        self.ready = threading.Condition(threading.Lock())
+        self.stats = {
+            'admitted': 0,
+            'queued': 0,
+            'rejected_queue_full': 0,
+            'rejected_timeout': 0,
+            'max_waiting': 0,
+        }
+
+    def enter(self, name):
+        with self.ready:
+            if self.running < self.limit and not self.waiting:
+                self.running += 1
+                self.stats['admitted'] += 1
+                return
+
+            if self.waiting >= self.max_queue:
+                self.stats['rejected_queue_full'] += 1
+                raise Overloaded(name, "queue full")
+
+            self.waiting += 1
+            self.stats['queued'] += 1
+            self.stats['max_waiting'] = max(self.stats['max_waiting'], self.waiting)
+            deadline = time.monotonic() + self.max_wait
+            try:
+                while self.running >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats['rejected_timeout'] += 1
+                        raise Overloaded(name, "queue wait exceeded")
+                    self.ready.wait(remaining)
+            finally:
+                self.waiting -= 1
+
+            self.running += 1
+            self.stats['admitted'] += 1
+
+    def leave(self):
+        with self.ready:
+            self.running -= 1
+            self.ready.notify()
+
+
+class AdmissionControl:
+    def __init__(self, limits, max_queue=8, max_wait=1.0):
+        """
+        Initialize the gates
+
+        Args:
+            limits: Dict of intent name -> concurrent commands allowed;
+                intents not listed are never limited
+            max_queue: Commands allowed to wait per intent once it is at its limit
+            max_wait: Seconds a command may wait before it is refused
+        """
+        self._gates = {name: _Gate(limit, max_queue, max_wait) for name, limit in limits.items()}
+
+    @contextmanager
+    def admit(self, intent):
+        """
+        Hold a slot of an intent's limit for the duration of the block
+
+        Raises:
+            Overloaded: If the intent's queue is full or the wait timed out
+        """
+        gate = self._gates.get(intent)
+        if gate is None:
+            yield
+            return
+
+        gate.enter(intent)
+        try:
+            yield
+        finally:
+            gate.leave()
+
+    def limit(self, intent):
+        """Concurrent commands allowed for an intent, or None if it isn't limited"""
+        gate = self._gates.get(intent)
+        return gate.limit if gate is not None else None
+
+    def stats(self):
+        """Return queue depth, running count and rejection counters per intent"""
+        stats = {}
+        for name, gate in self._gates.items():
+            with gate.ready:
+                stats[name] = dict(gate.stats, limit=gate.limit, running=gate.running, waiting=gate.waiting)
+        return stats
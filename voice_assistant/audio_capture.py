@@ -0,0 +1,381 @@
+"""
+Audio Capture Module
+A long-lived thread that reads an audio source into a fixed-size ring
+buffer of chunks, so nothing is lost between listen() calls, and the
+utterance carving that turns that buffer into phrases
+"""
+
+import os
+import threading
+import time
+import wave
+from collections import deque
+
+import numpy as np
+
+SAMPLE_WIDTH = 2  # Bytes per sample; every source delivers 16-bit mono PCM
+
+
+def chunk_energy(chunk):
+    """RMS of 16-bit PCM, on the same scale as Recognizer.energy_threshold"""
+    samples = np.frombuffer(chunk, dtype='<i2').astype(np.float32)
+    return float(np.sqrt((samples ** 2).mean())) if len(samples) else 0.0
+
+
+class MicrophoneSource:
+    # Reads come from the device as it records, so a full buffer overwrites old audio
+    live = True
+
+    def __init__(self, device_index=None, sample_rate=None, chunk=1024):
+        """
+        Keep one PyAudio input stream open for the life of the capture
+
+        Args:
+            device_index: PyAudio device, None for the default microphone
+            sample_rate: Samples per second, None for the device's default
+            chunk: Samples per read
+        """
+        import speech_recognition as sr
+
+        self.microphone = sr.Microphone(device_index=device_index, sample_rate=sample_rate, chunk_size=chunk)
+        self.sample_rate = self.microphone.SAMPLE_RATE
+        self.chunk = self.microphone.CHUNK
+        self._stream = self.microphone.__enter__().stream
+        self.device = self._device_name(device_index)
+
+    def _device_name(self, device_index):
+        # Names the input device for per-device settings such as noise calibration
+        try:
+            audio = self.microphone.audio
+            info = (audio.get_default_input_device_info() if device_index is None
+                    else audio.get_device_info_by_index(device_index))
+            return f"{info['name']} @ {self.sample_rate} Hz"
+        except Exception:
+            return f"input {device_index if device_index is not None else 'default'} @ {self.sample_rate} Hz"
+
+    def read(self):
+        return self._stream.read(self.chunk)
+
+    def close(self):
+        self.microphone.__exit__(None, None, None)
+
+
+class GeneratorSource:
+    # Audio is produced on demand, so a full buffer makes the capture wait for the reader
+    live = False
+    device = None  # Not a device: nothing is saved per device
+
+    def __init__(self, chunks, sample_rate, realtime=False):
+        """
+        Audio from any iterable of chunks
+
+        Args:
+            chunks: 16-bit PCM bytes, or float sample arrays in [-1, 1]
+            sample_rate: Samples per second of the chunks
+            realtime: Pace reads at the audio's own speed, like a microphone
+        """
+        self.sample_rate = sample_rate
+        self.realtime = realtime
+        self._chunks = iter(chunks)
+        self._next_due = None
+
+    def read(self):
+        """Return the next chunk as bytes, or None at the end"""
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return None
+        if not isinstance(chunk, (bytes, bytearray)):
+            chunk = (np.clip(np.asarray(chunk), -1, 1) * 32767).astype('<i2').tobytes()
+
+        if self.realtime:
+            now = time.monotonic()
+            self._next_due = max(self._next_due or now, now - 1) + len(chunk) / SAMPLE_WIDTH / self.sample_rate
+            time.sleep(max(0.0, self._next_due - now))
+        return bytes(chunk)
+
+    def close(self):
+        close = getattr(self._chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+class FileSource(GeneratorSource):
+    def __init__(self, paths, chunk=1024, realtime=False, silence=0.0):
+        """
+        Audio from one or more 16-bit mono WAV files, played back to back
+
+        Args:
+            paths: WAV file path or list of paths, all at the same sample rate;
+                a number in the list is that many seconds of silence
+            chunk: Samples per read
+            realtime: Pace reads at the audio's own speed, like a microphone
+            silence: Seconds of silence added after each file
+        """
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        files = [path for path in self.paths if isinstance(path, str)]
+        if not files:
+            raise ValueError("No WAV files to play")
+        with wave.open(files[0], 'rb') as f:
+            sample_rate = f.getframerate()
+        self.chunk = chunk
+        self.silence = silence
+        super().__init__(self._read_files(sample_rate), sample_rate, realtime)
+
+    @classmethod
+    def from_script(cls, path, gap=1.0, **kwargs):
+        """
+        Replay a directory of WAV files, or a script of them
+
+        A directory plays its WAV files in name order, gap seconds apart.
+        A script is a text file with one WAV path (relative to the script)
+        or "silence <seconds>" per line; blank lines and # comments are skipped.
+        """
+        if os.path.isdir(path):
+            items = []
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(".wav"):
+                    items += [os.path.join(path, name), gap]
+            return cls(items, **kwargs)
+
+        items = []
+        with open(path) as f:
+            for number, line in enumerate(f, 1):
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                if line.startswith("silence"):
+                    try:
+                        items.append(float(line.split()[1]))
+                    except (IndexError, ValueError):
+                        raise ValueError(f"{path}:{number}: expected 'silence <seconds>'")
+                else:
+                    items.append(os.path.join(os.path.dirname(path), line))
+        return cls(items, **kwargs)
+
+    def _read_files(self, sample_rate):
+        for path in self.paths:
+            if not isinstance(path, str):
+                yield from self._silence(path, sample_rate)
+                continue
+            with wave.open(path, 'rb') as f:
+                if f.getsampwidth() != SAMPLE_WIDTH or f.getnchannels() != 1:
+                    raise ValueError(f"{path}: expected 16-bit mono audio")
+                if f.getframerate() != sample_rate:
+                    raise ValueError(f"{path}: sample rate {f.getframerate()} differs from {sample_rate}")
+                while True:
+                    data = f.readframes(self.chunk)
+                    if not data:
+                        break
+                    yield data
+            yield from self._silence(self.silence, sample_rate)
+
+    def _silence(self, seconds, sample_rate):
+        pad = int(seconds * sample_rate)
+        for start in range(0, pad, self.chunk):
+            yield bytes(SAMPLE_WIDTH * min(self.chunk, pad - start))
+
+
+class AudioCapture:
+    def __init__(self, source, buffer_seconds=10, on_chunk=None):
+        """
+        Initialize the capture (call start() to begin reading)
+
+        Positions are chunk sequence numbers. A reader keeps its own position
+        and gets every chunk after it, in order, unless it falls more than
+        buffer_seconds behind a live source and the oldest chunks are
+        overwritten; then it skips ahead and the skip is counted.
+
+        Args:
+            source: MicrophoneSource, FileSource or GeneratorSource
+            buffer_seconds: Audio kept in the ring buffer
+            on_chunk: Called with each chunk and the sample rate, on the capture thread
+        """
+        self.source = source
+        self.sample_rate = source.sample_rate
+        self.buffer_seconds = buffer_seconds
+        self.on_chunk = on_chunk
+        self._slots = None  # Sized from the first chunk
+        self._written = 0
+        self._read_up_to = 0  # Highest position handed to a reader
+        self._closed = False
+        self._released = False
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stats = {'chunks': 0, 'overruns': 0, 'skipped_chunks': 0, 'errors': 0}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="audio-capture", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=2):
+        """Stop reading and release the source; readers get None once drained"""
+        with self._condition:
+            if self._released:
+                return
+            self._released = True
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        try:
+            self.source.close()
+        except Exception as e:
+            print(f"Error closing audio source: {e}")
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def position(self):
+        """Position just after the newest chunk (where a reader starts to hear only new audio)"""
+        with self._condition:
+            return self._written
+
+    def seconds(self, chunks):
+        """Audio duration of a number of chunks"""
+        return chunks * self._chunk_seconds if self._slots else 0.0
+
+    def read(self, position, timeout=None):
+        """
+        Return (chunk, next position) for the chunk at position
+
+        Waits up to timeout seconds for it to be captured. Returns
+        (None, position) on timeout, or at the end of a finished source.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while position >= self._written:
+                if self._closed:
+                    return None, position
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None, position
+                self._condition.wait(remaining)
+
+            oldest = self._written - len(self._slots)
+            if position < oldest:
+                self._stats['overruns'] += 1
+                self._stats['skipped_chunks'] += oldest - position
+                position = oldest
+            chunk = self._slots[position % len(self._slots)]
+            if position + 1 > self._read_up_to:
+                self._read_up_to = position + 1
+                # A finite source may be waiting for room in the buffer
+                self._condition.notify_all()
+            return chunk, position + 1
+
+    def utterance(self, position, energy_threshold, timeout=None, phrase_time_limit=None,
+                  pause_threshold=0.8, phrase_threshold=0.3, pre_roll=0.3):
+        """
+        Carve the next phrase out of the buffer, starting at position
+
+        Chunks louder than energy_threshold are speech. The phrase starts
+        pre_roll seconds before the first speech chunk and ends after
+        pause_threshold seconds of quiet or phrase_time_limit seconds.
+
+        Args:
+            timeout: Seconds of audio to wait for speech to start (None waits forever)
+            phrase_threshold: Bursts of speech shorter than this are ignored
+
+        Returns:
+            (PCM bytes of the phrase or None if none started in time, next position)
+        """
+        lead_in = deque()
+        phrase = []
+        waited = duration = speech = quiet = 0.0
+        while True:
+            chunk, position = self.read(position, timeout=self._wall_timeout(timeout, waited))
+            if chunk is None:
+                break
+            length = len(chunk) / SAMPLE_WIDTH / self.sample_rate
+            loud = chunk_energy(chunk) > energy_threshold
+
+            if not phrase:
+                waited += length
+                lead_in.append(chunk)
+                # Keep pre_roll seconds before the current chunk
+                while len(lead_in) > 1 and (len(lead_in) - 1) * length > pre_roll:
+                    lead_in.popleft()
+                if loud:
+                    phrase = list(lead_in)
+                    lead_in.clear()
+                    duration = len(phrase) * length
+                    speech, quiet = length, 0.0
+                elif timeout is not None and waited >= timeout:
+                    return None, position
+                continue
+
+            phrase.append(chunk)
+            duration += length
+            if loud:
+                speech += length
+                quiet = 0.0
+            else:
+                quiet += length
+            if phrase_time_limit is not None and duration >= phrase_time_limit:
+                break
+            if quiet >= pause_threshold:
+                if speech >= phrase_threshold:
+                    break
+                # A click or pop, not speech: keep waiting
+                lead_in.extend(phrase)
+                phrase = []
+
+        if not phrase or speech < phrase_threshold:
+            return None, position
+        return b"".join(phrase), position
+
+    def _wall_timeout(self, timeout, waited):
+        # Audio time is what counts; this only guards against a stalled source
+        if timeout is None:
+            return None
+        return max(0.0, timeout - waited) + 1.0
+
+    def stats(self):
+        with self._condition:
+            capacity = len(self._slots) if self._slots else 0
+            return dict(
+                self._stats,
+                position=self._written,
+                buffered_seconds=round(self.seconds(min(self._written, capacity)), 2),
+                capacity_seconds=round(self.seconds(capacity), 2),
+                closed=self._closed,
+            )
+
+    def _run(self):
+        while not self._closed:
+            try:
+                chunk = self.source.read()
+            except Exception as e:
+                self._stats['errors'] += 1
+                print(f"Error reading audio: {e}")
+                time.sleep(0.1)
+                continue
+            if chunk is None:
+                break
+            self._append(chunk)
+            if self.on_chunk is not None:
+                try:
+                    self.on_chunk(chunk, self.sample_rate)
+                except Exception as e:
+                    self._stats['errors'] += 1
+                    print(f"Error handling captured audio: {e}")
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _append(self, chunk):
+        with self._condition:
+            if self._slots is None:
+                self._chunk_seconds = len(chunk) / SAMPLE_WIDTH / self.sample_rate
+                self._slots = [None] * max(2, int(round(self.buffer_seconds / self._chunk_seconds)))
+            # Don't overwrite what a reader hasn't had yet unless the audio won't wait
+            while not self.source.live and self._written - self._read_up_to >= len(self._slots) and not self._closed:
+                self._condition.wait()
+            self._slots[self._written % len(self._slots)] = chunk
+            self._written += 1
+            self._stats['chunks'] += 1
+            self._condition.notify_all()
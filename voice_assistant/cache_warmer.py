@@ -0,0 +1,88 @@
+"""
+Cache Warmer Module
+Keeps the Wikipedia answers for hot commands in the cache by fetching
+them in the background and refreshing them before they expire
+"""
+
+import threading
+import time
+
+
+class CacheWarmer:
+    def __init__(self, processor, commands, refresh_margin=600, retry_interval=60):
+        """
+        Initialize the warmer (call start() to begin)
+
+        Args:
+            processor: CommandProcessor whose cache is warmed
+            commands: Commands to keep warm; only Wikipedia lookups are fetched
+            refresh_margin: Seconds before expiry at which an answer is refetched
+            retry_interval: Seconds before retrying a lookup that failed
+        """
+        self.processor = processor
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.queries = self._wikipedia_queries(commands)
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {
+            'warmed': 0,
+            'failed': 0,
+            'last_run': None,
+        }
+
+    def _wikipedia_queries(self, commands):
+        """The Wikipedia queries among commands, in order and without repeats"""
+        queries = []
+        for command in commands:
+            name, match = self.processor.registry.matcher.match(command.lower().strip())
+            if name == 'wikipedia' and match.groups() and match.group(1) not in queries:
+                queries.append(match.group(1))
+        return queries
+
+    def start(self):
+        """Start warming in a daemon thread; returns immediately"""
+        if self._thread is None and self.queries:
+            self._thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        """Stop the thread, waiting up to timeout for a fetch in progress"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, queries=len(self.queries))
+
+    def _run(self):
+        # Every query is due immediately, then just before its answer expires
+        due = {query: 0.0 for query in self.queries}
+        while not self._stop.is_set():
+            for query in self.queries:
+                if self._stop.is_set():
+                    return
+                if due[query] <= time.time():
+                    due[query] = self._warm(query)
+
+            self._stop.wait(max(1.0, min(due.values()) - time.time()))
+
+    def _warm(self, query):
+        """Fetch one query and return when it is next due"""
+        try:
+            expires = self.processor.warm_wikipedia(query)
+        except Exception as e:
+            print(f"Cache warming error for {query}: {e}")
+            expires = None
+
+        with self._lock:
+            self._stats['last_run'] = time.time()
+            self._stats['warmed' if expires is not None else 'failed'] += 1
+
+        if expires is None:
+            return time.time() + self.retry_interval
+        return max(time.time() + self.retry_interval, expires - self.refresh_margin)
@@ -0,0 +1,85 @@
+"""
+Chat History Module
+Compact, bounded message history for one chat session, with each
+message's markdown rendered once when it is added
+"""
+
+import re
+from collections import deque
+from itertools import islice
+
+URL_PATTERN = re.compile(r'(https?://[^\s]+)')
+
+# Rough per-message overhead (object, slots, timestamp) on top of the text
+_MESSAGE_OVERHEAD = 120
+
+
+def render_markdown(content):
+    """Turn bare URLs into markdown links"""
+    return URL_PATTERN.sub(r'[\1](\1)', content)
+
+
+class ChatMessage:
+    __slots__ = ('role', 'content', '_markdown', 'timestamp')
+
+    def __init__(self, role, content, timestamp):
+        self.role = role
+        self.content = content
+        self.timestamp = timestamp
+        markdown = render_markdown(content)
+        # Most messages have no URLs, so don't keep a second copy of them
+        self._markdown = markdown if markdown != content else None
+
+    @property
+    def markdown(self):
+        return self._markdown if self._markdown is not None else self.content
+
+    @property
+    def size(self):
+        return _MESSAGE_OVERHEAD + len(self.content) + len(self._markdown or "")
+
+
+class ChatHistory:
+    def __init__(self, max_messages=5000, max_bytes=4 * 1024 * 1024):
+        """
+        Initialize an empty history
+
+        Args:
+            max_messages: Messages kept (oldest dropped first)
+            max_bytes: Approximate memory budget for the messages' text
+        """
+        self.max_bytes = max_bytes
+        self._messages = deque(maxlen=max_messages)
+        self.bytes = 0
+        self.dropped = 0
+
+    def append(self, role, content, timestamp):
+        """Add a message, dropping the oldest ones over the limits"""
+        if len(self._messages) == self._messages.maxlen:
+            self._drop_oldest()
+
+        message = ChatMessage(role, content, timestamp)
+        self._messages.append(message)
+        self.bytes += message.size
+
+        while self.bytes > self.max_bytes and len(self._messages) > 1:
+            self._drop_oldest()
+        return message
+
+    def recent(self, count):
+        """Return the newest count messages, oldest first"""
+        # Walk from the newest end so the cost is O(count), not O(history)
+        window = list(islice(reversed(self._messages), count))
+        window.reverse()
+        return window
+
+    def clear(self):
+        self._messages.clear()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._messages)
+
+    def _drop_oldest(self):
+        self.bytes -= self._messages.popleft().size
+        self.dropped += 1
@@ -4,96 +4,340 @@ Handles parsing and execution of voice commands
 """
 
 import datetime
-import webbrowser
-import wikipedia
-import re
 import os
+import threading
+import time
+from collections import Counter
+from config import Config
+from voice_assistant.admission import BUSY_MESSAGE, AdmissionControl, Overloaded
+from voice_assistant.intent_registry import IntentRegistry
+from voice_assistant.metrics import METRICS
+from voice_assistant.single_flight import SingleFlight
+from voice_assistant.wiki_cache import WikiCache
+
+# The wikipedia package (and requests/BeautifulSoup behind it) is only
+# imported by the first lookup that needs it; see _set_wikipedia_language
+wikipedia = None
+
+# Language the wikipedia module is currently set to
+_wikipedia_lang = None
+_wikipedia_lock = threading.Lock()
+
+UPSTREAM_SECONDS = METRICS.histogram(
+    'assistant_wikipedia_upstream_seconds',
+    'Wikipedia API calls by call and outcome (ok or the exception class)',
+    ['call', 'outcome'])
 
 class CommandProcessor:
-    def __init__(self, tts_handler):
+    def __init__(self, tts_handler, wiki_cache=None, local_wiki=None):
         """
         Initialize the command processor
         
         Args:
             tts_handler: TTS handler instance for speaking responses
+            wiki_cache: Optional WikiCache; defaults to the shared on-disk cache
+            local_wiki: Optional LocalWikiIndex; defaults to Config.WIKIPEDIA_LOCAL_INDEX
         """
         self.tts = tts_handler
         
-        # Command patterns and their handlers
-        self.command_patterns = {
-            'time': [r'what time is it', r'tell me the time', r'current time', r'time'],
-            'date': [r'what date is it', r'tell me the date', r'current date', r'date', r'what day is it'],
-            'wikipedia': [r'search wikipedia for (.+)', r'wikipedia (.+)', r'look up (.+)', r'tell me about (.+)'],
-            'web': [r'open (.+)', r'go to (.+)', r'browse (.+)', r'visit (.+)'],
-            'greeting': [r'hello', r'hi', r'hey', r'good morning', r'good afternoon', r'good evening'],
-            'help': [r'help', r'what can you do', r'commands', r'assistance'],
-            'weather': [r'weather', r'temperature', r'forecast'],
-        }
+        if local_wiki is None and Config.WIKIPEDIA_LOCAL_INDEX:
+            try:
+                from voice_assistant.local_wiki import LocalWikiIndex
+                local_wiki = LocalWikiIndex(Config.WIKIPEDIA_LOCAL_INDEX)
+            except Exception as e:
+                print(f"Local Wikipedia index unavailable: {e}")
+        self.local_wiki = local_wiki
+        
+        if wiki_cache is None:
+            wiki_cache = WikiCache(
+                Config.WIKIPEDIA_CACHE_PATH,
+                memory_size=Config.WIKIPEDIA_CACHE_MEMORY_SIZE,
+                disk_size=Config.WIKIPEDIA_CACHE_DISK_SIZE,
+                ttl=Config.WIKIPEDIA_CACHE_TTL,
+                negative_ttl=Config.WIKIPEDIA_CACHE_NEGATIVE_TTL
+            )
+        self.wiki_cache = wiki_cache
+        
+        # Identical concurrent lookups share one upstream fetch
+        self.single_flight = SingleFlight()
+        
+        self.wiki_resolution_stats = Counter()
+        self._wiki_stats_lock = threading.Lock()
+        
+        # Caps how many blocking commands of each intent run or wait at once
+        self.admission = AdmissionControl(
+            Config.INTENT_CONCURRENCY if Config.ADMISSION_CONTROL else {},
+            max_queue=Config.INTENT_QUEUE_DEPTH,
+            max_wait=Config.INTENT_QUEUE_TIMEOUT
+        )
+        
+        # Worker pools are created on first use (see _pool)
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+        
+        # Intents, their patterns and handlers, in match priority order.
+        # Blocking intents wait on the network or the OS and run off the event loop.
+        self.registry = IntentRegistry()
+        self.register_intent('time', [r'what time is it', r'tell me the time', r'current time', r'time'],
+                             lambda match, command: self._get_time())
+        self.register_intent('date', [r'what date is it', r'tell me the date', r'current date', r'date', r'what day is it'],
+                             lambda match, command: self._get_date())
+        self.register_intent('wikipedia', [r'search wikipedia for (.+)', r'wikipedia (.+)', r'look up (.+)', r'tell me about (.+)'],
+                             self._handle_wikipedia, blocking=True)
+        self.register_intent('web', [r'open (.+)', r'go to (.+)', r'browse (.+)', r'visit (.+)'],
+                             self._handle_web, blocking=True)
+        self.register_intent('greeting', [r'hello', r'hi', r'hey', r'good morning', r'good afternoon', r'good evening'],
+                             lambda match, command: self._handle_greeting())
+        self.register_intent('help', [r'help', r'what can you do', r'commands', r'assistance'],
+                             lambda match, command: self._get_help())
+        self.register_intent('weather', [r'weather', r'temperature', r'forecast'],
+                             lambda match, command: "I don't have access to weather data yet, but I can help you with time, Wikipedia searches, and opening websites.")
+        
+        # Compile every pattern once up front rather than on the first command
+        self.registry.matcher
+    
+    def register_intent(self, name, patterns, handler, blocking=False):
+        """
+        Register a new intent (or replace an existing one)
+        
+        Args:
+            name: Intent name
+            patterns: List of regex patterns; capture groups are passed on in the match
+            handler: Callable(match, command) returning the response string
+            blocking: True if the handler waits on the network or the OS
+        """
+        self.registry.register(name, patterns, handler, blocking)
+    
+    @property
+    def command_patterns(self):
+        """Ordered dict of intent name -> patterns"""
+        return self.registry.patterns
     
     def process_command(self, command):
         """
         Process a voice command and return appropriate response
         
+        Synchronous counterpart of process_command_async: local intents
+        are answered directly, blocking ones take the same timeout-bounded
+        path through the command pool.
+        
+        Blocking intents are admitted through self.admission on the pool
+        thread that runs them, so a slow backend can only have
+        Config.INTENT_CONCURRENCY handlers in flight (plus a short queue),
+        even after callers have timed out, and local intents keep answering.
+        
         Args:
             command: Voice command string to process
             
         Returns:
             Response string to be spoken
+            
+        Raises:
+            Overloaded: If the command's intent is at its limit and its queue is full or too slow
+        """
+        response, job = self._answer_inline(command)
+        if job is None:
+            return response
+        return self._run_sync(self._run_blocking(*job), "process_command")
+    
+    async def process_command_async(self, command):
+        """
+        Process a voice command without blocking the event loop
+        
+        Local intents are answered inline. Blocking intents run on the
+        command pool and are bounded by their Config.COMMAND_TIMEOUTS entry;
+        when the timeout expires a fallback message is returned instead.
+        
+        Args:
+            command: Voice command string to process
+            
+        Blocking intents are admitted through self.admission, as in
+        process_command.
+        
+        Returns:
+            Response string to be spoken
+            
+        Raises:
+            Overloaded: If the command's intent is at its limit and its queue is full or too slow
+        """
+        response, job = self._answer_inline(command)
+        if job is None:
+            return response
+        return await self._run_blocking(*job)
+    
+    def process_batch(self, commands):
+        """
+        Process many commands and return their responses in input order
+        
+        Synchronous wrapper around process_batch_async.
+        
+        Args:
+            commands: List of command strings
+            
+        Returns:
+            List of response strings
+        """
+        return self._run_sync(self.process_batch_async(commands), "process_batch")
+    
+    async def process_batch_async(self, commands):
+        """
+        Process many commands concurrently
+        
+        Every command is matched up front. Local intents (time, date,
+        greeting, help, ...) are answered inline; blocking intents are
+        grouped by intent and run concurrently, at most
+        Config.BATCH_CONCURRENCY at a time and no more per intent than
+        its admission limit, so each one's timeout only starts once it is
+        actually running. Every blocking command is admitted through
+        self.admission like any other request; a refused one is answered
+        with BUSY_MESSAGE.
+        
+        Args:
+            commands: List of command strings
+            
+        Returns:
+            List of response strings in the same order as commands
+        """
+        import asyncio
+        
+        results = [None] * len(commands)
+        groups = {}
+        
+        for i, command in enumerate(commands):
+            response, job = self._answer_inline(command)
+            if job is None:
+                results[i] = response
+            else:
+                groups.setdefault(job[0], []).append((i, job))
+        
+        semaphore = asyncio.Semaphore(Config.BATCH_CONCURRENCY)
+        # A batch doesn't queue more of an intent than admission would let run
+        per_intent = {
+            name: asyncio.Semaphore(min(Config.BATCH_CONCURRENCY, self.admission.limit(name) or Config.BATCH_CONCURRENCY))
+            for name in groups
+        }
+        
+        async def run(i, job):
+            async with semaphore, per_intent[job[0]]:
+                try:
+                    results[i] = await self._run_blocking(*job)
+                except Overloaded:
+                    results[i] = BUSY_MESSAGE
+        
+        await asyncio.gather(*(run(i, job) for jobs in groups.values() for i, job in jobs))
+        return results
+    
+    @staticmethod
+    def _run_sync(coroutine, name):
+        """Run a coroutine to completion from synchronous code"""
+        import asyncio
+        
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        coroutine.close()
+        raise RuntimeError(f"{name}() cannot run inside an event loop; await {name}_async() instead")
+    
+    def _answer_inline(self, command):
+        """
+        Match a command and answer it directly unless its intent blocks
+        
+        Returns:
+            Tuple of (response, None) when answered, or
+            (None, (command_type, match, command)) for a blocking intent
         """
         if not command:
-            return "I didn't hear anything."
+            return "I didn't hear anything.", None
         
         command = command.lower().strip()
         print(f"Processing command: {command}")
         
         try:
-            # Check each command pattern
-            for command_type, patterns in self.command_patterns.items():
-                for pattern in patterns:
-                    match = re.search(pattern, command)
-                    if match:
-                        return self._execute_command(command_type, match, command)
+            # Match all command patterns in a single pass
+            intent, match, _ = self.registry.match(command)
+            if not match:
+                # If no pattern matches, try to be helpful
+                return self._handle_unknown_command(command), None
             
-            # If no pattern matches, try to be helpful
-            return self._handle_unknown_command(command)
+            if not intent.blocking:
+                return self._execute_command(intent.name, match, command), None
             
+            return None, (intent.name, match, command)
+            
+        except Exception as e:
+            print(f"Error processing command: {e}")
+            return "Sorry, I encountered an error processing your command.", None
+    
+    async def _run_blocking(self, command_type, match, command):
+        """
+        Run a blocking intent on the command pool under its timeout
+        
+        The admission slot is taken and released on the pool thread, so a
+        handler that outlives its timeout keeps holding it until it returns.
+        
+        Raises:
+            Overloaded: If the intent refused the command
+        """
+        import asyncio
+        
+        timeout = Config.COMMAND_TIMEOUTS.get(command_type, Config.DEFAULT_COMMAND_TIMEOUT)
+        
+        try:
+            loop = asyncio.get_running_loop()
+            handler = loop.run_in_executor(
+                self._pool('command', Config.COMMAND_WORKERS), self._execute_admitted, command_type, match, command
+            )
+            return await asyncio.wait_for(handler, timeout)
+        except Overloaded:
+            raise
+        except asyncio.TimeoutError:
+            print(f"Command {command_type} timed out after {timeout}s")
+            return f"Sorry, that {command_type} request is taking too long. Please try again in a moment."
         except Exception as e:
             print(f"Error processing command: {e}")
             return "Sorry, I encountered an error processing your command."
     
+    def _pool(self, name, workers):
+        """Return the named worker pool, creating it on first use"""
+        pool = self._pools.get(name)
+        if pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            
+            with self._pools_lock:
+                pool = self._pools.get(name)
+                if pool is None:
+                    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+                    self._pools[name] = pool
+        return pool
+    
+    def _execute_admitted(self, command_type, match, original_command):
+        """Execute a command once self.admission lets its intent run"""
+        with self.admission.admit(command_type):
+            return self._execute_command(command_type, match, original_command)
+    
     def _execute_command(self, command_type, match, original_command):
-        """Execute a specific command type"""
+        """Execute a specific command type through the intent registry"""
+        intent = self.registry.get(command_type)
+        if intent is None:
+            return "I'm not sure how to handle that command."
+        
         try:
-            if command_type == 'time':
-                return self._get_time()
-            
-            elif command_type == 'date':
-                return self._get_date()
-            
-            elif command_type == 'wikipedia':
-                query = match.group(1) if match.groups() else original_command.replace('wikipedia', '').strip()
-                return self._search_wikipedia(query)
-            
-            elif command_type == 'web':
-                website = match.group(1) if match.groups() else original_command.replace('open', '').strip()
-                return self._open_website(website)
-            
-            elif command_type == 'greeting':
-                return self._handle_greeting()
-            
-            elif command_type == 'help':
-                return self._get_help()
-            
-            elif command_type == 'weather':
-                return "I don't have access to weather data yet, but I can help you with time, Wikipedia searches, and opening websites."
-            
-            else:
-                return "I'm not sure how to handle that command."
-                
+            return self.registry.dispatch(intent, match, original_command)
         except Exception as e:
             print(f"Error executing command {command_type}: {e}")
             return f"Sorry, I had trouble with that {command_type} request."
     
+    def _handle_wikipedia(self, match, command):
+        """Handler for the wikipedia intent"""
+        query = match.group(1) if match.groups() else command.replace('wikipedia', '').strip()
+        return self._search_wikipedia(query)
+    
+    def _handle_web(self, match, command):
+        """Handler for the web intent"""
+        website = match.group(1) if match.groups() else command.replace('open', '').strip()
+        return self._open_website(website)
+    
     def _get_time(self):
         """Get current time"""
         try:
@@ -115,45 +359,224 @@ class CommandProcessor:
             return "Sorry, I couldn't get the current date."
     
     def _search_wikipedia(self, query):
-        """Search Wikipedia for information"""
+        """Search Wikipedia for information, serving repeat queries from the cache"""
         if not query or query.strip() == "":
             return "What would you like me to search for on Wikipedia?"
         
-        try:
-            print(f"Searching Wikipedia for: {query}")
-            
-            # Set language to English
-            wikipedia.set_lang("en")
+        lang = Config.WIKIPEDIA_LANGUAGE
+        cached = self.wiki_cache.get(query, lang)
+        if cached is not None:
+            return cached
+        
+        key = "wikipedia:" + WikiCache.make_key(query, lang)
+        return self.single_flight.do(key, self._fetch_wikipedia, query, lang)
+    
+    def warm_wikipedia(self, query):
+        """
+        Fetch a Wikipedia answer into the cache, replacing any cached one
+        
+        Args:
+            query: Search query, as captured by the wikipedia intent
             
+        Returns:
+            Epoch seconds at which the new answer expires, or None if the
+            lookup failed and nothing was cached
+        """
+        lang = Config.WIKIPEDIA_LANGUAGE
+        key = "wikipedia:" + WikiCache.make_key(query, lang)
+        self.single_flight.do(key, self._fetch_wikipedia, query, lang)
+        return self.wiki_cache.expires_at(query, lang)
+    
+    def _fetch_wikipedia(self, query, lang):
+        """Look up a query in the local index or upstream and cache the answer"""
+        if self.local_wiki is not None:
+            response = self._lookup_local_wikipedia(query)
+            if response:
+                self.wiki_cache.set(query, response, lang)
+                return response
+            if Config.WIKIPEDIA_LOCAL_ONLY:
+                return f"I couldn't find information about {query} on Wikipedia."
+        
+        _set_wikipedia_language(lang)
+        _forget_memoized()
+        if Config.WIKIPEDIA_RESOLUTION == "parallel":
+            response, found = self._lookup_wikipedia_parallel(query, lang)
+        else:
+            response, found = self._lookup_wikipedia(query, lang)
+        if found is not None:
+            self.wiki_cache.set(query, response, lang, negative=not found)
+        return response
+    
+    def _lookup_local_wikipedia(self, query):
+        """Summary from the offline index, or None if it has no match"""
+        try:
+            result = self.local_wiki.summary(query, sentences=Config.WIKIPEDIA_SENTENCES)
+        except Exception as e:
+            print(f"Local Wikipedia lookup error: {e}")
+            return None
+        
+        if result:
+            self._record_wikipedia_path('local')
+            return f"According to Wikipedia: {result[1]}"
+        return None
+    
+    def _lookup_wikipedia(self, query, lang):
+        """
+        Fetch a summary from Wikipedia
+        
+        Returns:
+            Tuple of (response, found) where found is True for a summary,
+            False for a definite 'no result' and None for a transient error
+        """
+        sentences = Config.WIKIPEDIA_SENTENCES
+        print(f"Searching Wikipedia for: {query}")
+        _set_wikipedia_language(lang)
+        
+        try:
             # First try direct search
             try:
-                summary = wikipedia.summary(query, sentences=2)
+                summary = _upstream('summary', wikipedia.summary, query, sentences=sentences)
                 if summary:
-                    return f"According to Wikipedia: {summary}"
+                    return f"According to Wikipedia: {summary}", True
             except wikipedia.exceptions.PageError:
                 # If direct search fails, try searching for similar topics
-                search_results = wikipedia.search(query, results=3)
+                search_results = _upstream('search', wikipedia.search, query, results=3)
                 if search_results:
                     # Try the first search result
-                    summary = wikipedia.summary(search_results[0], sentences=2)
-                    return f"According to Wikipedia: {summary}"
+                    summary = _upstream('summary', wikipedia.summary, search_results[0], sentences=sentences)
+                    return f"According to Wikipedia: {summary}", True
             
-            return f"I couldn't find information about {query} on Wikipedia."
+            return f"I couldn't find information about {query} on Wikipedia.", False
                 
         except wikipedia.exceptions.DisambiguationError as e:
             # If there are multiple options, pick the first one
             try:
-                summary = wikipedia.summary(e.options[0], sentences=2)
-                return f"I found multiple results. Here's information about {e.options[0]}: {summary}"
-            except:
-                return f"I found multiple results for {query}. Could you be more specific?"
+                summary = _upstream('summary', wikipedia.summary, e.options[0], sentences=sentences)
+                return f"I found multiple results. Here's information about {e.options[0]}: {summary}", True
+            except (wikipedia.exceptions.PageError, wikipedia.exceptions.DisambiguationError):
+                return f"I found multiple results for {query}. Could you be more specific?", False
+            except Exception as e:
+                print(f"Wikipedia search error: {e}")
+                return f"Sorry, I had trouble searching Wikipedia for {query}.", None
         
         except wikipedia.exceptions.PageError:
-            return f"I couldn't find a Wikipedia page for {query}. Try rephrasing your search."
+            return f"I couldn't find a Wikipedia page for {query}. Try rephrasing your search.", False
         
         except Exception as e:
             print(f"Wikipedia search error: {e}")
-            return f"Sorry, I had trouble searching Wikipedia for {query}."
+            return f"Sorry, I had trouble searching Wikipedia for {query}.", None
+    
+    def _lookup_wikipedia_parallel(self, query, lang):
+        """
+        Fetch a summary by racing the direct lookup against a search
+        
+        The direct summary and the search-then-summary paths run on the
+        worker pool under a total deadline. The first usable answer wins;
+        the other path is cancelled if it has not started and otherwise
+        ignored.
+        
+        Returns:
+            Tuple of (response, found) as for _lookup_wikipedia
+        """
+        from concurrent.futures import FIRST_COMPLETED, wait
+        
+        sentences = Config.WIKIPEDIA_SENTENCES
+        print(f"Searching Wikipedia for: {query}")
+        _set_wikipedia_language(lang)
+        
+        pool = self._pool('wikipedia', Config.WIKIPEDIA_WORKERS)
+        paths = {
+            pool.submit(self._wikipedia_direct_path, query, sentences): 'direct',
+            pool.submit(self._wikipedia_search_path, query, sentences): 'search',
+        }
+        pending = set(paths)
+        fallback = None
+        errors = 0
+        deadline = time.monotonic() + Config.WIKIPEDIA_DEADLINE
+        
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"Wikipedia {paths[future]} lookup error: {e}")
+                        errors += 1
+                        continue
+                    
+                    if result is None:
+                        continue
+                    response, found, winner = result
+                    if found:
+                        self._record_wikipedia_path(winner)
+                        return response, True
+                    fallback = fallback or response
+        finally:
+            for future in pending:
+                future.cancel()
+        
+        if pending:
+            self._record_wikipedia_path('timeout')
+            return f"Sorry, Wikipedia took too long to answer about {query}.", None
+        
+        self._record_wikipedia_path('none')
+        # A path that failed might have found the page, so the miss isn't cached
+        if fallback:
+            return fallback, None if errors else False
+        if errors:
+            return f"Sorry, I had trouble searching Wikipedia for {query}.", None
+        return f"I couldn't find information about {query} on Wikipedia.", False
+    
+    def _wikipedia_direct_path(self, query, sentences):
+        """Summary of the page titled like the query, or None if there is none"""
+        try:
+            summary = _upstream('summary', wikipedia.summary, query, sentences=sentences)
+        except wikipedia.exceptions.PageError:
+            return None
+        except wikipedia.exceptions.DisambiguationError as e:
+            return self._wikipedia_disambiguation(query, e, sentences)
+        
+        if summary:
+            return f"According to Wikipedia: {summary}", True, 'direct'
+        return None
+    
+    def _wikipedia_search_path(self, query, sentences):
+        """Summary of the top search result, or None if the search is empty"""
+        search_results = _upstream('search', wikipedia.search, query, results=3)
+        if not search_results:
+            return None
+        
+        try:
+            summary = _upstream('summary', wikipedia.summary, search_results[0], sentences=sentences)
+        except wikipedia.exceptions.PageError:
+            return None
+        except wikipedia.exceptions.DisambiguationError as e:
+            return self._wikipedia_disambiguation(query, e, sentences)
+        
+        return f"According to Wikipedia: {summary}", True, 'search'
+    
+    def _wikipedia_disambiguation(self, query, error, sentences):
+        """
+        Summary of the first option of a disambiguation page
+        
+        Only a missing or ambiguous option counts as no result; any other
+        error is raised so the lookup isn't cached as 'not found'.
+        """
+        try:
+            summary = _upstream('summary', wikipedia.summary, error.options[0], sentences=sentences)
+        except (wikipedia.exceptions.PageError, wikipedia.exceptions.DisambiguationError):
+            return f"I found multiple results for {query}. Could you be more specific?", False, 'disambiguation'
+        return f"I found multiple results. Here's information about {error.options[0]}: {summary}", True, 'disambiguation'
+    
+    def _record_wikipedia_path(self, path):
+        """Count which resolution path produced the answer"""
+        with self._wiki_stats_lock:
+            self.wiki_resolution_stats[path] += 1
     
     def _open_website(self, website):
         """Open a website in the default browser"""
@@ -196,6 +619,7 @@ class CommandProcessor:
             print(f"Opening website: {url}")
             # Note: webbrowser.open() only works in desktop environments
             # For web interface, we'll return the URL so the frontend can handle it
+            import webbrowser
             webbrowser.open(url)
             
             return f"Opening {website}: {url}"
@@ -237,3 +661,43 @@ class CommandProcessor:
         
         import random
         return random.choice(suggestions)
+
+def _set_wikipedia_language(lang):
+    """Import the wikipedia module on first use and switch its language only when it changes"""
+    global wikipedia, _wikipedia_lang
+    if wikipedia is not None and _wikipedia_lang == lang:
+        return
+    with _wikipedia_lock:
+        if wikipedia is None:
+            import wikipedia as module
+            wikipedia = module
+        if _wikipedia_lang != lang:
+            wikipedia.set_lang(lang)
+            _wikipedia_lang = lang
+
+
+def _forget_memoized():
+    """Drop the wikipedia module's memoized search, suggest and summary results
+
+    The module memoizes them without a bound for the life of the process
+    (only set_lang() clears them), which would keep a WikiCache miss from
+    ever reaching the API and grow memory with every query. WikiCache is
+    the cache, so the memo is cleared before every upstream lookup.
+    """
+    for func in (wikipedia.search, wikipedia.suggest, wikipedia.summary):
+        clear_cache = getattr(func, 'clear_cache', None)
+        if clear_cache is not None:
+            clear_cache()
+
+
+def _upstream(call, func, *args, **kwargs):
+    """Call into the wikipedia module, recording latency and outcome"""
+    start = time.perf_counter()
+    outcome = 'ok'
+    try:
+        return func(*args, **kwargs)
+    except Exception as e:
+        outcome = type(e).__name__
+        raise
+    finally:
+        UPSTREAM_SECONDS.observe(time.perf_counter() - start, call, outcome)
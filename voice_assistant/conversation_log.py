@@ -0,0 +1,275 @@
+"""
+Conversation Log Module
+Append-only, durable JSONL log of conversation messages, written in
+batches by a background thread
+"""
+
+import atexit
+import heapq
+import json
+import os
+import queue
+import threading
+import time
+
+# Marks the end of the queue for the writer thread
+_CLOSE = object()
+
+
+class ConversationLog:
+    def __init__(self, directory, segment_bytes=16 * 1024 * 1024, max_segments=None,
+                 batch_size=256, flush_interval=0.2, queue_size=10000, fsync=True):
+        """
+        Open a log directory and start the writer thread
+
+        Each process appends to its own segment files, named
+        conversations-<start time in ms>-<pid>.jsonl, so several workers can
+        share a directory; a new segment is started once the current one
+        reaches segment_bytes.
+
+        Args:
+            directory: Directory holding the segment files
+            segment_bytes: Size after which the current segment is rotated
+            max_segments: Segments kept in the directory (None keeps all)
+            batch_size: Most records written per batch
+            flush_interval: Seconds the writer waits to fill a batch
+            queue_size: Records buffered before new ones are dropped
+            fsync: Sync each batch to disk before the next one
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._segment = None
+        self._segment_path = None
+        self._lock = threading.Lock()
+        self._stats = {
+            'written': 0,
+            'dropped': 0,
+            'batches': 0,
+            'segments': 0,
+            'write_errors': 0,
+            'last_batch_ms': 0.0,
+        }
+
+        self._writer = threading.Thread(target=self._run, name="conversation-log", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def write(self, record):
+        """
+        Queue a record for the writer thread
+
+        Never blocks: if the writer has fallen queue_size records behind,
+        the record is dropped and counted.
+
+        Args:
+            record: JSON-serializable dict, e.g. a message plus its 'session'
+        """
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self._stats['dropped'] += 1
+
+    def flush(self):
+        """Block until every queued record has been written"""
+        self._queue.join()
+
+    def close(self):
+        """Write what is queued, then stop the writer thread"""
+        if self._writer.is_alive():
+            self._queue.put(_CLOSE)
+            self._writer.join()
+
+    def segments(self):
+        """Return the segment paths in the directory, oldest first"""
+        names = sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith("conversations-") and name.endswith(".jsonl")
+        )
+        return [os.path.join(self.directory, name) for name in names]
+
+    def records(self):
+        """
+        Stream every record in the log in time order
+
+        Each process's segments hold its records in order, so those series
+        are merged by each record's 'time' (then 'id'); a session served by
+        several workers replays in the order it happened. Lines are read one
+        at a time, so memory use does not grow with the log. A line cut
+        short by a crash is skipped.
+        """
+        series = {}
+        for path in self.segments():
+            series.setdefault(_segment_pid(path), []).append(path)
+        streams = [self._read_segments(paths) for paths in series.values()]
+        return heapq.merge(*streams, key=_record_order)
+
+    def _read_segments(self, paths):
+        """Records from paths, read one after another"""
+        for path in paths:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            continue
+            except FileNotFoundError:
+                # Removed by another process's retention since listing
+                continue
+
+    def replay(self, session_id):
+        """Stream one session's records in time order"""
+        for record in self.records():
+            if record.get('session') == session_id:
+                yield record
+
+    def stats(self):
+        """Return writer counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queued'] = self._queue.qsize()
+        stats['segment'] = self._segment_path
+        return stats
+
+    def _run(self):
+        """Writer thread: gather records into batches and append them"""
+        closing = False
+        while not closing:
+            record = self._queue.get()
+            batch = []
+            if record is _CLOSE:
+                closing = True
+            else:
+                batch.append(record)
+
+            # Wait briefly for more records so one write and fsync cover them all
+            deadline = time.monotonic() + self.flush_interval
+            while not closing and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    record = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if record is _CLOSE:
+                    closing = True
+                else:
+                    batch.append(record)
+
+            if batch:
+                self._write_batch(batch)
+            for _ in range(len(batch) + closing):
+                self._queue.task_done()
+
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    def _write_batch(self, batch):
+        start = time.perf_counter()
+        lines = []
+        for record in batch:
+            try:
+                lines.append(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            except (TypeError, ValueError) as e:
+                print(f"Conversation log skipped a record: {e}")
+        data = "".join(lines).encode("utf-8")
+
+        try:
+            if self._segment is None or self._segment.tell() + len(data) > self.segment_bytes:
+                self._rotate()
+            self._segment.write(data)
+            self._segment.flush()
+            if self.fsync:
+                os.fsync(self._segment.fileno())
+        except (OSError, ValueError) as e:
+            # ValueError: the segment was closed by a rotation that failed to open the next one
+            print(f"Conversation log write error: {e}")
+            with self._lock:
+                self._stats['write_errors'] += 1
+            return
+
+        with self._lock:
+            self._stats['written'] += len(lines)
+            self._stats['batches'] += 1
+            self._stats['last_batch_ms'] = round((time.perf_counter() - start) * 1000, 3)
+
+    def _rotate(self):
+        """Close the current segment, start a new one and apply retention"""
+        if self._segment is not None:
+            segment, self._segment, self._segment_path = self._segment, None, None
+            segment.close()
+
+        name = f"conversations-{int(time.time() * 1000):013d}-{os.getpid()}.jsonl"
+        self._segment_path = os.path.join(self.directory, name)
+        self._segment = open(self._segment_path, "ab")
+        with self._lock:
+            self._stats['segments'] += 1
+
+        if self.max_segments:
+            self._apply_retention()
+
+    def _apply_retention(self):
+        """
+        Delete the oldest segments beyond max_segments that nobody writes to
+
+        Each running process writes to its newest segment, so that one is
+        kept until the process has exited; deleting it would send the
+        process's records to an unlinked file.
+        """
+        paths = self.segments()
+        newest = {}
+        for path in paths:
+            newest[_segment_pid(path)] = path
+        active = {path for pid, path in newest.items() if pid == os.getpid() or _alive(pid)}
+
+        excess = len(paths) - self.max_segments
+        for path in paths:
+            if excess <= 0:
+                break
+            if path in active:
+                continue
+            try:
+                os.remove(path)
+                excess -= 1
+            except FileNotFoundError:
+                # Another process's retention got there first
+                excess -= 1
+            except OSError:
+                pass
+
+
+def _record_order(record):
+    time_ = record.get('time') if isinstance(record, dict) else None
+    id_ = record.get('id') if isinstance(record, dict) else None
+    return (time_ if isinstance(time_, (int, float)) else 0, id_ if isinstance(id_, int) else 0)
+
+
+def _segment_pid(path):
+    """pid of the process that wrote a conversations-<ms>-<pid>.jsonl segment"""
+    try:
+        return int(os.path.basename(path)[:-len(".jsonl")].rsplit("-", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def _alive(pid):
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
@@ -0,0 +1,366 @@
+"""
+Conversation Store Module
+Thread-safe, bounded per-session conversation history, kept in memory
+or in a SQLite file shared by several worker processes
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Rough per-message overhead (dict, timestamps, id) on top of the text itself
+_MESSAGE_OVERHEAD = 200
+
+
+def _message_size(message):
+    return _MESSAGE_OVERHEAD + sum(len(v) for v in message.values() if isinstance(v, str))
+
+
+class _Session:
+    def __init__(self, max_messages):
+        self.messages = deque(maxlen=max_messages)
+        self.bytes = 0
+        self.last_access = time.monotonic()
+
+
+class ConversationStore:
+    def __init__(self, max_messages=200, max_sessions=10000, session_ttl=3600, max_bytes=64 * 1024 * 1024):
+        """
+        Initialize an empty store
+
+        Args:
+            max_messages: Messages kept per session (oldest dropped first)
+            max_sessions: Sessions kept before the least recently used is evicted
+            session_ttl: Seconds of inactivity after which a session is evicted
+            max_bytes: Approximate memory budget across all sessions
+        """
+        self.max_messages = max_messages
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.max_bytes = max_bytes
+
+        self._sessions = OrderedDict()
+        self._bytes = 0
+        # Message ids increase across the whole store, so a cleared and
+        # restarted session never reuses an id a client has already seen
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._stats = {
+            'trimmed_messages': 0,
+            'expired_sessions': 0,
+            'lru_evictions': 0,
+            'memory_evictions': 0,
+        }
+
+    def append(self, session_id, message):
+        """
+        Add a message to a session, creating the session if needed
+
+        Args:
+            session_id: Client session identifier
+            message: Dict with at least 'type', 'message' and 'timestamp'
+
+        Returns:
+            The stored message, with its increasing 'id' added
+        """
+        with self._lock:
+            now = time.monotonic()
+            session = self._touch(session_id, now)
+
+            message = dict(message, id=self._next_id)
+            self._next_id += 1
+
+            if len(session.messages) == session.messages.maxlen:
+                dropped = session.messages.popleft()
+                self._release(session, _message_size(dropped))
+                self._stats['trimmed_messages'] += 1
+
+            size = _message_size(message)
+            session.messages.append(message)
+            session.bytes += size
+            self._bytes += size
+
+            self._evict(now, keep=session_id)
+            return message
+
+    def get(self, session_id):
+        """Return a copy of a session's messages, oldest first"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            self._touch(session_id, time.monotonic())
+            return list(session.messages)
+
+    def page(self, session_id, after=0, limit=100):
+        """
+        Return the messages newer than a cursor
+
+        Only the new tail of the ring buffer is walked, so polling costs
+        O(new messages) rather than O(history).
+
+        Args:
+            session_id: Client session identifier
+            after: Id of the last message the client already has
+            limit: Maximum number of messages to return
+
+        Returns:
+            Tuple of (messages, has_more, last_id) where last_id is the id
+            of the session's newest message (0 if it has none)
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or not session.messages:
+                return [], False, 0
+            self._touch(session_id, time.monotonic())
+
+            newer = []
+            for message in reversed(session.messages):
+                if message['id'] <= after:
+                    break
+                newer.append(message)
+            newer.reverse()
+            return newer[:limit], len(newer) > limit, session.messages[-1]['id']
+
+    def clear(self, session_id):
+        """Forget a session's history"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self._bytes -= session.bytes
+
+    def stats(self):
+        """Return current size and eviction counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['sessions'] = len(self._sessions)
+            stats['messages'] = sum(len(s.messages) for s in self._sessions.values())
+            stats['bytes'] = self._bytes
+        return stats
+
+    def _touch(self, session_id, now):
+        """Return the session, creating it, and mark it most recently used"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _Session(self.max_messages)
+        else:
+            self._sessions.move_to_end(session_id)
+        session.last_access = now
+        return session
+
+    def _release(self, session, size):
+        session.bytes -= size
+        self._bytes -= size
+
+    def _evict(self, now, keep):
+        """Drop idle sessions, then least recently used ones over the limits"""
+        # Sessions are ordered by last access, so expired ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session_id == keep or now - session.last_access < self.session_ttl:
+                break
+            self._drop(session_id, 'expired_sessions')
+
+        while len(self._sessions) > self.max_sessions:
+            self._drop(next(iter(self._sessions)), 'lru_evictions')
+
+        while self._bytes > self.max_bytes and len(self._sessions) > 1:
+            self._drop(next(iter(self._sessions)), 'memory_evictions')
+
+    def _drop(self, session_id, reason):
+        session = self._sessions.pop(session_id)
+        self._bytes -= session.bytes
+        self._stats[reason] += 1
+
+
+class SQLiteConversationStore:
+    # Appends between sweeps for expired and excess sessions
+    SWEEP_INTERVAL = 100
+    # Seconds a read may leave last_access stale, so polling doesn't write on every request
+    TOUCH_INTERVAL = 60
+
+    def __init__(self, path, max_messages=200, max_sessions=10000, session_ttl=3600):
+        """
+        Initialize a store kept in a SQLite file
+
+        Same interface as ConversationStore, but every worker process that
+        opens the same file sees the same sessions, so requests of one
+        browser session may land on any worker. Message ids come from the
+        table's AUTOINCREMENT key and so increase across all processes.
+
+        Args:
+            path: SQLite database file
+            max_messages: Messages kept per session (oldest dropped first)
+            max_sessions: Sessions kept before the least recently used is evicted
+            session_ttl: Seconds of inactivity after which a session is evicted
+        """
+        self.path = path
+        self.max_messages = max_messages
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+
+        self._db = self._open(path)
+        self._lock = threading.Lock()
+        self._appends = 0
+        self._stats = {
+            'trimmed_messages': 0,
+            'expired_sessions': 0,
+            'lru_evictions': 0,
+        }
+
+    @staticmethod
+    def _open(path):
+        """Open (and create if needed) the SQLite history file"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        db = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " session_id TEXT NOT NULL,"
+            " data TEXT NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id)")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY,"
+            " last_access REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access)")
+        return db
+
+    def append(self, session_id, message):
+        """
+        Add a message to a session, creating the session if needed
+
+        Returns:
+            The stored message, with its increasing 'id' added
+        """
+        data = json.dumps({k: v for k, v in message.items() if k != 'id'})
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                message_id = self._db.execute(
+                    "INSERT INTO messages (session_id, data) VALUES (?, ?)", (session_id, data)
+                ).lastrowid
+                self._touch(session_id)
+                trimmed = self._db.execute(
+                    "DELETE FROM messages WHERE session_id = ? AND id <= ("
+                    " SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (session_id, session_id, self.max_messages),
+                ).rowcount
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+            self._stats['trimmed_messages'] += trimmed
+            self._appends += 1
+            if self._appends % self.SWEEP_INTERVAL == 0:
+                self._evict(keep=session_id)
+
+        return dict(message, id=message_id)
+
+    def get(self, session_id):
+        """Return a copy of a session's messages, oldest first"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, data FROM messages WHERE session_id = ? ORDER BY id", (session_id,)
+            ).fetchall()
+            if rows:
+                self._refresh(session_id)
+        return [dict(json.loads(data), id=message_id) for message_id, data in rows]
+
+    def page(self, session_id, after=0, limit=100):
+        """
+        Return the messages newer than a cursor
+
+        Returns:
+            Tuple of (messages, has_more, last_id) where last_id is the id
+            of the session's newest message (0 if it has none)
+        """
+        with self._lock:
+            last_id = self._db.execute(
+                "SELECT MAX(id) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            if last_id is None:
+                return [], False, 0
+            rows = self._db.execute(
+                "SELECT id, data FROM messages WHERE session_id = ? AND id > ? ORDER BY id LIMIT ?",
+                (session_id, after, limit + 1),
+            ).fetchall()
+            self._refresh(session_id)
+
+        messages = [dict(json.loads(data), id=message_id) for message_id, data in rows[:limit]]
+        return messages, len(rows) > limit, last_id
+
+    def clear(self, session_id):
+        """Forget a session's history"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._drop([(session_id,)])
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def stats(self):
+        """Return current size and this process's eviction counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['sessions'] = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            stats['messages'] = self._db.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+            page_count = self._db.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._db.execute("PRAGMA page_size").fetchone()[0]
+            stats['bytes'] = page_count * page_size
+        return stats
+
+    def _touch(self, session_id):
+        """Mark a session most recently used"""
+        self._db.execute(
+            "INSERT INTO sessions (session_id, last_access) VALUES (?, ?)"
+            " ON CONFLICT (session_id) DO UPDATE SET last_access = excluded.last_access",
+            (session_id, time.time()),
+        )
+
+    def _refresh(self, session_id):
+        """Mark a session used by a read, writing only once TOUCH_INTERVAL has passed"""
+        row = self._db.execute("SELECT last_access FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None or time.time() - row[0] >= self.TOUCH_INTERVAL:
+            self._touch(session_id)
+
+    def _evict(self, keep):
+        """Drop idle sessions, then least recently used ones over the limit"""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            expired = self._db.execute(
+                "SELECT session_id FROM sessions WHERE last_access < ? AND session_id != ?",
+                (time.time() - self.session_ttl, keep),
+            ).fetchall()
+            self._drop(expired)
+
+            count = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            excess = self._db.execute(
+                "SELECT session_id FROM sessions WHERE session_id != ? ORDER BY last_access LIMIT ?",
+                (keep, max(0, count - self.max_sessions)),
+            ).fetchall()
+            self._drop(excess)
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+        self._stats['expired_sessions'] += len(expired)
+        self._stats['lru_evictions'] += len(excess)
+
+    def _drop(self, session_ids):
+        self._db.executemany("DELETE FROM messages WHERE session_id = ?", session_ids)
+        self._db.executemany("DELETE FROM sessions WHERE session_id = ?", session_ids)
@@ -0,0 +1,132 @@
+"""
+Intent Matcher Module
+Compiles command patterns once and matches them in a single pass
+"""
+
+import re
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+_WORD = re.compile(r'\w+')
+
+
+def _literal_prefix(pattern):
+    """
+    Leading literal word of a pattern, e.g. 'search' in r'search wikipedia for (.+)'
+
+    Only a word every match must start with counts, so it comes from the
+    parsed pattern: 'play music|start the playlist' has none, and neither
+    does 'hi ?there', whose first word may run on into 'hithere'.
+
+    Returns:
+        The word, or None if the pattern has no required leading word
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+
+    word = ''
+    for op, value in parsed:
+        if op is sre_parse.LITERAL and re.match(r'\w', chr(value)):
+            word += chr(value)
+            continue
+        # The word must end where a non-word character is required
+        ended = (op is sre_parse.LITERAL
+                 or (op is sre_parse.AT and value in (sre_parse.AT_BOUNDARY, sre_parse.AT_END)))
+        return _fold(word, parsed) if word and ended else None
+    return _fold(word, parsed) or None
+
+
+def _fold(word, parsed):
+    # Commands are lowercased, so (?i) patterns are filed under the lowercase word
+    return word.lower() if parsed.state.flags & re.IGNORECASE else word
+
+
+class IntentMatcher:
+    def __init__(self, command_patterns):
+        """
+        Compile the command patterns and index them by their first word
+
+        Patterns are anchored on word boundaries, so e.g. 'hi' no longer
+        matches inside 'this'. Each pattern is filed under its leading
+        literal word; patterns without one are tried at every word.
+
+        Args:
+            command_patterns: Ordered dict of intent name -> list of regex patterns
+        """
+        self._entries = []
+        self._by_word = {}
+        fallback = []
+
+        for priority, (command_type, patterns) in enumerate(command_patterns.items()):
+            for pattern in patterns:
+                index = len(self._entries)
+                compiled = re.compile(self._add_word_boundaries(pattern))
+                self._entries.append((command_type, priority, compiled))
+
+                prefix = _literal_prefix(pattern)
+                if prefix:
+                    self._by_word.setdefault(prefix, []).append(index)
+                else:
+                    fallback.append(index)
+
+        # Candidates at a word keep registration order, as the old loop did
+        for word, indices in self._by_word.items():
+            self._by_word[word] = [self._entries[i] for i in sorted(indices + fallback)]
+        self._fallback = [self._entries[i] for i in fallback]
+
+    @staticmethod
+    def _add_word_boundaries(pattern):
+        """Anchor a pattern on word boundaries where it starts/ends with a word character"""
+        bounded = f"(?:{pattern})"
+        if re.match(r"\w", pattern):
+            bounded = r"\b" + bounded
+        if re.search(r"\w$", pattern):
+            bounded = bounded + r"\b"
+        return bounded
+
+    def match(self, command):
+        """
+        Find the highest priority intent in a command
+
+        Words are scanned left to right once. At each word the first
+        candidate pattern that matches claims the text it covers, and among
+        those non-overlapping hits the intent registered first wins. A
+        keyword inside a captured argument ('search wikipedia for time
+        travel') therefore never shadows the command that captured it.
+
+        Args:
+            command: Normalized (lowercased, stripped) command string
+
+        Returns:
+            Tuple of (command_type, match) or (None, None) if nothing matched
+        """
+        best = None
+        next_free = 0
+
+        for word in _WORD.finditer(command):
+            start = word.start()
+            if start < next_free:
+                continue
+
+            for command_type, priority, pattern in self._by_word.get(word.group(), self._fallback):
+                match = pattern.match(command, start)
+                if match:
+                    next_free = match.end()
+                    if best is None or priority < best[1]:
+                        best = (command_type, priority, match)
+                    break
+
+            if best is not None and best[1] == 0:
+                break
+
+        if best is None:
+            return None, None
+        return best[0], best[2]
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,158 @@
+"""
+Intent Registry Module
+Maps intent names to their patterns and handlers and tracks their cost
+"""
+
+import threading
+import time
+from collections import deque
+from voice_assistant.intent_matcher import IntentMatcher
+from voice_assistant.metrics import METRICS
+
+# Latency samples kept per intent for percentile estimates
+SAMPLE_SIZE = 1024
+
+MATCH_SECONDS = METRICS.histogram(
+    'assistant_intent_match_seconds', 'Time to match a command to an intent', ['intent'])
+HANDLER_SECONDS = METRICS.histogram(
+    'assistant_intent_handler_seconds', 'Time spent in intent handlers', ['intent', 'outcome'])
+
+
+def _percentiles(samples):
+    """Return p50/p95/p99 in milliseconds for a list of durations in seconds"""
+    if not samples:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        name: round(ordered[min(last, int(q * len(ordered)))] * 1000, 3)
+        for name, q in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))
+    }
+
+
+class Intent:
+    def __init__(self, name, patterns, handler, blocking=False):
+        """
+        A registered intent
+
+        Args:
+            name: Intent name, e.g. 'time'
+            patterns: List of regex patterns that select this intent
+            handler: Callable(match, command) returning the response string
+            blocking: True if the handler waits on the network or the OS
+        """
+        self.name = name
+        self.patterns = list(patterns)
+        self.handler = handler
+        self.blocking = blocking
+
+        self.calls = 0
+        self.errors = 0
+        self.match_times = deque(maxlen=SAMPLE_SIZE)
+        self.handler_times = deque(maxlen=SAMPLE_SIZE)
+
+
+class IntentRegistry:
+    def __init__(self):
+        """Initialize an empty registry"""
+        self._intents = {}
+        self._matcher = None
+        self._lock = threading.Lock()
+        # Match cost of commands that no intent claimed
+        self._unmatched = Intent('unknown', [], None)
+
+    def register(self, name, patterns, handler, blocking=False):
+        """
+        Register (or replace) an intent
+
+        Intents match in registration order: when several match the same
+        command, the one registered first wins.
+
+        Args:
+            name: Intent name
+            patterns: List of regex patterns
+            handler: Callable(match, command) returning the response string
+            blocking: True to run the handler off the event loop
+        """
+        with self._lock:
+            self._intents[name] = Intent(name, patterns, handler, blocking)
+            self._matcher = None
+
+    def get(self, name):
+        """Return the Intent registered under name, or None"""
+        return self._intents.get(name)
+
+    @property
+    def patterns(self):
+        """Ordered dict of intent name -> patterns"""
+        return {name: intent.patterns for name, intent in self._intents.items()}
+
+    @property
+    def matcher(self):
+        """IntentMatcher over every registered pattern, rebuilt after changes"""
+        matcher = self._matcher
+        if matcher is None:
+            # Built under the lock so a concurrent register() can't be lost
+            with self._lock:
+                if self._matcher is None:
+                    self._matcher = IntentMatcher(self.patterns)
+                matcher = self._matcher
+        return matcher
+
+    def match(self, command):
+        """
+        Match a command against every intent
+
+        Returns:
+            Tuple of (Intent, match, seconds spent matching);
+            Intent and match are None when nothing matched
+        """
+        start = time.perf_counter()
+        name, match = self.matcher.match(command)
+        elapsed = time.perf_counter() - start
+
+        if not match:
+            self._unmatched.match_times.append(elapsed)
+            MATCH_SECONDS.observe(elapsed, 'unknown')
+            with self._lock:
+                self._unmatched.calls += 1
+            return None, None, elapsed
+
+        intent = self._intents[name]
+        intent.match_times.append(elapsed)
+        MATCH_SECONDS.observe(elapsed, name)
+        return intent, match, elapsed
+
+    def dispatch(self, intent, match, command):
+        """
+        Run an intent's handler and record its latency
+
+        Exceptions propagate to the caller after being counted.
+        """
+        start = time.perf_counter()
+        outcome = 'ok'
+        try:
+            return intent.handler(match, command)
+        except Exception:
+            outcome = 'error'
+            with self._lock:
+                intent.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            intent.handler_times.append(elapsed)
+            HANDLER_SECONDS.observe(elapsed, intent.name, outcome)
+            with self._lock:
+                intent.calls += 1
+
+    def stats(self):
+        """Return call counts and match/handler latency percentiles per intent"""
+        stats = {}
+        for intent in list(self._intents.values()) + [self._unmatched]:
+            stats[intent.name] = {
+                'calls': intent.calls,
+                'errors': intent.errors,
+                'match_ms': _percentiles(list(intent.match_times)),
+                'handler_ms': _percentiles(list(intent.handler_times)),
+            }
+        return stats
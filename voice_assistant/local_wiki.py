@@ -0,0 +1,299 @@
+"""
+Local Wikipedia Module
+Offline title -> abstract index backed by SQLite FTS5
+"""
+
+import difflib
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+
+# Split after sentence punctuation followed by whitespace and a capital/digit
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=["\'(\[]?[A-Z0-9])')
+# Words ending in a period that don't end a sentence ("Mr. Smith", "e.g. Paris")
+_ABBREVIATIONS = {
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'rev', 'st', 'mt', 'ft', 'jr', 'sr', 'gen', 'col', 'lt', 'capt', 'sgt',
+    'gov', 'sen', 'rep', 'vs', 'no', 'vol', 'fig', 'approx', 'ca', 'cf', 'e.g', 'i.e',
+}
+_INITIALS = re.compile(r'(?:[A-Za-z]\.)+')  # "J." in "J. R. R. Tolkien", "U.S."
+_TOKEN = re.compile(r'\w+')
+
+
+class LocalWikiIndex:
+    PREFIX_CANDIDATES = 50  # Titles considered for a prefix match
+    FUZZY_CANDIDATES = 50  # Titles re-ranked for a fuzzy match
+    FUZZY_CUTOFF = 0.6  # Minimum similarity for a fuzzy match
+
+    def __init__(self, path):
+        """
+        Open an index built by LocalWikiIndex.build
+
+        Args:
+            path: SQLite index file
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Local Wikipedia index not found: {path}")
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        """Return this thread's read-only connection"""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.db = db
+        return db
+
+    def find(self, query):
+        """
+        Find the best matching page for a query
+
+        Tries, in order: exact title, case-insensitive title, shortest title
+        starting with the query, then a token search over titles re-ranked
+        by similarity to the query (ignoring word order).
+
+        Args:
+            query: Topic as spoken by the user
+
+        Returns:
+            Tuple of (title, abstract) or None
+        """
+        query = ' '.join(query.split())
+        if not query:
+            return None
+
+        db = self._connection()
+        lowered = query.lower()
+
+        row = db.execute("SELECT title, abstract FROM pages WHERE title = ? LIMIT 1", (query,)).fetchone()
+        if row:
+            return row
+
+        row = db.execute(
+            "SELECT title, abstract FROM pages WHERE title_lower = ? LIMIT 1", (lowered,)
+        ).fetchone()
+        if row:
+            return row
+
+        # Shortest of the first few titles starting with the query
+        rows = db.execute(
+            "SELECT title, abstract FROM pages WHERE title_lower > ? AND title_lower < ? "
+            "ORDER BY title_lower LIMIT ?",
+            (lowered, lowered + '\uffff', self.PREFIX_CANDIDATES),
+        ).fetchall()
+        if rows:
+            return min(rows, key=lambda row: len(row[0]))
+
+        return self._fuzzy(db, lowered)
+
+    def _fuzzy(self, db, lowered):
+        """Titles containing every query token (as a prefix), re-ranked by similarity"""
+        tokens = _TOKEN.findall(lowered)
+        if not tokens:
+            return None
+
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        rows = db.execute(
+            "SELECT p.title, p.abstract, p.title_lower FROM pages_fts "
+            "JOIN pages p ON p.id = pages_fts.rowid "
+            "WHERE pages_fts MATCH ? LIMIT ?",
+            (match, self.FUZZY_CANDIDATES),
+        ).fetchall()
+
+        sorted_query = ' '.join(sorted(tokens))
+        best, best_score = None, self.FUZZY_CUTOFF
+        for title, abstract, title_lower in rows:
+            # Compare both as written and with word order ignored
+            sorted_title = ' '.join(sorted(_TOKEN.findall(title_lower)))
+            score = max(
+                difflib.SequenceMatcher(None, lowered, title_lower).ratio(),
+                difflib.SequenceMatcher(None, sorted_query, sorted_title).ratio(),
+            )
+            if score > best_score:
+                best, best_score = (title, abstract), score
+        return best
+
+    def summary(self, query, sentences=2):
+        """
+        Return the first sentences of the best matching abstract
+
+        Mirrors wikipedia.summary(query, sentences=N) for the local index.
+
+        Args:
+            query: Topic as spoken by the user
+            sentences: Number of sentences to return (0 for the whole abstract)
+
+        Returns:
+            Tuple of (title, summary) or None if nothing matched
+        """
+        page = self.find(query)
+        if not page:
+            return None
+
+        title, abstract = page
+        if sentences:
+            abstract = ' '.join(split_sentences(abstract.strip())[:sentences])
+        return title, abstract
+
+    def count(self):
+        """Number of pages in the index"""
+        return self._connection().execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    @staticmethod
+    def build(path, records, batch_size=10000, progress=None):
+        """
+        Build an index from (title, abstract) records
+
+        Records are streamed and inserted in batches, so the dump never has
+        to fit in memory. An existing file at path is replaced.
+
+        Args:
+            path: SQLite index file to create
+            records: Iterable of (title, abstract) tuples
+            batch_size: Rows per insert transaction
+            progress: Optional callable receiving the running row count
+
+        Returns:
+            Number of pages indexed
+        """
+        tmp_path = path + '.building'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        db = sqlite3.connect(tmp_path)
+        db.execute("PRAGMA journal_mode=OFF")
+        db.execute("PRAGMA synchronous=OFF")
+        db.execute(
+            "CREATE TABLE pages ("
+            " id INTEGER PRIMARY KEY,"
+            " title TEXT NOT NULL,"
+            " title_lower TEXT NOT NULL,"
+            " abstract TEXT NOT NULL)"
+        )
+
+        total = 0
+        batch = []
+        for title, abstract in records:
+            title = title.strip()
+            abstract = abstract.strip()
+            if not title or not abstract:
+                continue
+            batch.append((title, title.lower(), abstract))
+            if len(batch) >= batch_size:
+                total += LocalWikiIndex._insert(db, batch)
+                batch = []
+                if progress:
+                    progress(total)
+        if batch:
+            total += LocalWikiIndex._insert(db, batch)
+            if progress:
+                progress(total)
+
+        # Indexes are built once at the end, which is much faster than
+        # maintaining them row by row
+        db.execute("CREATE INDEX pages_title ON pages (title)")
+        db.execute("CREATE INDEX pages_title_lower ON pages (title_lower)")
+        db.execute("CREATE VIRTUAL TABLE pages_fts USING fts5(title, content='pages', content_rowid='id')")
+        db.execute("INSERT INTO pages_fts (rowid, title) SELECT id, title FROM pages")
+        db.commit()
+        db.execute("VACUUM")
+        db.close()
+
+        os.replace(tmp_path, path)
+        return total
+
+    @staticmethod
+    def _insert(db, batch):
+        with db:
+            db.executemany("INSERT INTO pages (title, title_lower, abstract) VALUES (?, ?, ?)", batch)
+        return len(batch)
+
+
+def _open_text(path):
+    """Open a plain or gzip-compressed text file"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def iter_tsv(path):
+    """Yield (title, abstract) from a title<TAB>abstract file"""
+    with _open_text(path) as f:
+        for line in f:
+            title, sep, abstract = line.rstrip('\n').partition('\t')
+            if sep:
+                yield title, abstract
+
+
+def iter_jsonl(path):
+    """Yield (title, abstract) from JSON lines with 'title' and 'abstract' (or 'text') keys"""
+    with _open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            abstract = record.get('abstract', record.get('text', ''))
+            yield record.get('title', ''), abstract
+
+
+def split_sentences(text):
+    """Split text into sentences, not breaking after abbreviations or initials"""
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        words = text[start:match.start()].split()
+        word = words[-1].lstrip('"\'([') if words else ''
+        if word.endswith('.') and (word[:-1].lower() in _ABBREVIATIONS or _INITIALS.fullmatch(word)):
+            continue
+        sentences.append(text[start:match.start()])
+        start = match.end()
+    sentences.append(text[start:])
+    return sentences
+
+
+def iter_abstract_xml(path):
+    """Yield (title, abstract) from a Wikipedia abstracts dump (enwiki-*-abstract.xml)"""
+    import xml.etree.ElementTree as ET
+
+    with (gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')) as f:
+        title, abstract = None, ''
+        root = None
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            if root is None:
+                root = elem
+            if event == 'start':
+                continue
+            if elem.tag == 'title':
+                title = elem.text or ''
+                if title.startswith('Wikipedia: '):
+                    title = title[len('Wikipedia: '):]
+            elif elem.tag == 'abstract':
+                abstract = elem.text or ''
+            elif elem.tag == 'doc':
+                if title:
+                    yield title, abstract
+                title, abstract = None, ''
+                # Drop the finished document from the root too, or every
+                # emptied <doc> stays attached and memory grows with the dump
+                root.clear()
+
+
+READERS = {
+    'tsv': iter_tsv,
+    'jsonl': iter_jsonl,
+    'xml': iter_abstract_xml,
+}
+
+
+def detect_format(path):
+    """Guess the dump format from the file name"""
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith('.jsonl') or name.endswith('.json'):
+        return 'jsonl'
+    if name.endswith('.xml'):
+        return 'xml'
+    return 'tsv'
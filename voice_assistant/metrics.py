@@ -0,0 +1,333 @@
+"""
+Metrics Module
+In-process counters, histograms and gauges rendered in the Prometheus
+text format, with snapshot files to aggregate several worker processes
+"""
+
+import abc
+import bisect
+import itertools
+import json
+import os
+import threading
+import time
+import weakref
+
+# Upper bounds (seconds) for latency histograms
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class _ShardHolder:
+    """Owns a thread's shard; it is dropped with the thread's locals when the thread ends"""
+
+    __slots__ = ('shard', '__weakref__')
+
+    def __init__(self):
+        self.shard = {}
+
+
+class _Metric:
+    """Name, help text and label names shared by every kind of metric"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def describe(self):
+        return {'kind': self.kind, 'help': self.documentation, 'labels': list(self.labelnames)}
+
+
+class _ShardedMetric(_Metric, abc.ABC):
+    """
+    Base for metrics recorded without taking a lock
+
+    Every thread writes to its own shard (a dict keyed by label values), so
+    recording is a thread-local lookup plus a dict update. When a thread
+    ends, its shard is folded into a shared total, so servers that start a
+    thread per request don't keep a shard per request. Collection copies
+    and sums the total and the live shards.
+    """
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._local = threading.local()
+        self._shards = {}
+        self._retired = {}  # Totals of the shards of finished threads
+        self._keys = itertools.count()
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            holder = self._local.holder = _ShardHolder()
+            key = next(self._keys)
+            with self._shards_lock:
+                self._shards[key] = holder.shard
+            weakref.finalize(holder, self._retire, key)
+        return holder.shard
+
+    def _retire(self, key):
+        # The thread is gone, so nothing writes to its shard any more
+        with self._shards_lock:
+            shard = self._shards.pop(key, None)
+            if shard:
+                self._fold(self._retired, shard)
+
+    @abc.abstractmethod
+    def _fold(self, totals, shard):
+        """Add shard's values into totals"""
+
+    def _totals(self):
+        with self._shards_lock:
+            totals = {}
+            self._fold(totals, self._retired)
+            shards = list(self._shards.values())
+        for shard in shards:
+            # dict.copy() is atomic, so a shard being written to is copied whole
+            self._fold(totals, shard.copy())
+        return totals
+
+
+class Counter(_ShardedMetric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        """Add amount to the counter for these label values"""
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def _fold(self, totals, shard):
+        for labels, value in shard.items():
+            totals[labels] = totals.get(labels, 0) + value
+
+    def collect(self):
+        """Return {label values: total}"""
+        return self._totals()
+
+
+class Histogram(_ShardedMetric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        """Record one observation for these label values"""
+        shard = self._shard()
+        entry = shard.get(labels)
+        if entry is None:
+            # Per-bucket counts (not cumulative), then +Inf, sum and count
+            entry = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        entry[bisect.bisect_left(self.buckets, value)] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+    def _fold(self, totals, shard):
+        for labels, entry in shard.items():
+            total = totals.get(labels)
+            if total is None:
+                totals[labels] = list(entry)
+            else:
+                for i, value in enumerate(entry):
+                    total[i] += value
+
+    def collect(self):
+        """Return {label values: [per-bucket counts..., +Inf count, sum, count]}"""
+        return self._totals()
+
+    def describe(self):
+        return dict(super().describe(), buckets=list(self.buckets))
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, callback, mode='sum'):
+        """
+        A value read when metrics are collected
+
+        Args:
+            callback: Callable returning the current value
+            mode: How values from several workers combine, 'sum' or 'max'
+        """
+        super().__init__(name, documentation)
+        self.callback = callback
+        self.mode = mode
+
+    def collect(self):
+        try:
+            return {(): self.callback()}
+        except Exception as e:
+            print(f"Metric {self.name} unavailable: {e}")
+            return {}
+
+    def describe(self):
+        return dict(super().describe(), mode=self.mode)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """Initialize an empty registry"""
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._directory = None
+        self._snapshotter = None
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None and type(existing) is type(metric) and not isinstance(metric, Gauge):
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        """Return the counter registered under name, creating it if needed"""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        """Return the histogram registered under name, creating it if needed"""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, callback, mode='sum'):
+        """Register (or replace) a gauge whose value is read from callback"""
+        return self._register(Gauge(name, documentation, callback, mode))
+
+    def snapshot(self):
+        """Return this process's metrics as a JSON-serializable dict"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            'pid': os.getpid(),
+            'metrics': {
+                metric.name: dict(metric.describe(), values=[
+                    [list(labels), value] for labels, value in metric.collect().items()
+                ])
+                for metric in metrics
+            },
+        }
+
+    def share(self, directory, interval=5.0):
+        """
+        Aggregate metrics with the other processes using directory
+
+        Each process writes its snapshot to <directory>/<pid>.json every
+        interval seconds and whenever it renders, and render() merges every
+        snapshot in the directory. Counters and histograms of exited
+        processes keep counting; their gauges are dropped.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        if self._snapshotter is None:
+            self._snapshotter = threading.Thread(
+                target=self._write_periodically, args=(interval,), name="metrics-snapshot", daemon=True)
+            self._snapshotter.start()
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format"""
+        own = self.snapshot()
+        snapshots = [own]
+        if self._directory is not None:
+            self._write(own)
+            snapshots = self._read_all(own)
+        return _render(_merge(snapshots))
+
+    def _write_periodically(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self._write(self.snapshot())
+            except OSError as e:
+                print(f"Metrics snapshot error: {e}")
+
+    def _write(self, snapshot):
+        path = os.path.join(self._directory, f"{snapshot['pid']}.json")
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(temporary, path)
+
+    def _read_all(self, own):
+        snapshots = [own]
+        for name in os.listdir(self._directory):
+            if not name.endswith(".json") or name == f"{own['pid']}.json":
+                continue
+            try:
+                with open(os.path.join(self._directory, name)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            snapshot['alive'] = _alive(snapshot['pid'])
+            snapshots.append(snapshot)
+        return snapshots
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _merge(snapshots):
+    """Combine snapshots from several processes into one"""
+    merged = {}
+    for snapshot in snapshots:
+        alive = snapshot.get('alive', True)
+        for name, metric in snapshot['metrics'].items():
+            if metric['kind'] == 'gauge' and not alive:
+                continue
+            target = merged.setdefault(name, dict(metric, values={}))
+            for labels, value in metric['values']:
+                key = tuple(labels)
+                current = target['values'].get(key)
+                if current is None:
+                    target['values'][key] = value
+                elif metric['kind'] == 'histogram':
+                    target['values'][key] = [a + b for a, b in zip(current, value)]
+                elif metric.get('mode') == 'max':
+                    target['values'][key] = max(current, value)
+                else:
+                    target['values'][key] = current + value
+    return merged
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _render(merged):
+    lines = []
+    for name in sorted(merged):
+        metric = merged[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        names = metric['labels']
+        for labels, value in sorted(metric['values'].items()):
+            if metric['kind'] != 'histogram':
+                lines.append(f"{name}{_label_text(names, labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric['buckets'] + ['+Inf'], value):
+                cumulative += count
+                lines.append(f"{name}_bucket{_label_text(names, labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{_label_text(names, labels)} {value[-2]}")
+            lines.append(f"{name}_count{_label_text(names, labels)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+# Registry shared by the whole process
+METRICS = MetricsRegistry()
@@ -0,0 +1,135 @@
+"""
+Noise Calibration Module
+Tracks the microphone's background noise from the captured audio and
+keeps the speech energy threshold following it. The last calibration
+is saved per input device, so the next start begins from it instead
+of measuring the room first.
+"""
+
+import json
+import os
+import threading
+import time
+
+from voice_assistant.audio_capture import SAMPLE_WIDTH, chunk_energy
+
+
+class NoiseCalibration:
+    def __init__(self, energy_threshold=300, ratio=1.5, damping=0.15, min_threshold=30,
+                 noise_seconds=10, warmup=1.0, device=None, path=None):
+        """
+        Initialize the calibration (observe() feeds it audio)
+
+        Chunks quieter than the threshold are background noise. The noise
+        floor follows them, with the damping Recognizer uses for its dynamic
+        threshold, and the threshold is ratio times the floor. A sound that
+        stays loud for noise_seconds without a pause is noise too (a fan,
+        traffic), not speech, so the floor can rise to it. Without a saved
+        calibration the first warmup seconds are all taken as noise, like
+        Recognizer.adjust_for_ambient_noise but without waiting for them.
+
+        Args:
+            energy_threshold: Threshold until the warmup has been heard
+            ratio: Threshold over the noise floor (Recognizer.dynamic_energy_ratio)
+            damping: Fraction of the old floor kept after one second
+            min_threshold: Lowest threshold, so digital silence doesn't make every click speech
+            noise_seconds: Unbroken loud audio counted as noise
+            warmup: Seconds averaged into the floor before a saved calibration exists
+            device: Name the calibration is saved under; None doesn't save it
+            path: JSON file holding the calibration of every device
+        """
+        self.ratio = ratio
+        self.damping = damping
+        self.min_threshold = min_threshold
+        self.noise_seconds = noise_seconds
+        self.warmup = warmup
+        self.device = device
+        self.path = path
+        self.noise_floor = energy_threshold / ratio
+        self.loaded = False  # Started from a saved calibration
+        self._loud_seconds = 0.0
+        self._warmup_energy = self._warmup_seconds = 0.0
+        self._lock = threading.Lock()
+        self._stats = {'quiet_seconds': 0.0, 'loud_seconds': 0.0, 'noise_resets': 0}
+
+    @classmethod
+    def load(cls, device, path, **kwargs):
+        """The calibration saved for device, or a fresh one if there isn't any"""
+        calibration = cls(device=device, path=path, **kwargs)
+        if device is None or not path or not os.path.exists(path):
+            return calibration
+        try:
+            with open(path) as f:
+                saved = json.load(f).get(device)
+            if saved:
+                calibration.noise_floor = float(saved['noise_floor'])
+                calibration.loaded = True
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error reading noise calibration: {e}")
+        return calibration
+
+    @property
+    def energy_threshold(self):
+        return max(self.min_threshold, self.noise_floor * self.ratio)
+
+    def set_floor(self, noise_floor):
+        """Use a noise floor measured elsewhere, ending any warmup"""
+        with self._lock:
+            self.noise_floor = noise_floor
+            self._warmup_seconds = self.warmup
+
+    def observe(self, chunk, sample_rate):
+        """Account for one captured chunk of 16-bit PCM"""
+        seconds = len(chunk) / SAMPLE_WIDTH / sample_rate
+        energy = chunk_energy(chunk)
+        with self._lock:
+            if not self.loaded and self._warmup_seconds < self.warmup:
+                self._warmup_seconds += seconds
+                self._warmup_energy += energy * seconds
+                self.noise_floor = self._warmup_energy / self._warmup_seconds
+                return
+            if energy > self.energy_threshold:
+                self._stats['loud_seconds'] += seconds
+                self._loud_seconds += seconds
+                if self._loud_seconds < self.noise_seconds:
+                    return
+                if self._loud_seconds - seconds < self.noise_seconds:
+                    self._stats['noise_resets'] += 1
+            else:
+                self._stats['quiet_seconds'] += seconds
+                self._loud_seconds = 0.0
+            damping = self.damping ** seconds
+            self.noise_floor = self.noise_floor * damping + energy * (1 - damping)
+
+    def save(self):
+        """Store the noise floor for this device next to the other devices' calibrations"""
+        if self.device is None or not self.path:
+            return
+        try:
+            saved = {}
+            if os.path.exists(self.path):
+                with open(self.path) as f:
+                    saved = json.load(f)
+            saved[self.device] = {
+                'noise_floor': round(self.noise_floor, 2),
+                'energy_threshold': round(self.energy_threshold, 2),
+                'updated': time.time(),
+            }
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(saved, f, indent=2)
+            os.replace(temp_path, self.path)
+        except (OSError, ValueError) as e:
+            print(f"Error saving noise calibration: {e}")
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                {key: round(value, 2) for key, value in self._stats.items()},
+                device=self.device,
+                loaded=self.loaded,
+                warmup_seconds=round(min(self._warmup_seconds, self.warmup), 2),
+                noise_floor=round(self.noise_floor, 2),
+                energy_threshold=round(self.energy_threshold, 2),
+            )
@@ -0,0 +1,225 @@
+"""
+Recognizers Module
+Speech-to-text backends behind one interface (online Google, offline
+PocketSphinx and Vosk), and the worker pool that runs recognitions so
+they overlap with audio capture
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import speech_recognition as sr
+
+# Offline models expect 16 kHz, 16-bit mono audio
+MODEL_SAMPLE_RATE = 16000
+
+
+class RecognizerBackend:
+    """
+    One speech-to-text engine
+
+    transcribe() returns the text of an AudioData, raising
+    sr.UnknownValueError when nothing was understood and sr.RequestError
+    when the engine itself failed, like Recognizer.recognize_* do. It may be
+    called from several threads at once.
+    """
+
+    name = None
+    offline = False
+
+    def transcribe(self, audio):
+        raise NotImplementedError
+
+
+class GoogleBackend(RecognizerBackend):
+    name = 'google'
+
+    def __init__(self, recognizer=None, language="en-US"):
+        """Google Speech Recognition (free tier) through speech_recognition"""
+        self.recognizer = recognizer or sr.Recognizer()
+        self.language = language
+
+    def transcribe(self, audio):
+        return self.recognizer.recognize_google(audio, language=self.language)
+
+
+class SphinxBackend(RecognizerBackend):
+    name = 'sphinx'
+    offline = True
+
+    def __init__(self, model_path=None):
+        """
+        CMU PocketSphinx, loaded once per worker thread
+
+        Args:
+            model_path: Directory with the acoustic model, language model and
+                dictionary (en-us by default, as bundled with pocketsphinx)
+        """
+        import pocketsphinx
+
+        self.model_path = model_path or os.path.join(pocketsphinx.get_model_path(), "en-us")
+        if not os.path.isdir(self.model_path):
+            raise ValueError(f"PocketSphinx model not found at {self.model_path}")
+        self._local = threading.local()
+        # Load one decoder now so a broken model fails at startup, not on the first phrase
+        self._decoder()
+
+    def _decoder(self):
+        # A decoder holds per-utterance state, so each thread gets its own
+        decoder = getattr(self._local, 'decoder', None)
+        if decoder is None:
+            import pocketsphinx
+
+            decoder = self._local.decoder = pocketsphinx.Decoder(
+                hmm=os.path.join(self.model_path, "en-us"),
+                lm=os.path.join(self.model_path, "en-us.lm.bin"),
+                dict=os.path.join(self.model_path, "cmudict-en-us.dict"),
+                samprate=MODEL_SAMPLE_RATE,
+                loglevel="FATAL"
+            )
+        return decoder
+
+    def transcribe(self, audio):
+        decoder = self._decoder()
+        try:
+            decoder.start_utt()
+            decoder.process_raw(audio.get_raw_data(convert_rate=MODEL_SAMPLE_RATE, convert_width=2),
+                                no_search=False, full_utt=True)
+            decoder.end_utt()
+        except RuntimeError as e:
+            raise sr.RequestError(f"PocketSphinx failed: {e}")
+        hypothesis = decoder.hyp()
+        if hypothesis is None or not hypothesis.hypstr:
+            raise sr.UnknownValueError()
+        return hypothesis.hypstr
+
+
+class VoskBackend(RecognizerBackend):
+    name = 'vosk'
+    offline = True
+
+    def __init__(self, model_path):
+        """
+        Vosk (Kaldi), with the model loaded once and shared by every worker
+
+        Args:
+            model_path: Unpacked Vosk model directory, e.g. vosk-model-small-en-us-0.15
+        """
+        if not model_path or not os.path.isdir(model_path):
+            raise ValueError(f"Vosk model not found at {model_path} (download one from alphacephei.com/vosk/models)")
+        import vosk
+
+        vosk.SetLogLevel(-1)
+        self.model_path = model_path
+        self.model = vosk.Model(model_path)
+
+    def transcribe(self, audio):
+        import vosk
+
+        recognizer = vosk.KaldiRecognizer(self.model, MODEL_SAMPLE_RATE)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=MODEL_SAMPLE_RATE, convert_width=2))
+        text = json.loads(recognizer.FinalResult()).get('text', '')
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class ScriptedBackend(RecognizerBackend):
+    name = 'scripted'
+    offline = True
+
+    def __init__(self, transcripts, real_time_factor=0.0):
+        """
+        Replies with known transcripts in order, for replays that measure
+        everything around recognition rather than its accuracy
+
+        Args:
+            transcripts: Text for each phrase, in the order they are heard;
+                None or "" for a phrase that isn't understood
+            real_time_factor: Seconds spent per second of audio, to stand in
+                for a real engine's processing time
+        """
+        self.real_time_factor = real_time_factor
+        self._transcripts = iter(transcripts)
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio):
+        with self._lock:
+            text = next(self._transcripts, None)
+        seconds = len(audio.frame_data) / audio.sample_width / audio.sample_rate
+        time.sleep(seconds * self.real_time_factor)
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+def create_backend(name, recognizer=None, language="en-US", sphinx_model_path=None, vosk_model_path=None):
+    """Build the backend called name ("google", "sphinx" or "vosk")"""
+    if name == 'google':
+        return GoogleBackend(recognizer, language)
+    if name == 'sphinx':
+        return SphinxBackend(sphinx_model_path)
+    if name == 'vosk':
+        return VoskBackend(vosk_model_path)
+    raise ValueError(f"Unknown recognizer backend: {name}")
+
+
+class RecognitionPool:
+    def __init__(self, backend, workers=2):
+        """
+        Run a backend's recognitions on worker threads
+
+        Args:
+            backend: RecognizerBackend doing the work
+            workers: Recognitions in flight at once
+        """
+        self.backend = backend
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"recognizer-{backend.name}")
+        self._lock = threading.Lock()
+        self._stats = {
+            'recognitions': 0,
+            'not_understood': 0,
+            'errors': 0,
+            'audio_seconds': 0.0,
+            'busy_seconds': 0.0,
+            'in_flight': 0,
+        }
+
+    def submit(self, audio):
+        """Queue a recognition; the Future's result is the text or the backend's exception"""
+        with self._lock:
+            self._stats['in_flight'] += 1
+        return self._executor.submit(self._transcribe, audio)
+
+    def _transcribe(self, audio):
+        start = time.perf_counter()
+        outcome = 'recognitions'
+        try:
+            return self.backend.transcribe(audio)
+        except sr.UnknownValueError:
+            outcome = 'not_understood'
+            raise
+        except Exception:
+            outcome = 'errors'
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._stats['in_flight'] -= 1
+                self._stats[outcome] += 1
+                self._stats['audio_seconds'] += len(audio.frame_data) / audio.sample_width / audio.sample_rate
+                self._stats['busy_seconds'] += elapsed
+
+    def stats(self):
+        """Counters plus the real-time factor (processing seconds per audio second)"""
+        with self._lock:
+            stats = dict(self._stats, backend=self.backend.name, workers=self.workers)
+        stats['real_time_factor'] = round(stats['busy_seconds'] / stats['audio_seconds'], 3) if stats['audio_seconds'] else None
+        return stats
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
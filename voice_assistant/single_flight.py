@@ -0,0 +1,81 @@
+"""
+Single Flight Module
+Coalesces identical concurrent calls into one upstream call
+"""
+
+import threading
+
+
+class _Call:
+    """An in-flight call that waiters block on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        """Initialize an empty set of in-flight calls"""
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'executions': 0,
+            'coalesced': 0,
+            'max_waiters': 0,
+        }
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Run func once per key at a time
+
+        The first caller for a key runs func. Callers arriving while it is
+        in flight wait for it and receive the same result, or the same
+        exception re-raised.
+
+        Args:
+            key: Hashable identifier of the call (e.g. normalized intent + argument)
+            func: Callable to run
+            *args, **kwargs: Arguments passed to func
+
+        Returns:
+            Whatever func returned for the leading caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats['coalesced'] += 1
+                self._stats['max_waiters'] = max(self._stats['max_waiters'], call.waiters)
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._stats['executions'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def stats(self):
+        """Return execution and coalescing counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
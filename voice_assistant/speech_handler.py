@@ -1,34 +1,114 @@
 """
 Speech Handler Module
-Handles speech recognition functionality
+Handles speech recognition functionality over continuously captured audio
 """
 
 import speech_recognition as sr
 import threading
 import time
+from collections import namedtuple
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from config import Config
+from voice_assistant.audio_capture import SAMPLE_WIDTH, AudioCapture, MicrophoneSource, chunk_energy
+from voice_assistant.noise_calibration import NoiseCalibration
+from voice_assistant.recognizers import RecognitionPool, create_backend
+
+# A phrase taken by listen_async(): the Future of its transcript, its length in
+# seconds, and perf_counter() times of when it was captured and when the speech
+# in it ended (heard_at less the closing pause, for real-time sources)
+Phrase = namedtuple('Phrase', ['recognition', 'seconds', 'heard_at', 'ended_at'])
 
 class SpeechHandler:
-    def __init__(self):
-        """Initialize the speech recognition system"""
+    def __init__(self, source=None, backend=None):
+        """
+        Initialize the speech recognition system
+        
+        Args:
+            source: Audio source (FileSource, GeneratorSource, ...); the
+                default microphone when None
+            backend: RecognizerBackend; Config.RECOGNIZER_BACKEND when None
+        """
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        self.backend = backend or self.load_backend(Config.RECOGNIZER_BACKEND)
+        # Recognitions run here, so capture and listen() carry on meanwhile
+        self.pool = RecognitionPool(self.backend, workers=Config.RECOGNIZER_WORKERS)
+        if source is None:
+            source = MicrophoneSource(chunk=Config.CAPTURE_CHUNK)
+        
+        # Start from this microphone's last calibration; the capture thread keeps it current
+        device = getattr(source, 'device', None)
+        self.calibration = NoiseCalibration.load(
+            device,
+            Config.NOISE_CALIBRATION_FILE,
+            energy_threshold=Config.ENERGY_THRESHOLD,
+            ratio=self.recognizer.dynamic_energy_ratio,
+            damping=self.recognizer.dynamic_energy_adjustment_damping
+        )
+        if device is not None and not self.calibration.loaded:
+            print(f"No noise calibration saved for {device}; calibrating while listening.")
+        self._saved_at = time.monotonic()
         
-        # Adjust for ambient noise
-        print("Adjusting for ambient noise... Please wait.")
-        with self.microphone as source:
-            self.recognizer.adjust_for_ambient_noise(source, duration=2)
-        print("Ambient noise adjustment complete.")
+        # One capture thread reads the source for as long as the handler lives;
+        # listen() and wait_for_wake_word() consume its buffer from self.position
+        self.capture = AudioCapture(
+            source,
+            buffer_seconds=Config.CAPTURE_BUFFER_SECONDS,
+            on_chunk=self._observe
+        ).start()
+        self.position = 0
+        self.sample_rate = self.capture.sample_rate
         
         # Configure recognition settings
-        self.recognizer.energy_threshold = 300
-        self.recognizer.dynamic_energy_threshold = True
+        self.recognizer.energy_threshold = self.calibration.energy_threshold
         self.recognizer.pause_threshold = 0.8
         self.recognizer.phrase_threshold = 0.3
         self.recognizer.operation_timeout = 2
     
+    def load_backend(self, name):
+        """Create the named recognizer backend, falling back to Google if it can't load"""
+        try:
+            return create_backend(
+                name,
+                recognizer=self.recognizer,
+                language=Config.RECOGNIZER_LANGUAGE,
+                sphinx_model_path=Config.SPHINX_MODEL_PATH,
+                vosk_model_path=Config.VOSK_MODEL_PATH
+            )
+        except (ImportError, ValueError, RuntimeError) as e:
+            if name == 'google':
+                raise
+            print(f"Error loading {name} speech recognition ({e}), using Google instead")
+            return create_backend('google', recognizer=self.recognizer, language=Config.RECOGNIZER_LANGUAGE)
+    
+    def _observe(self, chunk, sample_rate):
+        # Runs on the capture thread for every chunk
+        self.calibration.observe(chunk, sample_rate)
+        if time.monotonic() - self._saved_at >= Config.NOISE_CALIBRATION_SAVE_INTERVAL:
+            self._saved_at = time.monotonic()
+            self.calibration.save()
+    
+    def adjust_for_ambient_noise(self, duration=1):
+        """Measure the noise floor from the next duration seconds of audio, as Recognizer does"""
+        heard = energy = 0.0
+        while heard < duration:
+            chunk, self.position = self.capture.read(self.position, timeout=duration + 1)
+            if chunk is None:
+                break
+            seconds = len(chunk) / SAMPLE_WIDTH / self.sample_rate
+            heard += seconds
+            energy += chunk_energy(chunk) * seconds
+        if heard:
+            self.calibration.set_floor(energy / heard)
+            self.calibration.save()
+        self.recognizer.energy_threshold = self.calibration.energy_threshold
+    
     def listen(self, timeout=1, phrase_time_limit=None):
         """
-        Listen for audio input from the microphone
+        Take the next phrase from the captured audio
+        
+        Picks up where the previous listen() or wait_for_wake_word() stopped,
+        so speech between calls isn't lost, and includes Config.CAPTURE_PRE_ROLL
+        seconds before the speech started.
         
         Args:
             timeout: Time to wait for speech to start
@@ -38,22 +118,92 @@ class SpeechHandler:
             AudioData object or None if no speech detected
         """
         try:
-            with self.microphone as source:
-                audio = self.recognizer.listen(
-                    source, 
-                    timeout=timeout, 
-                    phrase_time_limit=phrase_time_limit
-                )
-                return audio
-        except sr.WaitTimeoutError:
-            return None
+            self.recognizer.energy_threshold = self.calibration.energy_threshold
+            data, self.position = self.capture.utterance(
+                self.position,
+                self.recognizer.energy_threshold,
+                timeout=timeout,
+                phrase_time_limit=phrase_time_limit,
+                pause_threshold=self.recognizer.pause_threshold,
+                phrase_threshold=self.recognizer.phrase_threshold,
+                pre_roll=Config.CAPTURE_PRE_ROLL
+            )
+            if data is None:
+                return None
+            return sr.AudioData(data, self.sample_rate, SAMPLE_WIDTH)
         except Exception as e:
             print(f"Error listening: {e}")
             return None
     
+    def listen_async(self, timeout=1, phrase_time_limit=None):
+        """
+        Take the next phrase and start recognizing it
+        
+        Returns:
+            Phrase, or None if no speech detected
+        """
+        audio = self.listen(timeout=timeout, phrase_time_limit=phrase_time_limit)
+        if audio is None:
+            return None
+        heard_at = time.perf_counter()
+        seconds = len(audio.frame_data) / SAMPLE_WIDTH / self.sample_rate
+        cut_off = phrase_time_limit is not None and seconds >= phrase_time_limit
+        ended_at = heard_at if cut_off else heard_at - self.recognizer.pause_threshold
+        return Phrase(self.recognize_async(audio), seconds, heard_at, ended_at)
+    
+    @property
+    def live(self):
+        """True for a microphone; False for a replay, which has none of our own speech in it"""
+        return self.capture.source.live
+    
+    @property
+    def finished(self):
+        """True once a finite source (a replay) has ended and all of it was listened to"""
+        return self.capture.closed and self.position >= self.capture.position()
+    
+    def wait_for_wake_word(self, detector, timeout=5):
+        """
+        Run captured audio through a local wake word detector
+        
+        Nothing leaves the machine: chunks are matched as they are read.
+        A following listen() starts right after the wake word.
+        
+        Args:
+            detector: WakeWordDetector built for self.sample_rate
+            timeout: Seconds to listen before giving up
+            
+        Returns:
+            Detection, or None if the wake word wasn't heard
+        """
+        try:
+            deadline = time.time() + timeout
+            while time.time() < deadline:
+                chunk, self.position = self.capture.read(self.position, timeout=max(0, deadline - time.time()))
+                if chunk is None:
+                    return None
+                detection = detector.process(chunk)
+                if detection is not None:
+                    return detection
+            return None
+        except Exception as e:
+            print(f"Error listening for wake word: {e}")
+            return None
+    
+    def catch_up(self):
+        """Skip audio captured while busy (e.g. our own speech) and listen from now on"""
+        # A replay may be read ahead of real time
+        if self.live:
+            self.position = self.capture.position()
+    
+    def close(self):
+        """Stop the capture thread, save the noise calibration, release the recognition workers"""
+        self.capture.stop()
+        self.calibration.save()
+        self.pool.shutdown()
+    
     def recognize(self, audio):
         """
-        Convert audio to text using Google Speech Recognition
+        Convert audio to text with the configured backend
         
         Args:
             audio: AudioData object to recognize
@@ -63,11 +213,25 @@ class SpeechHandler:
         """
         if not audio:
             return None
-            
+        return self.result(self.recognize_async(audio))
+    
+    def recognize_async(self, audio):
+        """Start recognizing audio on the pool; pass the Future to result()"""
+        return self.pool.submit(audio)
+    
+    def result(self, future, timeout=None):
+        """
+        Wait for a recognition started by recognize_async
+        
+        Returns:
+            Recognized text string or None if recognition failed
+        """
         try:
-            # Use Google Speech Recognition (free tier)
-            text = self.recognizer.recognize_google(audio)
-            return text
+            return future.result(timeout=timeout or Config.RECOGNIZER_TIMEOUT)
+        except FutureTimeoutError:
+            future.cancel()
+            print("Speech recognition timed out")
+            return None
         except sr.UnknownValueError:
             print("Could not understand audio")
             return None
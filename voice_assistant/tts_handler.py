@@ -3,18 +3,35 @@ Text-to-Speech Handler Module
 Handles text-to-speech functionality using pyttsx3
 """
 
-import pyttsx3
+import itertools
+import os
 import threading
 import queue
 
 class TTSHandler:
-    def __init__(self):
-        """Initialize the text-to-speech engine"""
+    def __init__(self, output_dir=None):
+        """
+        Initialize the text-to-speech engine
+        
+        Args:
+            output_dir: Write each utterance to a numbered WAV file here
+                instead of playing it (for machines without speakers)
+        """
         try:
+            import pyttsx3
+            
             self.engine = pyttsx3.init()
             self.setup_voice()
             self.speech_queue = queue.Queue()
             self.is_speaking = False
+            self.output_dir = output_dir
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            self._numbers = itertools.count(1)
+            # Called with the text when its audio starts
+            self.on_start = None
+            self._current = None
+            self.engine.connect('started-utterance', self._utterance_started)
             
         except Exception as e:
             print(f"Error initializing TTS engine: {e}")
@@ -70,9 +87,14 @@ class TTSHandler:
         """Internal method to handle speech in a separate thread"""
         try:
             self.is_speaking = True
+            self._current = text
             print(f"Speaking: {text}")
             
-            self.engine.say(text)
+            if self.output_dir:
+                path = os.path.join(self.output_dir, f"{next(self._numbers):04d}.wav")
+                self.engine.save_to_file(text, path)
+            else:
+                self.engine.say(text)
             self.engine.runAndWait()
             
             self.is_speaking = False
@@ -81,6 +103,10 @@ class TTSHandler:
             print(f"Error in threaded speech: {e}")
             self.is_speaking = False
     
+    def _utterance_started(self, name):
+        if self.on_start is not None:
+            self.on_start(self._current)
+    
     def stop(self):
         """Stop current speech"""
         try:
@@ -122,3 +148,24 @@ class TTSHandler:
         except Exception as e:
             print(f"Error setting voice: {e}")
             return False
+
+
+class NullTTSHandler:
+    """TTS handler that prints instead of speaking, for replays without audio output"""
+    
+    def __init__(self):
+        # Called with the text when its audio "starts", i.e. as soon as it is spoken
+        self.on_start = None
+    
+    def speak(self, text):
+        if not text or not text.strip():
+            return
+        print(f"Speaking: {text}")
+        if self.on_start is not None:
+            self.on_start(text)
+    
+    def stop(self):
+        pass
+    
+    def is_busy(self):
+        return False
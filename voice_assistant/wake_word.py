@@ -0,0 +1,382 @@
+"""
+Wake Word Module
+On-device wake word spotting: an energy gate skips silence, and the
+speech frames it lets through are matched against enrolled recordings of
+the wake word by a streaming template matcher, so no audio is sent to a
+speech recognizer until the wake word has been heard
+"""
+
+import glob
+import os
+import wave
+from collections import deque, namedtuple
+
+import numpy as np
+
+HOP_SECONDS = 0.01  # Feature frame step
+WINDOW_SECONDS = 0.025  # Feature frame length
+MEL_BANDS = 24
+CEPSTRA = 12  # Cepstral coefficients kept (c1..c12; c0 only carries loudness)
+MAX_FREQUENCY = 8000  # Hz covered by the mel filters
+# Band energies more than 20 dB below a frame's loudest band are clipped to
+# that level, so bands the room noise fills read the same as in a clean
+# enrollment, at any loudness
+BAND_FLOOR = 0.01
+
+Detection = namedtuple('Detection', ['template', 'score', 'audio_time'])
+
+
+def read_wav(path):
+    """Return (samples as float32 in [-1, 1], sample rate) for a 16-bit WAV file"""
+    with wave.open(path, 'rb') as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit samples, got {8 * f.getsampwidth()}-bit")
+        channels = f.getnchannels()
+        rate = f.getframerate()
+        samples = np.frombuffer(f.readframes(f.getnframes()), dtype='<i2').astype(np.float32) / 32768
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def write_wav(path, samples, rate):
+    """Write float samples in [-1, 1] as a mono 16-bit WAV file"""
+    pcm = (np.clip(samples, -1, 1) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(pcm.tobytes())
+
+
+def resample(samples, rate, target_rate):
+    """Linear-interpolation resampling; enough for matching features"""
+    if rate == target_rate or not len(samples):
+        return samples
+    count = int(round(len(samples) * target_rate / rate))
+    positions = np.arange(count) * (rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def to_samples(audio):
+    """Accept 16-bit little-endian PCM bytes or a float array"""
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        return np.frombuffer(audio, dtype='<i2').astype(np.float32) / 32768
+    return np.asarray(audio, dtype=np.float32)
+
+
+def _mel(frequency):
+    return 2595 * np.log10(1 + frequency / 700)
+
+
+def _mel_filterbank(sample_rate, fft_size):
+    top = _mel(min(MAX_FREQUENCY, sample_rate / 2))
+    edges = 700 * (10 ** (np.linspace(0, top, MEL_BANDS + 2) / 2595) - 1)
+    bins = np.fft.rfftfreq(fft_size, 1 / sample_rate)
+    bank = np.zeros((MEL_BANDS, len(bins)), dtype=np.float32)
+    for band in range(MEL_BANDS):
+        low, centre, high = edges[band:band + 3]
+        rising = (bins - low) / (centre - low)
+        falling = (high - bins) / (high - centre)
+        bank[band] = np.maximum(0, np.minimum(rising, falling))
+    return bank
+
+
+class FeatureExtractor:
+    def __init__(self, sample_rate):
+        """
+        Streaming MFCC-style features, one vector per HOP_SECONDS
+
+        Args:
+            sample_rate: Rate of the samples passed to push()
+        """
+        self.sample_rate = sample_rate
+        self.hop = int(round(sample_rate * HOP_SECONDS))
+        self.window = int(round(sample_rate * WINDOW_SECONDS))
+        self.fft_size = 1 << (self.window - 1).bit_length()
+        self._taper = np.hamming(self.window).astype(np.float32)
+        self._filters = _mel_filterbank(sample_rate, self.fft_size)
+        # DCT-II rows for c1..c12
+        band = np.arange(MEL_BANDS) + 0.5
+        self._dct = np.cos(np.pi / MEL_BANDS * band * np.arange(1, CEPSTRA + 1)[:, None]).astype(np.float32)
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def reset(self):
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def push(self, samples):
+        """Add samples and return the feature frames completed by them, shape (n, CEPSTRA)"""
+        pending = np.concatenate((self._pending, samples)) if len(self._pending) else samples
+        count = max(0, (len(pending) - self.window) // self.hop + 1)
+        self._pending = pending[count * self.hop:]
+        if not count:
+            return np.zeros((0, CEPSTRA), dtype=np.float32)
+
+        starts = np.arange(count) * self.hop
+        frames = pending[starts[:, None] + np.arange(self.window)] * self._taper
+        power = np.abs(np.fft.rfft(frames, self.fft_size)) ** 2
+        bands = power @ self._filters.T
+        energies = np.log(np.maximum(bands, bands.max(axis=1, keepdims=True) * BAND_FLOOR + 1e-10))
+        return energies @ self._dct.T
+
+    def features(self, samples):
+        """Features of a whole recording"""
+        self.reset()
+        result = self.push(np.asarray(samples, dtype=np.float32))
+        self.reset()
+        return result
+
+
+class EnergyGate:
+    def __init__(self, ratio=3.0, min_rms=0.003, hangover=0.3, adapt=0.05):
+        """
+        Voice activity from frame energy against an adaptive noise floor
+
+        Args:
+            ratio: Frames louder than ratio x noise floor are speech
+            min_rms: Frames quieter than this are never speech
+            hangover: Seconds the gate stays open after the last speech frame
+            adapt: How fast the noise floor follows quiet frames (0-1)
+        """
+        self.ratio = ratio
+        self.min_rms = min_rms
+        self.hangover_frames = int(round(hangover / HOP_SECONDS))
+        self.adapt = adapt
+        self.noise_floor = None
+        self._quiet_for = self.hangover_frames + 1
+
+    @property
+    def open(self):
+        return self._quiet_for <= self.hangover_frames
+
+    def reset(self):
+        """Close the gate, keeping the noise floor learned so far"""
+        self._quiet_for = self.hangover_frames + 1
+
+    def update(self, rms):
+        """Feed one frame's RMS; return whether the gate is open after it"""
+        if self.noise_floor is None:
+            self.noise_floor = rms
+        if rms > max(self.min_rms, self.noise_floor * self.ratio):
+            self._quiet_for = 0
+            # Creep up during long speech so a lasting rise in noise can't hold the gate open
+            self.noise_floor += (rms - self.noise_floor) * self.adapt * 0.01
+        else:
+            self._quiet_for += 1
+            self.noise_floor += (rms - self.noise_floor) * self.adapt
+        return self.open
+
+
+class TemplateMatcher:
+    def __init__(self, template):
+        """
+        Streaming subsequence DTW against one template
+
+        Each input frame advances the alignment by 0, 1 or 2 template frames,
+        so every update is a handful of vector operations over the template.
+
+        Args:
+            template: Feature frames of one recording of the wake word
+        """
+        self.template = template
+        self.length = len(template)
+        self.reset()
+
+    def reset(self):
+        self._cost = np.full(self.length, np.inf)
+        self._steps = np.zeros(self.length)
+
+    def push(self, frame):
+        """Add one feature frame; return the mean cost of the best match ending here"""
+        local = np.sqrt(((self.template - frame) ** 2).sum(axis=1))
+
+        # Predecessors: same template frame, previous one, or the one before that;
+        # a match may start afresh at the first template frame
+        cost = np.full((3, self.length), np.inf)
+        steps = np.zeros((3, self.length))
+        cost[0], steps[0] = self._cost, self._steps
+        cost[1, 1:], steps[1, 1:] = self._cost[:-1], self._steps[:-1]
+        cost[1, 0] = 0
+        cost[2, 2:], steps[2, 2:] = self._cost[:-2], self._steps[:-2]
+
+        mean = (cost + local) / (steps + 1)
+        best = mean.argmin(axis=0)
+        columns = np.arange(self.length)
+        self._cost = cost[best, columns] + local
+        self._steps = steps[best, columns] + 1
+
+        # Only count alignments within half to twice the template's length
+        if not self.length / 2 <= self._steps[-1] <= self.length * 2:
+            return np.inf
+        return self._cost[-1] / self._steps[-1]
+
+
+def trim_silence(samples, sample_rate, relative=0.1, min_rms=0.003):
+    """Cut a recording down to the span louder than relative x its loudest frame"""
+    hop = int(round(sample_rate * HOP_SECONDS))
+    count = len(samples) // hop
+    if not count:
+        return samples
+    rms = np.sqrt((samples[:count * hop].reshape(count, hop) ** 2).mean(axis=1))
+    loud = np.flatnonzero(rms > max(min_rms, rms.max() * relative))
+    if not len(loud):
+        return samples[:0]
+    return samples[loud[0] * hop:(loud[-1] + 1) * hop]
+
+
+def distance(template, recording):
+    """Mean DTW cost of the best alignment of template within recording"""
+    matcher = TemplateMatcher(template)
+    return min((matcher.push(frame) for frame in recording), default=np.inf)
+
+
+class WakeWordDetector:
+    def __init__(self, recordings, sample_rate=16000, threshold=None, gate=None,
+                 pre_roll=0.2, refractory=1.0, margin=1.6, default_threshold=6.0):
+        """
+        Initialize the detector
+
+        Args:
+            recordings: {name: samples} of the wake word, each at sample_rate
+            sample_rate: Rate of the audio passed to process()
+            threshold: Mean DTW cost at which the wake word fires; None takes
+                margin x the largest distance between the recordings, or
+                default_threshold when there is only one
+            gate: EnergyGate deciding which frames are matched
+            pre_roll: Seconds of audio before the gate opens that are matched too
+            refractory: Seconds after a detection during which it can't fire again
+        """
+        if not recordings:
+            raise ValueError("At least one wake word recording is needed")
+        self.sample_rate = sample_rate
+        self.extractor = FeatureExtractor(sample_rate)
+        self.gate = gate or EnergyGate()
+        self.refractory = refractory
+
+        self.templates = {}
+        for name, samples in recordings.items():
+            features = self.extractor.features(trim_silence(samples, sample_rate))
+            if len(features) < 5:
+                raise ValueError(f"Wake word recording {name} has no speech in it")
+            self.templates[name] = features
+        self.threshold = threshold if threshold is not None else self.calibrate(margin, default_threshold)
+        self._matchers = {name: TemplateMatcher(features) for name, features in self.templates.items()}
+
+        self.hop = self.extractor.hop
+        self._pre_roll = deque(maxlen=max(1, int(round(pre_roll / HOP_SECONDS))))
+        self._remainder = np.zeros(0, dtype=np.float32)
+        # Counted in feature hops, so audio time doesn't drift
+        self._frames = 0
+        self._speech_frames = 0
+        self._detections = 0
+        self._blocked_until = 0
+
+    @classmethod
+    def from_directory(cls, directory, sample_rate=16000, **kwargs):
+        """Build a detector from the WAV recordings in directory"""
+        recordings = {}
+        for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+            samples, rate = read_wav(path)
+            recordings[os.path.basename(path)] = resample(samples, rate, sample_rate)
+        return cls(recordings, sample_rate, **kwargs)
+
+    def calibrate(self, margin, default):
+        """Threshold from how far apart the recordings are from each other"""
+        names = list(self.templates)
+        if len(names) < 2:
+            return default
+        spread = max(
+            distance(self.templates[a], self.templates[b])
+            for a in names for b in names if a != b
+        )
+        return spread * margin
+
+    def reset(self):
+        """Forget buffered audio and partial matches (e.g. when the stream restarts)"""
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._pre_roll.clear()
+        self.extractor.reset()
+        for matcher in self._matchers.values():
+            matcher.reset()
+        self.gate.reset()
+
+    def process(self, audio):
+        """
+        Feed audio from the stream
+
+        Args:
+            audio: 16-bit PCM bytes or float samples at sample_rate, any length
+
+        Returns:
+            The first Detection in this audio, or None
+        """
+        samples = to_samples(audio)
+        if len(self._remainder):
+            samples = np.concatenate((self._remainder, samples))
+        count = len(samples) // self.hop
+        self._remainder = samples[count * self.hop:]
+        if not count:
+            return None
+
+        frames = samples[:count * self.hop].reshape(count, self.hop)
+        energies = np.sqrt((frames ** 2).mean(axis=1))
+        detection = None
+        for frame, rms in zip(frames, energies):
+            self._frames += 1
+            was_open = self.gate.open
+            if not self.gate.update(rms):
+                if was_open:
+                    # The utterance ended: start the next one from scratch
+                    self.extractor.reset()
+                    for matcher in self._matchers.values():
+                        matcher.reset()
+                self._pre_roll.append(frame)
+                continue
+
+            self._speech_frames += 1
+            if not was_open:
+                # Speech onset: match the quiet lead-in the gate held back too
+                self._pre_roll.append(frame)
+                audio_in = np.concatenate(self._pre_roll)
+                self._pre_roll.clear()
+            else:
+                audio_in = frame
+            found = self._match(self.extractor.push(audio_in))
+            if found is not None and detection is None:
+                detection = found
+        return detection
+
+    def _match(self, features):
+        found = None
+        for vector in features:
+            for name, matcher in self._matchers.items():
+                score = matcher.push(vector)
+                if score <= self.threshold and self._frames >= self._blocked_until:
+                    found = Detection(name, float(score), round(self._frames * HOP_SECONDS, 3))
+                    self._detections += 1
+                    self._blocked_until = self._frames + self.refractory / HOP_SECONDS
+                    for other in self._matchers.values():
+                        other.reset()
+                    break
+        return found
+
+    def detect_file(self, path, chunk=1024):
+        """Run a WAV file through the detector in stream-sized chunks; return every Detection"""
+        samples, rate = read_wav(path)
+        samples = resample(samples, rate, self.sample_rate)
+        self.reset()
+        detections = []
+        for start in range(0, len(samples), chunk):
+            detection = self.process(samples[start:start + chunk])
+            if detection is not None:
+                detections.append(detection)
+        return detections
+
+    def stats(self):
+        return {
+            'seconds': round(self._frames * HOP_SECONDS, 2),
+            'speech_seconds': round(self._speech_frames * HOP_SECONDS, 2),
+            'detections': self._detections,
+            'templates': len(self.templates),
+            'threshold': round(float(self.threshold), 3),
+        }
@@ -0,0 +1,220 @@
+"""
+Wikipedia Cache Module
+Two-tier (memory LRU + SQLite) cache for Wikipedia lookups
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from voice_assistant.metrics import METRICS
+
+LOOKUPS = METRICS.counter(
+    'assistant_wikipedia_cache_lookups_total', 'Wikipedia cache lookups by result', ['result'])
+
+
+class WikiCache:
+    def __init__(self, path=None, memory_size=256, disk_size=10000, ttl=86400, negative_ttl=3600):
+        """
+        Initialize the cache
+
+        The SQLite file is opened in WAL mode so several processes on the
+        same host (e.g. web_app.py and streamlit_app.py) can share it.
+
+        Args:
+            path: SQLite database file, or None for a memory-only cache
+            memory_size: Maximum number of entries kept in memory
+            disk_size: Maximum number of entries kept on disk
+            ttl: Seconds a found summary stays valid
+            negative_ttl: Seconds a 'not found' answer stays valid
+        """
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes = 0
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+        }
+
+        if path:
+            try:
+                self._db = self._open(path)
+            except (sqlite3.Error, OSError) as e:
+                print(f"Wikipedia disk cache unavailable, using memory only: {e}")
+                self._db = None
+
+    @staticmethod
+    def _open(path):
+        """Open (and create if needed) the SQLite cache file"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS wiki_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " negative INTEGER NOT NULL,"
+            " expires REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS wiki_cache_expires ON wiki_cache (expires)")
+        return db
+
+    @staticmethod
+    def make_key(query, lang):
+        """Normalize a query into a cache key"""
+        return f"{lang}:{' '.join(query.lower().split())}"
+
+    def get(self, query, lang="en"):
+        """
+        Look up a cached response
+
+        Args:
+            query: Search query as typed by the user
+            lang: Wikipedia language code
+
+        Returns:
+            Cached response string or None on a miss
+        """
+        key = self.make_key(query, lang)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, negative, expires = entry
+                if expires > now:
+                    self._memory.move_to_end(key)
+                    self._count_hit('memory_hits', negative)
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT value, negative, expires FROM wiki_cache WHERE key = ? AND expires > ?",
+                        (key, now),
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"Wikipedia cache read error: {e}")
+                    row = None
+
+                if row is not None:
+                    value, negative, expires = row
+                    self._remember(key, value, bool(negative), expires)
+                    self._count_hit('disk_hits', negative)
+                    return value
+
+            self._stats['misses'] += 1
+            LOOKUPS.inc('miss')
+            return None
+
+    def expires_at(self, query, lang="en"):
+        """
+        Return when a cached entry expires (epoch seconds), or None if
+        there is no live entry; unlike get() this does not count as a lookup
+        """
+        key = self.make_key(query, lang)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[2] > now:
+                return entry[2]
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT expires FROM wiki_cache WHERE key = ? AND expires > ?", (key, now)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"Wikipedia cache read error: {e}")
+                    row = None
+                if row is not None:
+                    return row[0]
+        return None
+
+    def set(self, query, value, lang="en", negative=False):
+        """
+        Store a response
+
+        Args:
+            query: Search query as typed by the user
+            value: Response string to cache
+            lang: Wikipedia language code
+            negative: True if the response says nothing was found
+        """
+        key = self.make_key(query, lang)
+        expires = time.time() + (self.negative_ttl if negative else self.ttl)
+
+        with self._lock:
+            self._remember(key, value, negative, expires)
+
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO wiki_cache (key, value, negative, expires) VALUES (?, ?, ?, ?)",
+                        (key, value, int(negative), expires),
+                    )
+                    self._writes += 1
+                    if self._writes % 100 == 0:
+                        self._evict_disk()
+                except sqlite3.Error as e:
+                    print(f"Wikipedia cache write error: {e}")
+
+    def _remember(self, key, value, negative, expires):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        self._memory[key] = (value, negative, expires)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _evict_disk(self):
+        """Drop expired rows, then the soonest-expiring rows over the size limit"""
+        self._db.execute("DELETE FROM wiki_cache WHERE expires <= ?", (time.time(),))
+        count = self._db.execute("SELECT COUNT(*) FROM wiki_cache").fetchone()[0]
+        if count > self.disk_size:
+            removed = count - self.disk_size
+            self._db.execute(
+                "DELETE FROM wiki_cache WHERE key IN "
+                "(SELECT key FROM wiki_cache ORDER BY expires LIMIT ?)",
+                (removed,),
+            )
+            self._stats['evictions'] += removed
+
+    def _count_hit(self, tier, negative):
+        self._stats[tier] += 1
+        if negative:
+            self._stats['negative_hits'] += 1
+        # memory_hits -> memory_hit, or negative_hit for cached 'not found' answers
+        LOOKUPS.inc('negative_hit' if negative else tier[:-1])
+
+    def clear(self):
+        """Remove every cached entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM wiki_cache")
+
+    def stats(self):
+        """Return hit/miss counters and current sizes"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+            lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+            stats['hit_rate'] = (lookups - stats['misses']) / lookups if lookups else 0.0
+        return stats
@@ -4,10 +4,18 @@ Web interface for the Voice Assistant
 Provides a clean web UI for text-based interaction
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, g
 import json
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from config import Config
+from voice_assistant.admission import BUSY_MESSAGE, Overloaded
 from voice_assistant.command_processor import CommandProcessor
-from voice_assistant.tts_handler import TTSHandler
+from voice_assistant.conversation_log import ConversationLog
+from voice_assistant.conversation_store import ConversationStore, SQLiteConversationStore
+from voice_assistant.metrics import METRICS
 import datetime
 
 app = Flask(__name__)
@@ -23,49 +31,120 @@ class WebVoiceAssistant:
         try:
             self.tts = WebTTSHandler()
             self.processor = CommandProcessor(self.tts)
-            self.conversation_history = []
+            if Config.HISTORY_BACKEND == 'sqlite':
+                # Shared by every worker process serving this app
+                self.conversations = SQLiteConversationStore(
+                    Config.HISTORY_PATH,
+                    max_messages=Config.HISTORY_MAX_MESSAGES,
+                    max_sessions=Config.HISTORY_MAX_SESSIONS,
+                    session_ttl=Config.HISTORY_SESSION_TTL
+                )
+            else:
+                self.conversations = ConversationStore(
+                    max_messages=Config.HISTORY_MAX_MESSAGES,
+                    max_sessions=Config.HISTORY_MAX_SESSIONS,
+                    session_ttl=Config.HISTORY_SESSION_TTL,
+                    max_bytes=Config.HISTORY_MAX_BYTES
+                )
+            self.log = None
+            if Config.CONVERSATION_LOG_DIR:
+                self.log = ConversationLog(
+                    Config.CONVERSATION_LOG_DIR,
+                    segment_bytes=Config.CONVERSATION_LOG_SEGMENT_BYTES,
+                    max_segments=Config.CONVERSATION_LOG_MAX_SEGMENTS,
+                    flush_interval=Config.CONVERSATION_LOG_FLUSH_INTERVAL
+                )
         except Exception as e:
             print(f"Error initializing Web Voice Assistant: {e}")
             raise
 
-    def process_message(self, user_input):
-        """Process user input and return response"""
-        if not user_input or not user_input.strip():
-            return "Please say something!"
-        
+    def add_user_message(self, user_input, session_id):
+        """Record the user's message and return it with its id"""
+        return self._record(session_id, {
+            'type': 'user',
+            'message': user_input,
+            'timestamp': datetime.datetime.now().strftime("%H:%M:%S")
+        })
+    
+    def respond(self, user_input, session_id):
+        """Answer an already recorded user message and return the stored reply"""
+        busy = False
         try:
-            # Add user message to history
-            timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-            self.conversation_history.append({
-                'type': 'user',
-                'message': user_input,
-                'timestamp': timestamp
-            })
-            
             # Process the command
             response = self.processor.process_command(user_input)
-            
-            # Add assistant response to history
-            self.conversation_history.append({
-                'type': 'assistant',
-                'message': response,
-                'timestamp': timestamp
-            })
-            
-            return response
-            
+        except Overloaded:
+            response = BUSY_MESSAGE
+            busy = True
         except Exception as e:
-            error_msg = f"Sorry, I encountered an error: {str(e)}"
-            self.conversation_history.append({
-                'type': 'assistant',
-                'message': error_msg,
-                'timestamp': timestamp
-            })
-            return error_msg
+            response = f"Sorry, I encountered an error: {str(e)}"
+        
+        # Add assistant response to history
+        reply = {
+            'type': 'assistant',
+            'message': response,
+            'timestamp': datetime.datetime.now().strftime("%H:%M:%S")
+        }
+        if busy:
+            reply['busy'] = True
+        return self._record(session_id, reply)
+    
+    def _record(self, session_id, message):
+        """Add a message to the session's history and queue it for the durable log"""
+        message = self.conversations.append(session_id, message)
+        if self.log is not None:
+            self.log.write(dict(message, session=session_id, source='web', time=time.time()))
+        return message
 
 # Initialize the assistant
 assistant = WebVoiceAssistant()
 
+# Threads answering /chat/stream requests while the response streams keepalives
+stream_pool = ThreadPoolExecutor(max_workers=Config.STREAM_WORKERS, thread_name_prefix="stream")
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+REQUEST_SECONDS = METRICS.histogram(
+    'assistant_http_request_seconds', 'Time to answer HTTP requests (to headers for streams)',
+    ['route', 'method', 'status'])
+
+# SQLite history is shared, so every worker reports the same count
+METRICS.gauge('assistant_active_sessions', 'Conversation sessions currently kept',
+              lambda: assistant.conversations.stats()['sessions'],
+              mode='max' if Config.HISTORY_BACKEND == 'sqlite' else 'sum')
+
+if Config.METRICS_DIR:
+    METRICS.share(Config.METRICS_DIR, Config.METRICS_SNAPSHOT_INTERVAL)
+
+SESSION_COOKIE = 'assistant_session'
+
+@app.before_request
+def load_session():
+    """Identify the client's conversation by its session cookie"""
+    g.session_id = request.cookies.get(SESSION_COOKIE)
+    g.new_session = not g.session_id
+    if g.new_session:
+        g.session_id = uuid.uuid4().hex
+
+@app.after_request
+def save_session(response):
+    """Hand new clients their session cookie"""
+    if getattr(g, 'new_session', False):
+        response.set_cookie(SESSION_COOKIE, g.session_id, httponly=True, samesite='Lax')
+    return response
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    """Observe the request's latency under its route pattern"""
+    start = getattr(g, 'request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - start, route, request.method, str(response.status_code))
+    return response
+
 @app.route('/')
 def index():
     """Main page"""
@@ -81,26 +160,159 @@ def chat():
         if not user_input:
             return jsonify({'error': 'No message provided'}), 400
         
-        response = assistant.process_message(user_input)
+        user_message = assistant.add_user_message(user_input, g.session_id)
+        reply = assistant.respond(user_input, g.session_id)
         
-        return jsonify({
-            'response': response,
+        body = jsonify({
+            'response': reply['message'],
+            'id': reply['id'],
+            'user_id': user_message['id'],
             'timestamp': datetime.datetime.now().strftime("%H:%M:%S")
         })
+        if reply.get('busy'):
+            # Shed load: tell the client to come back rather than queueing it
+            body.headers['Retry-After'] = str(Config.BUSY_RETRY_AFTER)
+            return body, 503
+        return body
+        
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+def sse_event(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/chat/stream', methods=['GET', 'POST'])
+def chat_stream():
+    """
+    Handle a chat message as a Server-Sent Events stream
+    
+    An 'ack' event is sent as soon as the message is recorded, keepalive
+    comments while the command runs, then one 'sentence' event per
+    sentence of the answer and a final 'done' event with the full reply.
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        user_input = str(data.get('message', '')).strip()
+    else:
+        user_input = request.args.get('message', '').strip()
+    
+    if not user_input:
+        return jsonify({'error': 'No message provided'}), 400
+    
+    session_id = g.session_id
+    user_message = assistant.add_user_message(user_input, session_id)
+    pending = stream_pool.submit(assistant.respond, user_input, session_id)
+    
+    def events():
+        yield sse_event('ack', {'id': user_message['id'], 'timestamp': user_message['timestamp']})
+        
+        while True:
+            try:
+                reply = pending.result(timeout=Config.STREAM_KEEPALIVE)
+                break
+            except FutureTimeout:
+                # Keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+            except Exception as e:
+                yield sse_event('error', {'error': f'Server error: {str(e)}'})
+                return
+        
+        for sentence in SENTENCE_END.split(reply['message'].strip()):
+            yield sse_event('sentence', {'text': sentence})
+        yield sse_event('done', {
+            'id': reply['id'],
+            'response': reply['message'],
+            'timestamp': reply['timestamp'],
+            'busy': reply.get('busy', False)
+        })
+    
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    """Handle a JSON array of messages, answering them in order"""
+    try:
+        messages = request.get_json(silent=True)
+        
+        if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+            return jsonify({'error': 'Expected a JSON array of messages'}), 400
+        if len(messages) > Config.BATCH_MAX_COMMANDS:
+            return jsonify({'error': f'At most {Config.BATCH_MAX_COMMANDS} messages per batch'}), 413
+        
+        responses = assistant.processor.process_batch([m.strip() for m in messages])
+        
+        busy = [response == BUSY_MESSAGE for response in responses]
+        body = jsonify({
+            'responses': responses,
+            'busy': busy,
+            'timestamp': datetime.datetime.now().strftime("%H:%M:%S")
+        })
+        if any(busy):
+            # Shed commands are marked per item; the client should back off before resending them
+            body.headers['Retry-After'] = str(Config.BUSY_RETRY_AFTER)
+            if all(busy):
+                return body, 503
+        return body
         
     except Exception as e:
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/history')
 def history():
-    """Get conversation history"""
-    return jsonify({'history': assistant.conversation_history})
+    """
+    Get this session's conversation history
+    
+    Supports ?after=<id>&limit=N so clients fetch only new messages, and
+    answers 304 when If-None-Match carries the current ETag.
+    """
+    after = request.args.get('after', default=0, type=int)
+    limit = request.args.get('limit', default=Config.HISTORY_MAX_MESSAGES, type=int)
+    limit = max(1, min(limit, Config.HISTORY_MAX_MESSAGES))
+    
+    messages, has_more, last_id = assistant.conversations.page(g.session_id, after, limit)
+    
+    # The newest id changes whenever the session gains or loses messages
+    etag = f"{last_id}-{after}-{limit}"
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        response = jsonify({
+            'history': messages,
+            'next_after': messages[-1]['id'] if messages else after,
+            'has_more': has_more
+        })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/stats')
+def stats():
+    """Get per-intent latency and Wikipedia cache and resolution counters"""
+    return jsonify({
+        'wikipedia_cache': assistant.processor.wiki_cache.stats(),
+        'wikipedia_resolution': dict(assistant.processor.wiki_resolution_stats),
+        'wikipedia_single_flight': assistant.processor.single_flight.stats(),
+        'intents': assistant.processor.registry.stats(),
+        'admission': assistant.processor.admission.stats(),
+        'conversations': assistant.conversations.stats(),
+        'conversation_log': assistant.log.stats() if assistant.log else None
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus text exposition of every worker's metrics"""
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/clear')
 def clear_history():
-    """Clear conversation history"""
-    assistant.conversation_history = []
+    """Clear this session's conversation history"""
+    assistant.conversations.clear(g.session_id)
     return jsonify({'status': 'cleared'})
 
 if __name__ == '__main__':
+    # Development server; use serve.py for production
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file